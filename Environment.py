@@ -1,20 +1,65 @@
 import os.path
 import pickle as pkl
 import copy
-from typing import List, TypeVar
-import matplotlib.pyplot as plt
+import bisect
+from typing import Dict, List, Tuple, TypeVar
+import numpy as np
 
 Position = TypeVar("Position", bound=List[int])
 """
     Position type is a list of int (row and column)
 """
 
+NODE_TYPES = "FMGP"
+"""
+    Node type characters ordered by their terrain code: Flat (0), Mountain (1), Goal (2), Pitfall (3)
+"""
+
+FLAT, MOUNTAIN, GOAL, PITFALL = range(len(NODE_TYPES))
+
+ACTION_DELTAS = np.array([[-1, 0], [0, -1], [1, 0], [0, 1]], dtype=np.int64)
+"""
+    Row and column offsets of the actions UP (0), LEFT (1), DOWN (2) and RIGHT (3)
+"""
+
+REWARD_MATRIX = np.array([
+    # To: F   M    G     P         From:
+    [-1, -3, 100, -100],        # Flat
+    [-1, -2, 100, -100],        # Mountain
+    [-1, -1, 100, -100],        # Goal
+    [-1, -1, 100, -100],        # Pitfall
+], dtype=np.int32)
+"""
+    Transition reward indexed by the terrain codes of the previous and the next node, see *Environment.get_reward*
+"""
+
+OUT_OF_BOUNDS_REWARD = -1
+
+
+def _cell_hashes(nodes: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """
+        This method mixes each node index with its terrain code (SplitMix64 finalizer), so that the hash of a grid is
+        the XOR of its cells and a single cell can be swapped in and out of it.
+
+        :param nodes: Node indices
+        :param codes: Terrain codes of the nodes
+        :return: 64-bit hash of each cell
+    """
+
+    x = nodes.astype(np.uint64) * np.uint64(len(NODE_TYPES)) + codes.astype(np.uint64)
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+
+    return x ^ (x >> np.uint64(31))
+
 
 class Environment:
     def __init__(self, grid_file: str):
         """
         This method is the constructor of Environment class, which takes the grid file path to initiate the environment.
-        Grid file is a pickle file, which contains two variables:
+        Grid file is either a binary grid file (see *grid_format*), whose terrain is memory-mapped, or a pickle file,
+        which contains two variables:
          - **grid**: 2 dimensional list where the nodes are annotated as a string.
          - **start**: Starting position of the agent.
 
@@ -25,17 +70,117 @@ class Environment:
         if not os.path.exists(grid_file):
             raise FileNotFoundError(f"The given grid_file is not found! ({grid_file}).")
 
-        with open(grid_file, "rb") as f:
-            _grid_data = pkl.load(f)
+        import grid_format
+
+        goals = None
 
-        self.grid = _grid_data["grid"]
+        if grid_format.is_binary_grid(grid_file):
+            # The goal index comes from the header, so the terrain is not scanned for it
+            self.terrain, self.starting_position, goals = grid_format.read_grid(grid_file)
+            self._grid = None
+        else:
+            with open(grid_file, "rb") as f:
+                _grid_data = pkl.load(f)
 
-        self.starting_position = _grid_data["start"]
+            self._grid = _grid_data["grid"]
+            self.terrain = self._encode_terrain(self._grid)
 
-        self.grid_size = len(self.grid)
+            self.starting_position = _grid_data["start"]
+
+        self.grid_size = self.terrain.shape[0]
         self.limits = [0, self.grid_size - 1]
         self.current_position = copy.deepcopy(self.starting_position)
 
+        # Derived data, built on first use and then kept up to date by *set_cell*
+        self._goals = goals
+        self._histogram = None
+        self._hash = None
+
+        self._compile()
+
+    @property
+    def grid(self) -> List[List[str]]:
+        """
+            2 dimensional list where the nodes are annotated as a string. For binary grid files, it is built from the
+            terrain codes on first access.
+
+            :return: Grid map
+        """
+
+        if self._grid is None:
+            self._grid = np.array(list(NODE_TYPES))[self.terrain].tolist()
+
+        return self._grid
+
+    @staticmethod
+    def _encode_terrain(grid: List[List[str]]) -> np.ndarray:
+        """
+            This method converts the grid of node type characters to a 2 dimensional array of terrain codes.
+
+            :param grid: 2 dimensional list where the nodes are annotated as a string
+            :return: Terrain codes as *uint8* array, see *NODE_TYPES*
+            :raise: Unknown node type exception
+        """
+
+        chars = np.array(grid, dtype=str)
+        terrain = np.full(chars.shape, 255, dtype=np.uint8)
+
+        for code, node_type in enumerate(NODE_TYPES):
+            terrain[chars == node_type] = code
+
+        if np.any(terrain == 255):
+            raise ValueError(f"The grid contains unknown node types! (expected one of {NODE_TYPES}).")
+
+        return terrain
+
+    def _compile(self):
+        """
+            This method compiles the transition tables of the grid once, so that *step* is a pure table lookup:
+             - **next_state** *(S x A)*: Node index reached by taking the action, clamped to the grid.
+             - **reward** *(S x A)*: Transition reward based on *get_reward*.
+             - **terminal** *(S)*: Whether entering the node ends the episode.
+
+            Terminal nodes are absorbing with zero reward, as in *move*.
+
+            :return: Nothing
+        """
+
+        next_state, reward, terminal = self._transitions(np.arange(self.grid_size * self.grid_size, dtype=np.int64))
+
+        self.next_state = next_state.astype(np.int32)
+        self.reward = reward.astype(np.int32)
+        self.terminal = terminal
+
+    def _transitions(self, states: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+            This method computes the rows of the transition tables for the given node indices, see *_compile*.
+
+            :param states: Node indices
+            :return: Tuple (**next_state**, **reward**, **terminal**) of the given node indices
+        """
+
+        size = self.grid_size
+
+        rows = states // size
+        cols = states % size
+
+        next_rows = rows[:, None] + ACTION_DELTAS[:, 0]
+        next_cols = cols[:, None] + ACTION_DELTAS[:, 1]
+        inside = (next_rows >= 0) & (next_rows < size) & (next_cols >= 0) & (next_cols < size)
+
+        next_state = np.clip(next_rows, 0, size - 1) * size + np.clip(next_cols, 0, size - 1)
+
+        codes = self.terrain.ravel()[states]
+        terminal = (codes == GOAL) | (codes == PITFALL)
+
+        reward = np.where(inside, REWARD_MATRIX[codes[:, None], self.terrain.ravel()[next_state]],
+                          OUT_OF_BOUNDS_REWARD)
+
+        next_state[terminal] = states[terminal, None]
+        reward[terminal] = 0
+
+        return next_state, reward, terminal
+
     def reset(self) -> int:
         """
             This method resets the environment to the starting position.
@@ -106,38 +251,25 @@ class Environment:
 
         assert 0 <= action <= 3, "Illegal action."
 
-        if self.is_done(self.current_position):
-            return self.to_node_index(self.current_position), 0, True
-
-        new_position = self._move_vertical(action) if action in [0, 2] else self._move_horizontal(action)
-
-        transition_reward = self.get_reward(self.current_position, new_position)
+        node_index, transition_reward, done = self.step(self.to_node_index(self.current_position), action)
 
-        self.current_position = [min(self.grid_size - 1, max(0, axis)) for axis in new_position]
+        self.current_position = self.to_position(node_index)
 
-        done = self.is_done(new_position)
-
-        return self.to_node_index(self.current_position), transition_reward, done
-
-    def _move_vertical(self, action: int) -> Position:
-        """
-            This method takes the action and moves the agent on vertical axis.
+        return node_index, transition_reward, done
 
-            :param action: Target action
-            :return: Moved position
+    def step(self, state: int, action: int) -> Tuple[int, int, bool]:
         """
+            This method applies the given action on the given node index by looking up the compiled transition tables.
+            Unlike *move*, the current position of the environment is not changed.
 
-        return [self.current_position[0] + (action - 1), self.current_position[1]]
-
-    def _move_horizontal(self, action: int) -> Position:
+            :param state: Node index where the action is taken
+            :param action: Taken action as an integer value in range ``[0, 3]``
+            :returns: Tuple (**node_index**, **reward**, **done**) as in *move*
         """
-            This method takes the action and moves the agent on horizontal axis.
 
-            :param action: Target action
-            :return: Moved position
-        """
+        node_index = self.next_state.item(state, action)
 
-        return [self.current_position[0], self.current_position[1] + (action - 2)]
+        return node_index, self.reward.item(state, action), self.terminal.item(node_index)
 
     def get_node_type(self, position: Position) -> str:
         """
@@ -147,7 +279,7 @@ class Environment:
             :return: Corresponding node on the grid
         """
 
-        return self.grid[position[0]][position[1]]
+        return NODE_TYPES[self.terrain.item(position[0], position[1])]
 
     def get_reward(self, previous_pos: Position, next_pos: Position) -> int:
         """
@@ -184,20 +316,12 @@ class Environment:
         assert next_pos and len(next_pos) == 2, "Illegal position"
 
         if next_pos[0] < 0 or next_pos[0] >= self.grid_size:
-            return -1
+            return OUT_OF_BOUNDS_REWARD
         if next_pos[1] < 0 or next_pos[1] >= self.grid_size:
-            return -1
+            return OUT_OF_BOUNDS_REWARD
 
-        if self.grid[next_pos[0]][next_pos[1]] == 'G':
-            return 100
-        if self.grid[next_pos[0]][next_pos[1]] == 'P':
-            return -100
-        if self.grid[next_pos[0]][next_pos[1]] == self.grid[previous_pos[0]][previous_pos[1]]:
-            return -1 if self.grid[next_pos[0]][next_pos[1]] == 'F' else -2
-        if self.grid[next_pos[0]][next_pos[1]] == 'M' and self.grid[previous_pos[0]][previous_pos[1]] == 'F':
-            return -3
-
-        return -1
+        return REWARD_MATRIX.item(self.terrain.item(previous_pos[0], previous_pos[1]),
+                                  self.terrain.item(next_pos[0], next_pos[1]))
 
     def is_done(self, position: Position) -> bool:
         """
@@ -215,15 +339,8 @@ class Environment:
         if position[1] < 0 or position[1] >= self.grid_size:
             return False
 
-        # Entering *Pitfall*
-        if self.grid[position[0]][position[1]] == 'P':
-            return True
-
-        # Entering *Goal*
-        if self.grid[position[0]][position[1]] == 'G':
-            return True
-
-        return False
+        # Entering *Goal* or *Pitfall*
+        return self.terminal.item(self.to_node_index(position))
 
     def save(self, file_name: str):
         """
@@ -237,57 +354,130 @@ class Environment:
 
             pkl.dump(data, f)
 
-        # Drawing
-        colors = {
-            "M": [85, 85, 85],
-            "F": [170, 170, 170],
-            "G": [0, 255, 0],
-            "P": [255, 0, 0],
-            "S": [154, 205, 50]
-        }
+        import grid_renderer
+
+        grid_renderer.save_figure(file_name, self.terrain, self.starting_position)
+
+    def save_binary(self, file_name: str):
+        """
+            This method generates the corresponding binary grid file, see *grid_format*.
+
+            :param file_name: Filename without extension
+            :return: Nothing
+        """
+
+        import grid_format
+
+        grid_format.write_grid(f"{file_name}.grid", self.terrain, self.starting_position)
+
+    def set_cell(self, position: Position, node_type: str) -> str:
+        """
+            This method changes the node type of a single node. The compiled transition tables are patched in place for
+            the node and its neighbours only, and the goal index, the terrain histogram and the hash are updated
+            incrementally, so a change costs the same on any grid size. Agents, and a *VecEnvironment* whose lanes all
+            play on this environment, see the change on their next step. A *VecEnvironment* of several distinct grids
+            holds copies of their tables, which *VecEnvironment.refresh* updates.
+
+            :param position: Target position
+            :param node_type: New node type, one of *NODE_TYPES*
+            :return: Previous node type
+            :raise: Illegal position or node type
+        """
+
+        assert position and len(position) == 2, "Illegal position"
+        assert 0 <= position[0] < self.grid_size and 0 <= position[1] < self.grid_size, "Illegal position"
+        assert len(node_type) == 1 and node_type in NODE_TYPES, f"Illegal node type (expected one of {NODE_TYPES})."
+
+        row, col = position
+        code = NODE_TYPES.index(node_type)
+        previous = self.terrain.item(row, col)
+
+        if code == previous:
+            return node_type
+
+        node_index = self.to_node_index(position)
+
+        self.terrain[row, col] = code
+
+        if self._grid is not None:
+            self._grid[row][col] = node_type
+
+        if self._goals is not None:
+            if previous == GOAL:
+                del self._goals[bisect.bisect_left(self._goals, node_index)]
+            if code == GOAL:
+                bisect.insort(self._goals, node_index)
+
+        if self._histogram is not None:
+            self._histogram[previous] -= 1
+            self._histogram[code] += 1
+
+        if self._hash is not None:
+            cells = _cell_hashes(np.array([node_index, node_index]), np.array([previous, code]))
+            self._hash ^= cells[0] ^ cells[1]
+
+        # The node's own moves and the moves of its neighbours into it are the only changed transitions
+        neighbours = np.array([row, col]) + ACTION_DELTAS
+        inside = np.all((neighbours >= 0) & (neighbours < self.grid_size), axis=1)
+        states = np.concatenate(([node_index], neighbours[inside] @ [self.grid_size, 1]))
+
+        next_state, reward, terminal = self._transitions(states)
 
-        grid_map = []
+        self.next_state[states] = next_state
+        self.reward[states] = reward
+        self.terminal[states] = terminal
 
-        for i in range(self.grid_size):
-            grid_map.append([])
-            for j in range(self.grid_size):
-                grid_map[i].append(colors[self.grid[i][j]])
+        return NODE_TYPES[previous]
 
-                if self.starting_position == [i, j]:
-                    grid_map[i][-1] = colors['S']
+    def add_goal(self, position: Position):
+        """
+            This method turns the given node into a Goal node, see *set_cell*.
 
-        plt.imshow(grid_map, interpolation=None)
+            :param position: Target position
+            :return: Nothing
+        """
 
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                if self.starting_position[0] == i and self.starting_position[1] == j:
-                    plt.text(j, i, f"{self.grid[i][j]} (S)", ha="center", color="black")
-                else:
-                    plt.text(j, i, self.grid[i][j], ha="center", color="black")
+        self.set_cell(position, NODE_TYPES[GOAL])
 
-        plt.title("Grid Visualisation")
+    def remove_goal(self, position: Position, node_type: str = NODE_TYPES[FLAT]):
+        """
+            This method closes the Goal node at the given position, see *set_cell*.
 
-        plt.tight_layout()
+            :param position: Position of a Goal node
+            :param node_type: Node type which replaces the goal, Flat by default
+            :return: Nothing
+            :raise: Not a goal exception
+        """
 
-        plt.savefig(f"{file_name}.png", dpi=1200, bbox_inches='tight')
+        assert node_type != NODE_TYPES[GOAL], "The goal must be replaced by another node type"
+        assert self.get_node_type(position) == NODE_TYPES[GOAL], "The given position is not a goal"
 
-        plt.close()
+        self.set_cell(position, node_type)
 
     def get_goals(self) -> List[int]:
         """
-            This method finds the remaining Goal nodes in the grid, then it returns as a list of node index.
+            This method finds the remaining Goal nodes in the grid, then it returns as a list of node index. The goals
+            are found once; later changes by *set_cell* update the list.
 
             :return: List of node index of *remaining* goals
         """
 
-        goals = []
+        if self._goals is None:
+            self._goals = np.flatnonzero(self.terrain.ravel() == GOAL).tolist()
 
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                if self.grid[i][j] == 'G':
-                    goals.append(self.to_node_index([i, j]))
+        return list(self._goals)
 
-        return goals
+    def get_histogram(self) -> Dict[str, int]:
+        """
+            This method counts the nodes of each node type.
+
+            :return: Number of nodes by node type
+        """
+
+        if self._histogram is None:
+            self._histogram = np.bincount(self.terrain.ravel(), minlength=len(NODE_TYPES)).tolist()
+
+        return dict(zip(NODE_TYPES, self._histogram))
 
     def __str__(self):
         lines = ["\t".join(row) for row in self.grid]
@@ -298,4 +488,8 @@ class Environment:
         return self.__str__()
 
     def __hash__(self):
-        return self.__str__().__hash__()
+        if self._hash is None:
+            codes = self.terrain.ravel()
+            self._hash = np.bitwise_xor.reduce(_cell_hashes(np.arange(len(codes)), codes))
+
+        return hash((self.grid_size, int(self._hash)))
@@ -9,8 +9,11 @@ import numpy as np
 from Environment import Environment
 import time
 import rl_agents
+import route_oracle
 
 GRID_DIR = "grid_worlds/"
+CHECKPOINT_DIR = "checkpoints/"
+METRICS_DIR = "metrics/"
 
 if __name__ == "__main__":
     file_name = input("Enter file name: ")
@@ -28,6 +31,10 @@ if __name__ == "__main__":
     max_episode = 500
     seed = 42
 
+    # Stop when the greedy policy is unchanged for 50 episodes and Q values have settled
+    convergence_tolerance = 1e-3
+    convergence_patience = 50
+
     # Initialize agents with parameters
     q_learning_agent = rl_agents.QLearningAgent(
         env=env,
@@ -37,7 +44,11 @@ if __name__ == "__main__":
         epsilon_decay=epsilon_decay,
         epsilon_min=epsilon_min,
         alpha=alpha,
-        max_episode=max_episode
+        max_episode=max_episode,
+        checkpointer=rl_agents.Checkpointer(CHECKPOINT_DIR, run_name="q-learning", interval=50, background=True),
+        convergence=rl_agents.AllOf(rl_agents.MaxDeltaQ(convergence_tolerance),
+                                    rl_agents.StablePolicy(convergence_patience)),
+        hooks=[rl_agents.JSONLSink(os.path.join(METRICS_DIR, "q-learning.jsonl"))]
     )
 
     sarsa_agent = rl_agents.SARSAAgent(
@@ -48,12 +59,23 @@ if __name__ == "__main__":
         epsilon_decay=epsilon_decay,
         epsilon_min=epsilon_min,
         alpha=alpha,
-        max_episode=max_episode
+        max_episode=max_episode,
+        checkpointer=rl_agents.Checkpointer(CHECKPOINT_DIR, run_name="sarsa", interval=50, background=True),
+        convergence=rl_agents.AllOf(rl_agents.MaxDeltaQ(convergence_tolerance),
+                                    rl_agents.StablePolicy(convergence_patience)),
+        hooks=[rl_agents.JSONLSink(os.path.join(METRICS_DIR, "sarsa.jsonl"))]
     )
 
     agents = [q_learning_agent, sarsa_agent]
     actions = ["UP", "LEFT", "DOWN", "RIGHT"]
 
+    # Exact optimum of the total reward, to measure the optimality gap of the learned policies as in *benchmark*.
+    # Undiscounted value iteration would sweep until its iteration limit if a node cannot reach a goal
+    try:
+        optimal_score = route_oracle.optimal_score(env)
+    except ValueError:
+        optimal_score = None
+
     for agent in agents:
         print("*" * 50)
         print()
@@ -70,6 +92,9 @@ if __name__ == "__main__":
 
         print("Actions:", [actions[i] for i in path])
         print("Score:", score)
+        print("Optimality Gap:", optimal_score - score if optimal_score is not None else "no goal is reachable")
         print("Elapsed Time (ms):", (end_time - start_time) * 1e-6)
+        print("Epsilon Schedule:", agent.epsilon_schedule)
+        print("Episodes:", agent.iterations, "(converged)" if agent.converged else "(not converged)")
 
         print("*" * 50)
@@ -1,15 +1,16 @@
+import os.path
 import matplotlib.pyplot as plt
-import numpy as np  # This is useful if you need to load data from files or handle arrays
+import rl_agents
 
-# Example: Load rewards data from numpy files or replace these lines with code to load your data
-rewards_q_learning = np.load('rewards_q-learn.npy')  # Load rewards for Q-Learning
-rewards_sarsa = np.load('rewards_sarsa.npy')
+METRICS_DIR = "metrics/"
 
-episodes = range(1, len(rewards_q_learning) + 1)  # Adjust based on the number of episodes data you have
+# Per-episode metrics written by the JSONLSink hooks of Main.py; the files can also be plotted while training runs
+metrics_q_learning = rl_agents.read_metrics(os.path.join(METRICS_DIR, "q-learning.jsonl"))
+metrics_sarsa = rl_agents.read_metrics(os.path.join(METRICS_DIR, "sarsa.jsonl"))
 
 plt.figure(figsize=(10, 5))
-plt.plot(episodes, rewards_q_learning, label='Q-Learning', color='blue')
-plt.plot(episodes, rewards_sarsa, label='SARSA', color='red')
+plt.plot(metrics_q_learning["episode"], metrics_q_learning["return"], label='Q-Learning', color='blue')
+plt.plot(metrics_sarsa["episode"], metrics_sarsa["return"], label='SARSA', color='red')
 plt.xlabel('Episode')
 plt.ylabel('Reward')
 plt.title('Learning Curves')
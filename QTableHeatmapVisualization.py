@@ -1,18 +1,22 @@
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-
-def plot_heatmap(file_path, episode):
-    q_table = np.load(file_path)
-    plt.figure(figsize=(12, 10))  # Increase figure size
-    ax = sns.heatmap(q_table, cmap='viridis', linewidths=.5)
-    plt.title(f'Q-Table Heatmap at Episode {episode}', fontsize=14)
-    plt.xlabel('Actions', fontsize=12)
-    plt.ylabel('States', fontsize=12)
-    plt.show()
-
-# Example of plotting heatmaps for the Q-tables
-episodes = [50, 100, 150, 200, 250, 300, 350, 400, 450, 500]  # Adjust as necessary
-for episode in episodes:
-    file_path = f'q_table_{episode}.npy'
-    plot_heatmap(file_path, episode)
+import numpy as np
+import seaborn as sns
+import matplotlib.pyplot as plt
+from rl_agents import Checkpointer
+
+def plot_heatmap(q_table, episode):
+    plt.figure(figsize=(12, 10))  # Increase figure size
+    ax = sns.heatmap(q_table, cmap='viridis', linewidths=.5)
+    plt.title(f'Q-Table Heatmap at Episode {episode}', fontsize=14)
+    plt.xlabel('Actions', fontsize=12)
+    plt.ylabel('States', fontsize=12)
+    plt.show()
+
+# Example of plotting heatmaps for the Q-table snapshots taken by Main.py
+checkpointer = Checkpointer('checkpoints/', run_name='q-learning')  # Adjust as necessary
+snapshots = checkpointer.snapshots()
+
+if snapshots is None:
+    print(f"No Q-Table snapshot in {checkpointer.path}, run Main.py first.")
+else:
+    for snapshot in snapshots:
+        plot_heatmap(np.asarray(snapshot['Q']), int(snapshot['episode']))
@@ -0,0 +1,177 @@
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os.path
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Union
+
+from Environment import Environment
+import rl_agents
+
+AGENTS = ["QLearningAgent", "SARSAAgent", "QLambdaAgent", "SARSALambdaAgent", "DynaQAgent", "PrioritizedSweepingAgent"]
+
+FIELDS = ["grid", "agent", "alpha", "discount_rate", "epsilon_schedule", "seed", "max_episode",
+          "convergence_tolerance", "convergence_patience", "score", "path_length", "wall_time_ms", "episodes",
+          "episodes_to_convergence"]
+
+
+def build_runs(grid_files: List[str], agents: List[str], alphas: List[float], discount_rates: List[float],
+               epsilon_schedules: List[Union[List[float], Dict]], seeds: List[int], max_episode: int,
+               convergence_tolerance: float = None, convergence_patience: int = None) -> List[Dict]:
+    """
+        This method builds one run configuration for each combination of the given grids and hyperparameters.
+
+        :param grid_files: Paths of the grid files
+        :param agents: Class names of the agents in *rl_agents*
+        :param alphas: Alpha values
+        :param discount_rates: Discount rates
+        :param epsilon_schedules: Epsilon schedules, either as ``[epsilon, epsilon_decay, epsilon_min]`` for the
+        default per-episode exponential decay or as a description for *EpsilonSchedule.from_dict*
+        :param seeds: Seeds
+        :param max_episode: Maximum episode for training
+        :param convergence_tolerance: Training stops once no Q value changes more than this in an episode
+        :param convergence_patience: Training stops once the greedy policy is unchanged for this many episodes
+        :return: List of run configurations
+    """
+
+    runs = []
+
+    for grid_file, agent, alpha, discount_rate, schedule, seed in itertools.product(
+            grid_files, agents, alphas, discount_rates, epsilon_schedules, seeds):
+        if isinstance(schedule, list):
+            epsilon, epsilon_decay, epsilon_min = schedule
+            schedule = rl_agents.ExponentialDecay(epsilon, epsilon_decay, epsilon_min).to_dict()
+
+        runs.append({
+            "grid": grid_file,
+            "agent": agent,
+            "alpha": alpha,
+            "discount_rate": discount_rate,
+            "epsilon_schedule": schedule,
+            "seed": seed,
+            "max_episode": max_episode,
+            "convergence_tolerance": convergence_tolerance,
+            "convergence_patience": convergence_patience
+        })
+
+    return runs
+
+
+def run(config: Dict) -> Dict:
+    """
+        This method trains and validates one agent. It is executed in a worker process.
+
+        :param config: Run configuration, see *build_runs*
+        :return: Result row including the run configuration
+    """
+
+    env = Environment(config["grid"])
+
+    criteria = []
+
+    if config["convergence_tolerance"] is not None:
+        criteria.append(rl_agents.MaxDeltaQ(config["convergence_tolerance"]))
+    if config["convergence_patience"] is not None:
+        criteria.append(rl_agents.StablePolicy(config["convergence_patience"]))
+
+    epsilon_schedule = rl_agents.EpsilonSchedule.from_dict(config["epsilon_schedule"])
+
+    # The schedule replaces the default exponential decay of epsilon_decay
+    agent = getattr(rl_agents, config["agent"])(
+        env=env,
+        seed=config["seed"],
+        discount_rate=config["discount_rate"],
+        epsilon=epsilon_schedule.start,
+        epsilon_decay=1.0,
+        epsilon_min=epsilon_schedule.minimum,
+        alpha=config["alpha"],
+        max_episode=config["max_episode"],
+        convergence=rl_agents.AllOf(*criteria) if criteria else None,
+        epsilon_schedule=epsilon_schedule
+    )
+
+    start_time = time.time_ns()
+
+    agent.train()
+
+    end_time = time.time_ns()
+
+    path, score = agent.validate()
+
+    result = dict(config)
+    result["score"] = score
+    result["path_length"] = len(path)
+    result["wall_time_ms"] = (end_time - start_time) * 1e-6
+    result["episodes"] = agent.iterations
+    result["episodes_to_convergence"] = agent.iterations if agent.converged else None
+
+    return result
+
+
+def sweep(runs: List[Dict], output_file: str, workers: int = None):
+    """
+        This method fans the runs out over a process pool and streams one result row per finished run to the output
+        file. The format is JSON Lines if the file name ends with ``.jsonl``, CSV otherwise.
+
+        :param runs: Run configurations, see *build_runs*
+        :param output_file: Path of the result file
+        :param workers: Number of worker processes, one per core by default
+        :return: Nothing
+    """
+
+    is_jsonl = output_file.endswith(".jsonl")
+
+    with open(output_file, "w", newline="") as f, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = None if is_jsonl else csv.DictWriter(f, fieldnames=FIELDS)
+
+        if writer is not None:
+            writer.writeheader()
+
+        futures = [executor.submit(run, config) for config in runs]
+
+        for i, future in enumerate(as_completed(futures)):
+            result = future.result()
+
+            if is_jsonl:
+                f.write(json.dumps(result) + "\n")
+            else:
+                writer.writerow({key: json.dumps(value) if isinstance(value, dict) else value
+                                 for key, value in result.items()})
+
+            f.flush()
+
+            print(f"[{i + 1}/{len(runs)}] {result['agent']} on {os.path.basename(result['grid'])}: "
+                  f"score={result['score']} ({result['wall_time_ms']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the agents on every grid for every hyperparameter combination.")
+    parser.add_argument("--grid-dir", default="grid_worlds/", help="Directory of the grid files")
+    parser.add_argument("--output", default="sweep.csv", help="Result file (.csv or .jsonl)")
+    parser.add_argument("--agents", nargs="+", default=AGENTS, choices=AGENTS)
+    parser.add_argument("--alphas", nargs="+", type=float, default=[0.1])
+    parser.add_argument("--discount-rates", nargs="+", type=float, default=[0.95])
+    parser.add_argument("--epsilon-schedules", nargs="+", type=json.loads, default=[[1.0, 0.995, 0.01]],
+                        help="Epsilon schedules as JSON: '[epsilon, epsilon_decay, epsilon_min]' or "
+                             "'{\"type\": \"linear\", \"start\": 1.0, \"minimum\": 0.01, \"duration\": 200}'")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[42])
+    parser.add_argument("--max-episode", type=int, default=500)
+    parser.add_argument("--convergence-tolerance", type=float, default=None,
+                        help="Stop once no Q value changes more than this in an episode")
+    parser.add_argument("--convergence-patience", type=int, default=None,
+                        help="Stop once the greedy policy is unchanged for this many episodes")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    grid_files = sorted(glob.glob(os.path.join(args.grid_dir, "*.pkl")) +
+                        glob.glob(os.path.join(args.grid_dir, "*.grid")))
+
+    assert len(grid_files) > 0, "No grid file is found"
+
+    runs = build_runs(grid_files, args.agents, args.alphas, args.discount_rates, args.epsilon_schedules,
+                      args.seeds, args.max_episode, args.convergence_tolerance, args.convergence_patience)
+
+    sweep(runs, args.output, args.workers)
@@ -0,0 +1,136 @@
+from typing import List, Optional
+import numpy as np
+
+from Environment import Environment
+
+
+class VecEnvironment:
+    envs: List[Environment]         #: Environment of each lane
+    num_envs: int                   #: Number of lanes
+    auto_reset: bool                #: Whether finished lanes restart from their starting node
+    states: np.ndarray              #: Current node index of each lane
+    starting_states: np.ndarray     #: Starting node index of each lane
+    state_sizes: np.ndarray         #: Number of nodes of each lane's grid
+
+    def __init__(self, envs: List[Environment], auto_reset: bool = True):
+        """
+            This method is the constructor of VecEnvironment class, which advances a batch of independent agents with
+            one call. Each lane plays on its own Environment; the same Environment object can be given for several
+            lanes, and then its compiled tables are shared instead of copied.
+
+            :param envs: Environment of each lane
+            :param auto_reset: If True, a lane whose episode is done restarts from its starting node. Otherwise, it
+            stays on the final node and the following steps are 0-reward no-ops, as in *Environment.move*.
+        """
+
+        assert len(envs) > 0, "At least one environment is required"
+
+        self.envs = list(envs)
+        self.num_envs = len(self.envs)
+        self.auto_reset = auto_reset
+
+        # Concatenate the tables of the distinct grids, each lane indexes them by its own offset
+        self._unique_envs = list({id(env): env for env in self.envs}.values())
+        self._env_offsets = {}
+        offset = 0
+
+        for env in self._unique_envs:
+            self._env_offsets[id(env)] = offset
+            offset += env.grid_size * env.grid_size
+
+        if len(self._unique_envs) == 1:
+            self._next_state = self._unique_envs[0].next_state
+            self._reward = self._unique_envs[0].reward
+            self._terminal = self._unique_envs[0].terminal
+        else:
+            self._next_state = np.concatenate([env.next_state + self._env_offsets[id(env)]
+                                               for env in self._unique_envs])
+            self._reward = np.concatenate([env.reward for env in self._unique_envs])
+            self._terminal = np.concatenate([env.terminal for env in self._unique_envs])
+
+        self._offsets = np.array([self._env_offsets[id(env)] for env in self.envs], dtype=np.int64)
+
+        self.state_sizes = np.array([env.grid_size * env.grid_size for env in self.envs], dtype=np.int64)
+        self.starting_states = np.array([env.to_node_index(env.starting_position) for env in self.envs],
+                                        dtype=np.int64)
+        self.states = self.starting_states.copy()
+
+    @classmethod
+    def replicate(cls, env: Environment, num_envs: int, auto_reset: bool = True) -> "VecEnvironment":
+        """
+            This method creates a VecEnvironment of independent copies of the given grid.
+
+            :param env: Environment played by every lane
+            :param num_envs: Number of lanes
+            :param auto_reset: See the constructor
+            :return: Created VecEnvironment object
+        """
+
+        assert num_envs > 0, "Number of environments must be positive"
+
+        return cls([env] * num_envs, auto_reset=auto_reset)
+
+    def refresh(self, env: Optional[Environment] = None):
+        """
+            This method copies the compiled tables of the given Environment into the lanes again, e.g. after
+            *Environment.set_cell*. Only the slice of that grid is copied. With a single distinct Environment, the
+            lanes share its tables and see the changes without a refresh.
+
+            :param env: Environment of one or more lanes, all of them by default
+            :return: Nothing
+        """
+
+        if len(self._unique_envs) == 1:
+            return
+
+        for unique_env in self._unique_envs if env is None else [env]:
+            assert id(unique_env) in self._env_offsets, "Environment of no lane"
+
+            offset = self._env_offsets[id(unique_env)]
+            end = offset + unique_env.grid_size * unique_env.grid_size
+
+            self._next_state[offset:end] = unique_env.next_state + offset
+            self._reward[offset:end] = unique_env.reward
+            self._terminal[offset:end] = unique_env.terminal
+
+    def reset(self) -> np.ndarray:
+        """
+            This method resets all lanes to their starting positions.
+
+            :return: Initial node index of each lane
+        """
+
+        self.states = self.starting_states.copy()
+
+        return self.states.copy()
+
+    def step(self, actions: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+            This method takes one action per lane and moves all lanes at once, with the same transitions and rewards as
+            *Environment.move*. If *auto_reset* is set, the lanes that are done are moved back to their starting node
+            after the step; the returned node indices are still the ones reached by the step.
+
+            :param actions: Taken action of each lane as integer values in range ``[0, 3]``
+            :returns: Tuple (**node_indices**, **rewards**, **dones**) of arrays with one entry per lane
+            :raise: Illegal action exception
+        """
+
+        actions = np.asarray(actions)
+
+        assert actions.shape == (self.num_envs,), "One action per environment is required."
+        assert np.all((actions >= 0) & (actions <= 3)), "Illegal action."
+
+        global_states = self._offsets + self.states
+
+        next_global_states = self._next_state[global_states, actions]
+        rewards = self._reward[global_states, actions]
+        dones = self._terminal[next_global_states]
+
+        next_states = next_global_states - self._offsets
+
+        if self.auto_reset:
+            self.states = np.where(dones, self.starting_states, next_states)
+        else:
+            self.states = next_states
+
+        return next_states, rewards, dones
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os.path
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import benchmark
+import rl_agents
+from rl_agents import Compiled
+from Environment import Environment
+
+GRID_DIR = "grid_worlds/"
+AGENTS = ["QLearningAgent", "SARSAAgent"]
+SIZES = [300]
+
+RECORD_FIELDS = ["episode", "steps", "return", "epsilon", "max_delta", "terminal"]
+"""
+    Fields of the episode records which must match between the backends; the wall time differs by design
+"""
+
+
+def _train(env: Environment, agent_name: str, backend: str, episodes: int, seed: int) -> (rl_agents.RLAgent, Dict):
+    recorder = rl_agents.MetricsRecorder()
+    agent = getattr(rl_agents, agent_name)(env=env, seed=seed, discount_rate=0.95, epsilon=1.0, epsilon_decay=0.995,
+                                           epsilon_min=0.01, alpha=0.1, max_episode=episodes, hooks=[recorder],
+                                           backend=backend)
+
+    start = time.perf_counter_ns()
+    agent.train()
+    seconds = (time.perf_counter_ns() - start) * 1e-9
+
+    steps = int(recorder.records["steps"].sum())
+
+    return agent, {"records": recorder.records, "steps": steps, "steps_per_sec": steps / seconds}
+
+
+def check(env: Environment, name: str, agent_name: str, episodes: int, seed: int) -> Dict:
+    """
+        This method trains an agent with both backends and compares the Q-Tables, the rewards and the episode records.
+        The compiled backend is trained once before, so that the JIT time is not counted.
+
+        :param env: Environment
+        :param name: Name of the grid in the report
+        :param agent_name: Class name of the agent in *rl_agents*
+        :param episodes: Number of training episodes
+        :param seed: Seed of the agents
+        :return: Whether the backends match, and the training rate of each backend
+    """
+
+    _train(env, agent_name, "numba", 1, seed)
+
+    python_agent, python_run = _train(env, agent_name, "python", episodes, seed)
+    numba_agent, numba_run = _train(env, agent_name, "numba", episodes, seed)
+
+    match = (np.array_equal(python_agent.Q, numba_agent.Q) and python_agent.rewards == numba_agent.rewards and
+             all(np.array_equal(python_run["records"][field], numba_run["records"][field])
+                 for field in RECORD_FIELDS))
+
+    return {
+        "grid": name,
+        "agent": agent_name,
+        "episodes": episodes,
+        "steps": python_run["steps"],
+        "match": bool(match),
+        "python_steps_per_sec": python_run["steps_per_sec"],
+        "numba_steps_per_sec": numba_run["steps_per_sec"],
+        "speedup": numba_run["steps_per_sec"] / python_run["steps_per_sec"],
+    }
+
+
+def run(grids: List[str], sizes: List[int], agents: List[str], episodes: int, seed: int, grid_dir: str,
+        directory: str) -> Dict:
+    """
+        This method checks the compiled kernels of *rl_agents.Compiled* against the Python loop on the given grid
+        files and on generated grids of the given sizes.
+
+        :param grids: File names of the grids in *grid_dir*
+        :param sizes: Sizes of the generated grids
+        :param agents: Class names of the agents
+        :param episodes: Number of training episodes
+        :param seed: Seed of the grids and agents
+        :param grid_dir: Directory of the grid files
+        :param directory: Directory of the generated grid files
+        :return: Report with one result per grid and agent
+    """
+
+    envs = [(grid, Environment(os.path.join(grid_dir, grid))) for grid in grids]
+    envs += [(f"generated_{size}", benchmark.build_grid(size, seed, directory)[0]) for size in sizes]
+
+    results = []
+
+    for name, env in envs:
+        for agent_name in agents:
+            result = check(env, name, agent_name, episodes, seed)
+            results.append(result)
+
+            print(f"{name} {agent_name}: {'match' if result['match'] else 'MISMATCH'}, "
+                  f"{result['python_steps_per_sec']:.0f} -> {result['numba_steps_per_sec']:.0f} steps/s "
+                  f"({result['speedup']:.1f}x)", file=sys.stderr)
+
+    return {"compiled": Compiled.is_compiled(), "episodes": episodes, "seed": seed, "results": results}
+
+
+if __name__ == "__main__":
+    # Usage: python backend_check.py [--require-numba] [--output backends.json]
+    parser = argparse.ArgumentParser(description="Checks that the Numba backend trains exactly like the Python loop.")
+    parser.add_argument("--grid-dir", default=GRID_DIR, help="Directory of the grid files")
+    parser.add_argument("--grids", nargs="+", help="Grid file names, every grid of the directory by default")
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES, help="Sizes of the generated grids")
+    parser.add_argument("--agents", nargs="+", default=AGENTS, choices=AGENTS, help="Agents")
+    parser.add_argument("--episodes", type=int, default=300, help="Training episodes")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the grids and agents")
+    parser.add_argument("--gen-dir", default=tempfile.gettempdir(), help="Directory of the generated grid files")
+    parser.add_argument("--require-numba", action="store_true", help="Fail if Numba is not installed")
+    parser.add_argument("--output", help="JSON report file")
+    args = parser.parse_args()
+
+    if args.require_numba and not Compiled.is_compiled():
+        sys.exit("Numba is not installed.")
+
+    grids = args.grids or sorted(name for name in os.listdir(args.grid_dir) if name.endswith((".pkl", ".grid")))
+    report = run(grids, args.sizes, args.agents, args.episodes, args.seed, args.grid_dir, args.gen_dir)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if not all(result["match"] for result in report["results"]):
+        sys.exit("The Numba backend does not match the Python loop.")
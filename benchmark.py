@@ -0,0 +1,321 @@
+import argparse
+import json
+import os.path
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from Environment import Environment, GOAL
+import grid_format
+import grid_generator
+import route_oracle
+import rl_agents
+
+SIZES = [10, 30, 100, 300, 1000]
+
+AGENTS = ["QLearningAgent", "SARSAAgent"]
+
+HIGHER_IS_BETTER = ["move_steps_per_sec", "step_steps_per_sec", "train_episodes_per_sec", "train_steps_per_sec"]
+LOWER_IS_BETTER = ["generate_ms", "load_ms", "oracle_ms", "validate_ms", "rollouts_ms"]
+"""
+    Metrics which are compared with the baseline, see *compare*
+"""
+
+
+def _median_ms(function, repeat: int) -> float:
+    samples = []
+
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function()
+        samples.append((time.perf_counter_ns() - start) * 1e-6)
+
+    return statistics.median(samples)
+
+
+def build_grid(size: int, seed: int, directory: str) -> (Environment, float):
+    """
+        This method generates the benchmark grid of the given size. Goals and pitfalls grow with the grid, so that the
+        random walks of the early training episodes still end in a reasonable number of steps.
+
+        :param size: Grid size
+        :param seed: Seed of the generator
+        :param directory: Directory of the grid file
+        :return: Environment of the grid and the generation time in milliseconds
+    """
+
+    rng = np.random.default_rng(seed)
+    goals = max(1, size // 50)
+    pitfalls = size * size // 20
+    min_distance = min(8, size // 2)
+
+    start = time.perf_counter_ns()
+    terrain, starting_position = grid_generator.generate_grid(goals, pitfalls, size, min_distance=min_distance,
+                                                              rng=rng)
+    generate_ms = (time.perf_counter_ns() - start) * 1e-6
+
+    grid_file = os.path.join(directory, f"benchmark_{size}.grid")
+    grid_format.write_grid(grid_file, terrain, starting_position)
+
+    return Environment(grid_file), generate_ms
+
+
+def step_rate(env: Environment, steps: int, seed: int) -> Dict:
+    """
+        This method measures how many transitions per second *Environment.move* and *Environment.step* make, with
+        uniformly random actions. The episode is reset whenever it is done.
+
+        :param env: Environment
+        :param steps: Number of transitions
+        :param seed: Seed of the random actions
+        :return: Steps per second of both methods
+    """
+
+    actions = np.random.default_rng(seed).integers(0, 4, steps).tolist()
+
+    env.reset()
+    start = time.perf_counter_ns()
+
+    for action in actions:
+        if env.move(action)[2]:
+            env.reset()
+
+    move_seconds = (time.perf_counter_ns() - start) * 1e-9
+
+    state = env.reset()
+    start = time.perf_counter_ns()
+
+    for action in actions:
+        state, _, done = env.step(state, action)
+
+        if done:
+            state = env.reset()
+
+    step_seconds = (time.perf_counter_ns() - start) * 1e-9
+
+    return {
+        "move_steps_per_sec": steps / move_seconds,
+        "step_steps_per_sec": steps / step_seconds,
+    }
+
+
+def train_rate(env: Environment, agent_name: str, episodes: int, seed: int, repeat: int,
+               backend: str = "python") -> Dict:
+    """
+        This method measures the training throughput and the solution quality of an agent. No checkpointer or
+        convergence criterion is used, so that the time only covers the updates and the per-episode metrics.
+
+        :param env: Environment
+        :param agent_name: Class name of the agent in *rl_agents*
+        :param episodes: Number of training episodes
+        :param seed: Seed of the agent
+        :param repeat: Number of validation calls, whose median latency is reported
+        :param backend: Training backend of the agent
+        :return: Training rates, validation latency, latency of the rollouts from all nodes, score and optimality gap
+        :raise: Unreachable goal exception
+    """
+
+    if backend != "python":
+        # Compiles the kernels, so that the JIT time is not counted as training time
+        getattr(rl_agents, agent_name)(env=env, seed=seed, discount_rate=0.95, epsilon=1.0, epsilon_decay=0.995,
+                                       epsilon_min=0.01, alpha=0.1, max_episode=1, backend=backend).train()
+
+    recorder = rl_agents.MetricsRecorder()
+    agent = getattr(rl_agents, agent_name)(env=env, seed=seed, discount_rate=0.95, epsilon=1.0, epsilon_decay=0.995,
+                                           epsilon_min=0.01, alpha=0.1, max_episode=episodes, hooks=[recorder],
+                                           backend=backend)
+
+    env.reset()
+    start = time.perf_counter_ns()
+    agent.train()
+    train_seconds = (time.perf_counter_ns() - start) * 1e-9
+
+    steps = int(recorder.records["steps"].sum())
+
+    start = time.perf_counter_ns()
+    _, _, reached = agent.rollouts()
+    rollouts_ms = (time.perf_counter_ns() - start) * 1e-6
+
+    path, score = agent.validate()
+
+    solved = bool(env.terrain.flat[env.to_node_index(env.current_position)] == GOAL)
+
+    return {
+        "agent": agent_name,
+        "backend": backend,
+        "episodes": agent.iterations,
+        "steps": steps,
+        "train_ms": train_seconds * 1e3,
+        "train_episodes_per_sec": agent.iterations / train_seconds,
+        "train_steps_per_sec": steps / train_seconds,
+        "validate_ms": _median_ms(agent.validate, repeat),
+        "rollouts_ms": rollouts_ms,
+        "terminated_starts": float(reached.mean()),
+        "score": score,
+        "path_length": len(path),
+        "solved": solved,
+        "optimality_gap": route_oracle.optimal_score(env) - score,
+    }
+
+
+def run(sizes: List[int], agents: List[str], steps: int, episodes: int, seed: int, repeat: int, directory: str,
+        backend: str = "python") -> Dict:
+    """
+        This method runs the benchmark on one generated grid per size.
+
+        :param sizes: Grid sizes
+        :param agents: Class names of the agents in *rl_agents*
+        :param steps: Number of transitions of the step rate benchmark
+        :param episodes: Number of training episodes
+        :param seed: Seed of the grids and agents
+        :param repeat: Number of repetitions of the latency benchmarks
+        :param directory: Directory of the generated grid files
+        :param backend: Training backend of the agents
+        :return: Benchmark report. Sizes whose grid has no goal reachable from the start are skipped
+    """
+
+    results = []
+
+    for size in sizes:
+        env, generate_ms = build_grid(size, seed, directory)
+        grid_file = os.path.join(directory, f"benchmark_{size}.grid")
+
+        # The exact solution is timed without the distance field cache
+        start = time.perf_counter_ns()
+        route_oracle.distance_field(env, cache=False)
+        oracle_ms = (time.perf_counter_ns() - start) * 1e-6
+
+        try:
+            optimal_score = route_oracle.optimal_score(env)
+        except ValueError:
+            print(f"{size}x{size}: no goal is reachable from the start, skipped", file=sys.stderr)
+            continue
+
+        result = {
+            "size": size,
+            "generate_ms": generate_ms,
+            "load_ms": _median_ms(lambda: Environment(grid_file), repeat),
+            "oracle_ms": oracle_ms,
+            "optimal_score": optimal_score,
+            **step_rate(env, steps, seed),
+            "agents": [train_rate(env, agent, episodes, seed, repeat, backend) for agent in agents],
+        }
+
+        print(f"{size}x{size}: {result['step_steps_per_sec']:.0f} steps/s,",
+              ", ".join(f"{agent['agent']} {agent['train_steps_per_sec']:.0f} steps/s gap {agent['optimality_gap']}"
+                        for agent in result["agents"]), file=sys.stderr)
+
+        results.append(result)
+
+    return {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "config": {"sizes": sizes, "agents": agents, "steps": steps, "episodes": episodes, "seed": seed,
+                   "repeat": repeat, "backend": backend},
+        "results": results,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metrics(report: Dict) -> Dict[str, float]:
+    metrics = {}
+
+    for result in report["results"]:
+        for key in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            if key in result:
+                metrics[f"{result['size']}/{key}"] = result[key]
+
+        for agent in result["agents"]:
+            for key in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+                if key in agent:
+                    metrics[f"{result['size']}/{agent['agent']}/{key}"] = agent[key]
+
+            if agent["optimality_gap"] is not None:
+                metrics[f"{result['size']}/{agent['agent']}/optimality_gap"] = agent["optimality_gap"]
+
+    return metrics
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+        This method compares two benchmark reports. Rates which dropped and times which grew by more than the
+        threshold are regressions, as well as any growth of an optimality gap. Metrics missing from either report
+        are skipped.
+
+        :param report: Current report
+        :param baseline: Report of an earlier commit
+        :param threshold: Tolerated relative change, e.g. 0.2 for 20%
+        :return: Descriptions of the regressions
+    """
+
+    current = _metrics(report)
+    previous = _metrics(baseline)
+    regressions = []
+
+    for key in sorted(current.keys() & previous.keys()):
+        new, old = current[key], previous[key]
+        metric = key.rsplit("/", 1)[1]
+
+        if metric in HIGHER_IS_BETTER:
+            regressed = new < old * (1.0 - threshold)
+        elif metric in LOWER_IS_BETTER:
+            regressed = new > old * (1.0 + threshold)
+        else:
+            regressed = new > old
+
+        if regressed:
+            regressions.append(f"{key}: {old:.6g} -> {new:.6g}")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    # Usage: python benchmark.py --output benchmark.json [--baseline previous.json]
+    parser = argparse.ArgumentParser(description="Benchmarks stepping, training, validation and grid generation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Grid sizes")
+    parser.add_argument("--agents", nargs="+", default=AGENTS, choices=AGENTS, help="Agent classes")
+    parser.add_argument("--backend", default="python", choices=["python", "numba"], help="Training backend")
+    parser.add_argument("--steps", type=int, default=200000, help="Transitions of the step rate benchmark")
+    parser.add_argument("--episodes", type=int, default=200, help="Training episodes")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the grids and agents")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of the latency benchmarks")
+    parser.add_argument("--grid-dir", default=tempfile.gettempdir(), help="Directory of the generated grid files")
+    parser.add_argument("--output", help="JSON report file, printed to stdout by default")
+    parser.add_argument("--baseline", help="JSON report of an earlier commit to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tolerated relative change of a metric")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.agents, args.steps, args.episodes, args.seed, args.repeat, args.grid_dir,
+                 args.backend)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+
+        for regression in regressions:
+            print("Regression:", regression, file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,154 @@
+import glob
+import os.path
+import struct
+import sys
+from typing import List
+
+import numpy as np
+
+from Environment import Environment, GOAL, NODE_TYPES
+
+MAGIC = b"GRIDBIN\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIIQ")
+"""
+    Binary grid header: magic, version, grid size, start row, start column and number of goals. It is followed by the
+    goal node indices as *int64*, then by the terrain codes as *uint8* starting at a 64-byte aligned offset.
+"""
+ALIGNMENT = 64
+
+
+def _terrain_offset(goal_count: int) -> int:
+    end = HEADER.size + 8 * goal_count
+
+    return (end + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_binary_grid(grid_file: str) -> bool:
+    """
+        This method checks whether the given file is in the binary grid format, by its magic bytes.
+
+        :param grid_file: Path of the grid file
+        :return: If the file is a binary grid, or not
+    """
+
+    with open(grid_file, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_grid(grid_file: str, terrain: np.ndarray, start: List[int]):
+    """
+        This method writes a grid in the binary grid format.
+
+        :param grid_file: Path of the grid file
+        :param terrain: Square array of terrain codes, see *Environment.NODE_TYPES*
+        :param start: Starting position of the agent
+        :return: Nothing
+        :raise: Unknown node type exception
+    """
+
+    terrain = np.ascontiguousarray(terrain, dtype=np.uint8)
+
+    assert terrain.ndim == 2 and terrain.shape[0] == terrain.shape[1], "Grid must be square"
+
+    # The terrain is validated once here, so that reading a grid does not scan it
+    if np.any(terrain >= len(NODE_TYPES)):
+        raise ValueError(f"The grid contains unknown node types! (expected codes below {len(NODE_TYPES)}).")
+
+    goals = np.flatnonzero(terrain.ravel() == GOAL).astype("<i8")
+
+    with open(grid_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, terrain.shape[0], int(start[0]), int(start[1]), len(goals)))
+        f.write(goals.tobytes())
+        f.write(b"\0" * (_terrain_offset(len(goals)) - f.tell()))
+        f.write(terrain.tobytes())
+
+
+def read_grid_header(grid_file: str) -> (int, List[int], List[int]):
+    """
+        This method reads the header of a binary grid without loading the terrain. The goals are checked to be sorted
+        node indices of the grid without duplicates, which only reads the goal list.
+
+        :param grid_file: Path of the grid file
+        :return: Grid size, starting position and sorted list of node index of goals
+        :raise: Invalid grid file exception
+    """
+
+    with open(grid_file, "rb") as f:
+        data = f.read(HEADER.size)
+
+        if len(data) < HEADER.size:
+            raise ValueError(f"The given file is not a binary grid! ({grid_file}).")
+
+        magic, version, size, start_row, start_col, goal_count = HEADER.unpack(data)
+
+        if magic != MAGIC:
+            raise ValueError(f"The given file is not a binary grid! ({grid_file}).")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary grid version {version}! ({grid_file}).")
+        if size == 0 or start_row >= size or start_col >= size or goal_count > size * size:
+            raise ValueError(f"The binary grid header is corrupted! ({grid_file}).")
+        if os.path.getsize(grid_file) != _terrain_offset(goal_count) + size * size:
+            raise ValueError(f"The binary grid is truncated! ({grid_file}).")
+
+        goals = np.frombuffer(f.read(8 * goal_count), dtype="<i8")
+
+    # Strictly increasing indices within the first and the last node are unique and inside the grid
+    if goal_count > 0 and (goals[0] < 0 or goals[-1] >= size * size or np.any(np.diff(goals) <= 0)):
+        raise ValueError(f"The goals of the binary grid header are not sorted node indices! ({grid_file}).")
+
+    return size, [start_row, start_col], goals.tolist()
+
+
+def read_grid(grid_file: str, validate: bool = False) -> (np.ndarray, List[int], List[int]):
+    """
+        This method maps the terrain of a binary grid into memory. The pages are loaded on demand and shared between
+        the processes which open the same file; writes to the array are private to the process (copy-on-write). The
+        header is always checked (see *read_grid_header*), while the terrain is trusted by default, since *write_grid*
+        validates it.
+
+        :param grid_file: Path of the grid file
+        :param validate: Scan the terrain for unknown node types and check that the goals of the header match it, e.g.
+        for files of unknown origin. This reads the whole file
+        :return: Terrain codes as *uint8* array, starting position and sorted list of node index of goals
+        :raise: Invalid grid file exception
+    """
+
+    size, start, goals = read_grid_header(grid_file)
+
+    terrain = np.memmap(grid_file, dtype=np.uint8, mode="c", offset=_terrain_offset(len(goals)), shape=(size, size))
+
+    if validate:
+        if np.any(terrain >= len(NODE_TYPES)):
+            raise ValueError(f"The grid contains unknown node types! ({grid_file}).")
+        if goals != np.flatnonzero(terrain.ravel() == GOAL).tolist():
+            raise ValueError(f"The goals of the binary grid header do not match the terrain! ({grid_file}).")
+
+    return terrain, start, goals
+
+
+def convert(pickle_file: str) -> str:
+    """
+        This method converts a pickled grid to the binary grid format, next to the original file.
+
+        :param pickle_file: Path of the pickled grid file
+        :return: Path of the created binary grid file
+    """
+
+    env = Environment(pickle_file)
+    grid_file = os.path.splitext(pickle_file)[0] + ".grid"
+
+    write_grid(grid_file, env.terrain, env.starting_position)
+
+    return grid_file
+
+
+if __name__ == "__main__":
+    # Usage: python grid_format.py [pickle files or directories, default: grid_worlds/]
+    paths = sys.argv[1:] or ["grid_worlds/"]
+
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.pkl"))) if os.path.isdir(path) else [path]
+
+        for pickle_file in files:
+            print(pickle_file, "->", convert(pickle_file))
@@ -1,9 +1,12 @@
 import os.path
 import pickle
-import random as rnd
-from typing import List
+from typing import List, Optional
 
-from Environment import Environment, Position
+import numpy as np
+
+import grid_format
+import grid_renderer
+from Environment import Environment, Position, NODE_TYPES, FLAT, MOUNTAIN, GOAL, PITFALL
 
 
 def manhattan_distance(a: Position, b: Position) -> int:
@@ -41,8 +44,83 @@ def get_closest_goal(starting_point: Position, grid: List[List[int]]) -> Positio
     return closest_goal
 
 
+def distance_to_nearest_goal(terrain: np.ndarray) -> np.ndarray:
+    """
+        This method calculates the Manhattan Distance from every node to its closest goal at once. The L1 distance
+        transform is separable, so it is computed by a forward and a backward running minimum along each axis.
+
+        :param terrain: Terrain codes, see *Environment.NODE_TYPES*
+        :return: Distance to the closest goal for each node, a value larger than any distance if there is no goal
+    """
+
+    size = terrain.shape[0]
+    distance = np.where(terrain == GOAL, 0, 4 * size).astype(np.int64)
+
+    for axis in [0, 1]:
+        index = np.arange(size).reshape((-1, 1) if axis == 0 else (1, -1))
+
+        # d[x] = min over y of d[y] + |x - y|, split into y <= x and y >= x
+        forward = np.minimum.accumulate(distance - index, axis=axis) + index
+        backward = np.flip(np.minimum.accumulate(np.flip(distance + index, axis=axis), axis=axis), axis=axis) - index
+
+        distance = np.minimum(forward, backward)
+
+    return distance
+
+
+def generate_grid(number_of_goals: int, number_of_pitfalls: int, size: int, mountain_rate: float = 0.5,
+                  min_distance: int = 8, rng: np.random.Generator = None) -> (np.ndarray, Position):
+    """
+        This method randomly generates the terrain and the starting position of a grid, without creating any file.
+
+        :param number_of_goals: Number of goals. Must be > 0
+        :param number_of_pitfalls: Number of pitfalls
+        :param size: Size of grid
+        :param mountain_rate: Rate of mountain. It must be in range [0.0, 1.0]
+        :param min_distance: Minimum distance between the closest goal and the randomly selected starting point
+        :param rng: Random generator, a new unseeded one by default
+        :return: Terrain codes as *uint8* array and starting position
+        :raise: Infeasible parameters exception
+    """
+    assert size > 0, "Invalid size"
+    assert 0 <= mountain_rate <= 1, "Mountain rate must be in range [0.0, 1.0]"
+    assert number_of_goals > 0, "Number of goals must be > 0"
+    assert number_of_pitfalls >= 0, "Number of pitfalls must be >= 0"
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    state_size = size * size
+
+    if number_of_goals + number_of_pitfalls >= state_size:
+        raise ValueError(f"{number_of_goals} goals and {number_of_pitfalls} pitfalls leave no starting node on a "
+                         f"{size}x{size} grid.")
+
+    # Set mountains and flats
+    terrain = np.where(rng.random(state_size) < mountain_rate, MOUNTAIN, FLAT).astype(np.uint8)
+
+    # Set goals and pitfalls
+    nodes = rng.choice(state_size, number_of_goals + number_of_pitfalls, replace=False)
+    terrain[nodes[:number_of_goals]] = GOAL
+    terrain[nodes[number_of_goals:]] = PITFALL
+
+    terrain = terrain.reshape(size, size)
+
+    # Set start index
+    distance = distance_to_nearest_goal(terrain)
+    candidates = np.flatnonzero((terrain.ravel() <= MOUNTAIN) & (distance.ravel() >= min_distance))
+
+    if len(candidates) == 0:
+        raise ValueError(f"No starting node is at least {min_distance} away from the closest goal.")
+
+    start = int(rng.choice(candidates))
+
+    return terrain, [start // size, start % size]
+
+
 def generate(file_name: str, number_of_goals: int, number_of_pitfalls: int, size: int, mountain_rate: float = 0.5,
-             min_distance: int = 8) -> Environment:
+             min_distance: int = 8, seed: Optional[int] = None, binary: bool = False, render: Optional[str] = "figure",
+             rng: np.random.Generator = None) -> Environment:
     """
         This method randomly generates an *Environment* object based on the given parameters. It also creates the grid
         file.
@@ -53,64 +131,79 @@ def generate(file_name: str, number_of_goals: int, number_of_pitfalls: int, size
         :param size: Size of grid
         :param mountain_rate: Rate of mountain. It must be in range [0.0, 1.0]
         :param min_distance: Minimum distance between the closest goal and the randomly selected starting point
+        :param seed: Seed for random, used when no random generator is given
+        :param binary: If True, a binary grid file (.grid) is created instead of a pickle file (.pkl)
+        :param render: Visualization of the grid, see *grid_renderer*: "figure" (matplotlib), "png" or "ppm" (without
+        matplotlib), or None
+        :param rng: Random generator
         :return: Created Environment object
+        :raise: Infeasible parameters exception
     """
-    assert size > 0, "Invalid size"
-    assert 0 <= mountain_rate <= 1, "Mountain rate must be in range [0.0, 1.0]"
+    if rng is None:
+        rng = np.random.default_rng(seed)
 
-    grid = [["" for _ in range(size)] for _ in range(size)]
+    terrain, starting_pos = generate_grid(number_of_goals, number_of_pitfalls, size, mountain_rate, min_distance, rng)
 
-    # Set goals
-    for i in range(number_of_goals):
-        while True:
-            row = rnd.randrange(size)
-            col = rnd.randrange(size)
+    # Save
+    if binary:
+        grid_file = f"{file_name}.grid"
 
-            if grid[row][col] == "":
-                grid[row][col] = 'G'
-                break
+        grid_format.write_grid(grid_file, terrain, starting_pos)
+    else:
+        grid_file = f"{file_name}.pkl"
+        data = {"grid": np.array(list(NODE_TYPES))[terrain].tolist(), "start": starting_pos}
 
-    # Set pitfalls
-    for i in range(number_of_pitfalls):
-        while True:
-            row = rnd.randrange(size)
-            col = rnd.randrange(size)
+        with open(grid_file, "wb") as f:
+            pickle.dump(data, f)
 
-            if grid[row][col] == "":
-                grid[row][col] = 'P'
-                break
+    env = Environment(grid_file)
 
-    # Set mountains and flats
-    for row in range(size):
-        for col in range(size):
-            if grid[row][col] != "":
-                continue
+    if render == "figure":
+        grid_renderer.save_figure(file_name, env.terrain, env.starting_position)
+    elif render == "png":
+        grid_renderer.save_png(file_name, env.terrain, env.starting_position)
+    elif render == "ppm":
+        grid_renderer.save_ppm(file_name, env.terrain, env.starting_position)
+    else:
+        assert render is None, f"Unknown render option: {render}"
 
-            grid[row][col] = 'M' if rnd.random() < mountain_rate else 'F'
+    return env
 
-    # Set start index
-    starting_pos = [0., 0.]
-    while True:
-        row = rnd.randrange(size)
-        col = rnd.randrange(size)
 
-        if grid[row][col] in ['F', 'M']:
-            if manhattan_distance(get_closest_goal([row, col], grid), [row, col]) >= min_distance:
-                starting_pos[0] = row
-                starting_pos[1] = col
-                break
+def generate_batch(directory: str, count: int, number_of_goals: int, number_of_pitfalls: int, size: int,
+                   mountain_rate: float = 0.5, min_distance: int = 8, seed: Optional[int] = None) -> List[str]:
+    """
+        This method generates many scenarios at once, e.g. for benchmarking. They are written as binary grid files
+        named ``grid_<i>.grid`` in the given directory, without visualization.
 
-    # Save
-    data = {"grid": grid, "start": starting_pos}
+        :param directory: Directory of the grid files. It is created if it does not exist
+        :param count: Number of scenarios
+        :param number_of_goals: Number of goals
+        :param number_of_pitfalls: Number of pitfalls
+        :param size: Size of grid
+        :param mountain_rate: Rate of mountain. It must be in range [0.0, 1.0]
+        :param min_distance: Minimum distance between the closest goal and the randomly selected starting point
+        :param seed: Seed for random
+        :return: Paths of the created grid files
+        :raise: Infeasible parameters exception
+    """
+    assert count > 0, "Count must be > 0"
 
-    with open(f"{file_name}.pkl", "wb") as f:
-        pickle.dump(data, f)
+    os.makedirs(directory, exist_ok=True)
 
-    env = Environment(f"{file_name}.pkl")
+    rng = np.random.default_rng(seed)
+    grid_files = []
 
-    env.save(file_name)
+    for i in range(count):
+        terrain, starting_pos = generate_grid(number_of_goals, number_of_pitfalls, size, mountain_rate, min_distance,
+                                              rng)
 
-    return env
+        grid_file = os.path.join(directory, f"grid_{i}.grid")
+        grid_format.write_grid(grid_file, terrain, starting_pos)
+
+        grid_files.append(grid_file)
+
+    return grid_files
 
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+import struct
+import zlib
+from typing import List
+
+import numpy as np
+
+from Environment import NODE_TYPES, Position
+
+PALETTE = np.array([
+    [170, 170, 170],        # Flat
+    [85, 85, 85],           # Mountain
+    [0, 255, 0],            # Goal
+    [255, 0, 0],            # Pitfall
+    [154, 205, 50],         # Start
+], dtype=np.uint8)
+"""
+    RGB color of each terrain code, followed by the color of the starting position
+"""
+
+START_COLOR = len(NODE_TYPES)
+
+LABEL_LIMIT = 30
+"""
+    Maximum grid size for which *save_figure* writes the node type into every cell
+"""
+
+
+def terrain_image(terrain: np.ndarray, start: Position, cell_size: int = 1) -> np.ndarray:
+    """
+        This method colors the grid by a palette lookup on the terrain codes.
+
+        :param terrain: Terrain codes, see *Environment.NODE_TYPES*
+        :param start: Starting position of the agent
+        :param cell_size: Width and height of a node in pixels
+        :return: RGB image as *uint8* array
+    """
+
+    assert cell_size > 0, "Cell size must be > 0"
+
+    codes = np.array(terrain, dtype=np.uint8)
+    codes[start[0], start[1]] = START_COLOR
+
+    image = PALETTE[codes]
+
+    if cell_size > 1:
+        image = np.repeat(np.repeat(image, cell_size, axis=0), cell_size, axis=1)
+
+    return image
+
+
+def _default_cell_size(terrain: np.ndarray) -> int:
+    # Small grids are scaled up to roughly 512 pixels, large grids get one pixel per node
+    return max(1, 512 // terrain.shape[0])
+
+
+def save_png(file_name: str, terrain: np.ndarray, start: Position, cell_size: int = None):
+    """
+        This method writes the grid as a PNG image without matplotlib.
+
+        :param file_name: Filename without extension
+        :param terrain: Terrain codes, see *Environment.NODE_TYPES*
+        :param start: Starting position of the agent
+        :param cell_size: Width and height of a node in pixels, chosen by the grid size by default
+        :return: Nothing
+    """
+
+    image = terrain_image(terrain, start, cell_size or _default_cell_size(terrain))
+    height, width, _ = image.shape
+
+    # Each row starts with the filter type 0 (None)
+    rows = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    with open(f"{file_name}.png", "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def save_ppm(file_name: str, terrain: np.ndarray, start: Position, cell_size: int = None):
+    """
+        This method writes the grid as a binary PPM image without matplotlib.
+
+        :param file_name: Filename without extension
+        :param terrain: Terrain codes, see *Environment.NODE_TYPES*
+        :param start: Starting position of the agent
+        :param cell_size: Width and height of a node in pixels, chosen by the grid size by default
+        :return: Nothing
+    """
+
+    image = terrain_image(terrain, start, cell_size or _default_cell_size(terrain))
+    height, width, _ = image.shape
+
+    with open(f"{file_name}.ppm", "wb") as f:
+        f.write(f"P6\n{width} {height}\n255\n".encode())
+        f.write(image.tobytes())
+
+
+def save_figure(file_name: str, terrain: np.ndarray, start: Position, label_limit: int = LABEL_LIMIT,
+                dpi: int = 200):
+    """
+        This method visualizes the grid with matplotlib and saves it as a PNG image. The node types are written into
+        the cells only if the grid is not larger than the label limit.
+
+        :param file_name: Filename without extension
+        :param terrain: Terrain codes, see *Environment.NODE_TYPES*
+        :param start: Starting position of the agent
+        :param label_limit: Maximum grid size with cell labels
+        :param dpi: Resolution of the image
+        :return: Nothing
+    """
+
+    import matplotlib.pyplot as plt
+
+    plt.imshow(terrain_image(terrain, start), interpolation="nearest")
+
+    if terrain.shape[0] <= label_limit:
+        labels: List[List[str]] = np.array(list(NODE_TYPES))[terrain].tolist()
+        labels[start[0]][start[1]] += " (S)"
+
+        for i, row in enumerate(labels):
+            for j, label in enumerate(row):
+                plt.text(j, i, label, ha="center", color="black")
+
+    plt.title("Grid Visualisation")
+
+    plt.tight_layout()
+
+    plt.savefig(f"{file_name}.png", dpi=dpi, bbox_inches='tight')
+
+    plt.close()
@@ -0,0 +1,90 @@
+import numpy as np
+
+from rl_agents.QStorage import add_flat
+
+
+def epsilon_greedy(Q: np.ndarray, states: np.ndarray, epsilon: float, rng: np.random.Generator) -> np.ndarray:
+    """
+        This method decides one action per lane with the epsilon-greedy approach.
+
+        :param Q: Q-Table as Numpy Array
+        :param states: Current node index of each lane
+        :param epsilon: Probability of taking a random action
+        :param rng: Random generator of the agent
+        :return: Decided action of each lane
+    """
+
+    actions = np.argmax(Q[states], axis=1)
+    explore = rng.random(len(states)) < epsilon
+
+    if np.any(explore):
+        actions[explore] = rng.integers(0, Q.shape[1], np.count_nonzero(explore))
+
+    return actions
+
+
+def _apply_td_errors(Q: np.ndarray, states: np.ndarray, actions: np.ndarray, td_errors: np.ndarray, alpha: float):
+    """
+        This method softly updates the Q-Table with the given TD errors. When several lanes update the same
+        state-action pair in one batch, their TD errors are averaged, so that the update never overshoots.
+
+        :param Q: Q-Table as Numpy Array, updated in place
+        :param states: Node index of each lane
+        :param actions: Taken action of each lane
+        :param td_errors: TD error of each lane
+        :param alpha: To update Q values softly. 0 < alpha <= 1.0
+        :return: Nothing
+    """
+
+    pairs, inverse = np.unique(states * Q.shape[1] + actions, return_inverse=True)
+
+    td_sums = np.bincount(inverse, weights=td_errors, minlength=len(pairs))
+    counts = np.bincount(inverse, minlength=len(pairs))
+
+    add_flat(Q, pairs, alpha * td_sums / counts)
+
+
+def q_learning_update(Q: np.ndarray, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                      next_states: np.ndarray, dones: np.ndarray, alpha: float, discount_rate: float):
+    """
+        This method applies the Q-Learning update for a batch of transitions at once.
+
+        :param Q: Q-Table as Numpy Array, updated in place
+        :param states: Node index of each lane before the step
+        :param actions: Taken action of each lane
+        :param rewards: Transition reward of each lane
+        :param next_states: Node index of each lane after the step
+        :param dones: If the episode of each lane is done, or not
+        :param alpha: To update Q values softly. 0 < alpha <= 1.0
+        :param discount_rate: Discount rate of cumulative rewards
+        :return: Nothing
+    """
+
+    next_max = np.where(dones, 0.0, np.max(Q[next_states], axis=1))
+    td_errors = rewards + discount_rate * next_max - Q[states, actions]
+
+    _apply_td_errors(Q, states, actions, td_errors, alpha)
+
+
+def sarsa_update(Q: np.ndarray, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                 next_states: np.ndarray, next_actions: np.ndarray, dones: np.ndarray, alpha: float,
+                 discount_rate: float):
+    """
+        This method applies the SARSA update for a batch of transitions at once.
+
+        :param Q: Q-Table as Numpy Array, updated in place
+        :param states: Node index of each lane before the step
+        :param actions: Taken action of each lane
+        :param rewards: Transition reward of each lane
+        :param next_states: Node index of each lane after the step
+        :param next_actions: Action of each lane decided on the next node
+        :param dones: If the episode of each lane is done, or not
+        :param alpha: To update Q values softly. 0 < alpha <= 1.0
+        :param discount_rate: Discount rate of cumulative rewards
+        :return: Nothing
+    """
+
+    next_q = np.where(dones, 0.0, Q[next_states, next_actions])
+    td_errors = rewards + discount_rate * next_q - Q[states, actions]
+
+    _apply_td_errors(Q, states, actions, td_errors, alpha)
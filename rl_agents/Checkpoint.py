@@ -0,0 +1,284 @@
+import json
+import os.path
+import queue
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"QSNAP\0\0\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+"""
+    Snapshot file header: magic, version, reserved, state size and action size
+"""
+
+
+class Checkpointer:
+    directory: str          #: Directory of the snapshot files
+    run_name: str           #: Name of the run, which namespaces its snapshot file
+    interval: int           #: Number of episodes between two snapshots
+    background: bool        #: If True, snapshots are written by a background thread
+
+    def __init__(self, directory: str = "checkpoints/", run_name: str = "run", interval: int = 50,
+                 background: bool = False):
+        """
+            Initiate the Checkpointer. All snapshots of a run are appended to a single file, ``<run_name>.qsnap`` in
+            the given directory. The file starts with a fixed header, followed by one record per snapshot, which holds
+            the episode number and the Q-Table as *float32*. The records are read back through a memory map. The
+            training state of the last snapshot, e.g. the random generator of the agent, is kept next to it in
+            ``<run_name>.state.json``, so that a resumed run continues with the same random values.
+
+            :param directory: Directory of the snapshot files. It is created if it does not exist
+            :param run_name: Name of the run
+            :param interval: Number of episodes between two snapshots. Must be > 0
+            :param background: If True, training is not blocked while a snapshot is written to the disk
+        """
+
+        assert interval > 0, "Interval must be > 0"
+        assert run_name and os.path.sep not in run_name, "Illegal run name"
+
+        self.directory = directory
+        self.run_name = run_name
+        self.interval = interval
+        self.background = background
+
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def path(self) -> str:
+        """
+            :return: Path of the snapshot file of the run
+        """
+
+        return os.path.join(self.directory, f"{self.run_name}.qsnap")
+
+    @property
+    def state_path(self) -> str:
+        """
+            :return: Path of the training state file of the run
+        """
+
+        return os.path.join(self.directory, f"{self.run_name}.state.json")
+
+    @staticmethod
+    def _record_dtype(shape: Tuple[int, int]) -> np.dtype:
+        return np.dtype([("episode", "<i8"), ("Q", "<f4", shape)])
+
+    def begin(self, Q: np.ndarray, resume: bool = False) -> int:
+        """
+            This method prepares the run for training. When resuming, the given Q-Table is loaded from the last
+            snapshot; otherwise, the snapshots of a previous run with the same name are removed.
+
+            :param Q: Q-Table as Numpy Array, updated in place
+            :param resume: Continue from the last snapshot, or not
+            :return: Number of episodes already trained
+        """
+
+        if resume:
+            return self.restore(Q)
+
+        self.clear()
+
+        return 0
+
+    def update(self, episode: int, Q: np.ndarray, state: Optional[Dict] = None) -> bool:
+        """
+            This method takes a snapshot of the Q-Table if the given episode is at the checkpoint interval.
+
+            :param episode: Number of finished episodes
+            :param Q: Q-Table as Numpy Array
+            :param state: JSON-serializable training state, see *save*
+            :return: If a snapshot was taken, or not
+        """
+
+        if episode % self.interval == 0:
+            self.save(episode, Q, state)
+
+            return True
+
+        return False
+
+    def save(self, episode: int, Q: np.ndarray, state: Optional[Dict] = None):
+        """
+            This method appends a snapshot of the Q-Table to the snapshot file.
+
+            :param episode: Number of finished episodes
+            :param Q: Q-Table as Numpy Array
+            :param state: JSON-serializable training state which is not in the Q-Table, see *training_state*. None
+            keeps no state
+            :return: Nothing
+        """
+
+        if not self.background:
+            self._write(episode, Q, state)
+            return
+
+        if self._writer is None:
+            self._queue = queue.Queue(maxsize=4)
+            self._writer = threading.Thread(target=self._write_loop, name=f"checkpoint-{self.run_name}", daemon=True)
+            self._writer.start()
+
+        self._raise_error()
+
+        # The agent keeps updating its table, so the writer gets a copy
+        self._queue.put((episode, np.array(Q, dtype=np.float32), state))
+
+    def _write(self, episode: int, Q: np.ndarray, state: Optional[Dict]):
+        record = np.zeros(1, dtype=self._record_dtype(Q.shape))
+        record["episode"] = episode
+        record["Q"] = Q
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                f.write(HEADER.pack(MAGIC, VERSION, 0, Q.shape[0], Q.shape[1]))
+            else:
+                self._check_shape(Q.shape)
+
+            f.write(record.tobytes())
+
+        # The state names its episode, so a state which does not belong to the last snapshot is never restored
+        if state is not None:
+            with open(self.state_path + ".tmp", "w") as f:
+                json.dump({"episode": episode, "state": state}, f)
+
+            os.replace(self.state_path + ".tmp", self.state_path)
+        elif os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+
+            try:
+                if item is None:
+                    return
+
+                if self._error is None:
+                    self._write(*item)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+
+            raise error
+
+    def flush(self):
+        """
+            This method blocks until all snapshots taken so far are written to the disk.
+
+            :return: Nothing
+        """
+
+        if self._queue is not None:
+            self._queue.join()
+
+        self._raise_error()
+
+    def close(self):
+        """
+            This method writes the pending snapshots and stops the background writer.
+
+            :return: Nothing
+        """
+
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+
+            self._writer = None
+            self._queue = None
+
+        self._raise_error()
+
+    def clear(self):
+        """
+            This method removes the snapshot file and the training state of the run.
+
+            :return: Nothing
+        """
+
+        self.flush()
+
+        for path in [self.path, self.state_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _read_header(self) -> Tuple[int, int]:
+        with open(self.path, "rb") as f:
+            magic, version, _, state_size, action_size = HEADER.unpack(f.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"The given file is not a snapshot file! ({self.path}).")
+
+        return state_size, action_size
+
+    def _check_shape(self, shape: Tuple[int, int]):
+        if self._read_header() != tuple(shape):
+            raise ValueError(f"The Q-Table shape {tuple(shape)} does not match the snapshot file! ({self.path}).")
+
+    def snapshots(self) -> Optional[np.ndarray]:
+        """
+            This method maps the snapshot file into memory without reading it.
+
+            :return: Read-only records with the fields **episode** and **Q**, or None if there is no snapshot
+        """
+
+        self.flush()
+
+        if not os.path.exists(self.path):
+            return None
+
+        dtype = self._record_dtype(self._read_header())
+        count = (os.path.getsize(self.path) - HEADER.size) // dtype.itemsize
+
+        if count == 0:
+            return None
+
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=HEADER.size, shape=(count,))
+
+    def restore(self, Q: np.ndarray) -> int:
+        """
+            This method loads the last snapshot into the given Q-Table.
+
+            :param Q: Q-Table as Numpy Array, updated in place
+            :return: The episode of the last snapshot, 0 if there is no snapshot
+        """
+
+        records = self.snapshots()
+
+        if records is None:
+            return 0
+
+        self._check_shape(Q.shape)
+
+        Q[:] = records[-1]["Q"]
+
+        return int(records[-1]["episode"])
+
+    def training_state(self, episode: int) -> Optional[Dict]:
+        """
+            This method reads the training state saved with the snapshot of the given episode.
+
+            :param episode: Episode of the snapshot, see *restore*
+            :return: Training state, or None if the snapshot has none
+        """
+
+        self.flush()
+
+        if not os.path.exists(self.state_path):
+            return None
+
+        with open(self.state_path) as f:
+            saved = json.load(f)
+
+        return saved["state"] if saved["episode"] == episode else None
@@ -0,0 +1,230 @@
+import warnings
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ["python", "numba"]
+"""
+    Training backends of the tabular agents. "numba" runs whole episodes in the JIT-compiled kernels of this module and
+    falls back to "python" if Numba is not installed.
+"""
+
+
+def _jit(function):
+    # Without Numba, the kernels stay plain Python functions with the same results
+    if numba is None:
+        return function
+
+    return numba.njit(cache=True, nogil=True)(function)
+
+
+def is_compiled() -> bool:
+    """
+        :return: If the kernels are JIT-compiled by Numba, or not
+    """
+
+    return numba is not None
+
+
+@_jit
+def _greedy(Q: np.ndarray, state: int) -> int:
+    # Same tie-breaking as np.argmax: the first maximum wins
+    best = 0
+
+    for action in range(1, Q.shape[1]):
+        if Q[state, action] > Q[state, best]:
+            best = action
+
+    return best
+
+
+@_jit
+def _choose(Q: np.ndarray, state: int, epsilon: float, uniforms: np.ndarray, random_actions: np.ndarray,
+            index: int) -> int:
+    # Same decision as RLAgent.explore followed by the greedy action
+    if uniforms[index] < epsilon:
+        return random_actions[index]
+
+    return _greedy(Q, state)
+
+
+@_jit
+def _q_learning_run(Q: np.ndarray, next_states: np.ndarray, rewards: np.ndarray, terminal: np.ndarray, state: int,
+                    alpha: float, discount_rate: float, epsilon: float, uniforms: np.ndarray,
+                    random_actions: np.ndarray, index: int):
+    # Plays Q-Learning steps until the episode ends or the random values run out. The arithmetic is done in float32,
+    # like the scalar NumPy arithmetic of the reference loop on the float32 Q-Table
+    alpha = np.float32(alpha)
+    discount_rate = np.float32(discount_rate)
+
+    total_reward = 0
+    max_delta = np.float32(0.0)
+    steps = 0
+
+    while index < uniforms.shape[0]:
+        action = _choose(Q, state, epsilon, uniforms, random_actions, index)
+        index += 1
+
+        next_state = next_states[state, action]
+        reward = rewards[state, action]
+
+        # Terminal node indices are bootstrapped with 0, like in the reference loop
+        next_max = np.float32(0.0)
+
+        if not terminal[next_state]:
+            next_max = Q[next_state, 0]
+
+            for a in range(1, Q.shape[1]):
+                next_max = max(next_max, Q[next_state, a])
+
+        delta = alpha * (np.float32(reward) + discount_rate * next_max - Q[state, action])
+        Q[state, action] += delta
+        max_delta = max(max_delta, abs(delta))
+
+        state = next_state
+        total_reward += reward
+        steps += 1
+
+        if terminal[next_state]:
+            return state, index, total_reward, max_delta, steps, True
+
+    return state, index, total_reward, max_delta, steps, False
+
+
+@_jit
+def _sarsa_run(Q: np.ndarray, next_states: np.ndarray, rewards: np.ndarray, terminal: np.ndarray, state: int,
+               action: int, alpha: float, discount_rate: float, epsilon: float, uniforms: np.ndarray,
+               random_actions: np.ndarray, index: int):
+    # Plays SARSA steps until the episode ends or the random values run out. A negative action means that the first
+    # action of the episode is not chosen yet
+    alpha = np.float32(alpha)
+    discount_rate = np.float32(discount_rate)
+
+    total_reward = 0
+    max_delta = np.float32(0.0)
+    steps = 0
+
+    if action < 0:
+        if index == uniforms.shape[0]:
+            return state, action, index, total_reward, max_delta, steps, False
+
+        action = _choose(Q, state, epsilon, uniforms, random_actions, index)
+        index += 1
+
+    while index < uniforms.shape[0]:
+        next_state = next_states[state, action]
+        reward = rewards[state, action]
+
+        next_action = _choose(Q, next_state, epsilon, uniforms, random_actions, index)
+        index += 1
+
+        next_q = np.float32(0.0) if terminal[next_state] else Q[next_state, next_action]
+        delta = alpha * (np.float32(reward) + discount_rate * next_q - Q[state, action])
+        Q[state, action] += delta
+        max_delta = max(max_delta, abs(delta))
+
+        state, action = next_state, next_action
+        total_reward += reward
+        steps += 1
+
+        if terminal[next_state]:
+            return state, action, index, total_reward, max_delta, steps, True
+
+    return state, action, index, total_reward, max_delta, steps, False
+
+
+def q_learning_episode(agent, state: int) -> Tuple[int, int, float, int]:
+    """
+        This method plays one Q-Learning episode of the agent in the compiled kernel. The kernel consumes the pre-drawn
+        exploration values of the agent in the same order as *RLAgent.explore*, so the results match the reference loop
+        for the same seed.
+
+        :param agent: Q-Learning agent
+        :param state: Starting node index
+        :return: Last node index, total reward, maximum absolute change of a Q value and number of steps
+    """
+
+    env = agent.env
+
+    total_reward, max_delta, steps = 0, 0.0, 0
+    done = False
+
+    while not done:
+        if agent._random_index == len(agent._uniform_block):
+            agent._refill_random()
+
+        state, agent._random_index, reward, delta, count, done = _q_learning_run(
+            agent.Q, env.next_state, env.reward, env.terminal, state, agent.alpha, agent.discount_rate,
+            agent.epsilon, agent._uniform_block, agent._action_block, agent._random_index)
+
+        total_reward += int(reward)
+        max_delta = max(max_delta, float(delta))
+        steps += count
+
+    return state, total_reward, max_delta, steps
+
+
+def sarsa_episode(agent, state: int) -> Tuple[int, int, float, int]:
+    """
+        This method plays one SARSA episode of the agent in the compiled kernel, see *q_learning_episode*.
+
+        :param agent: SARSA agent
+        :param state: Starting node index
+        :return: Last node index, total reward, maximum absolute change of a Q value and number of steps
+    """
+
+    env = agent.env
+
+    action = -1
+    total_reward, max_delta, steps = 0, 0.0, 0
+    done = False
+
+    while not done:
+        if agent._random_index == len(agent._uniform_block):
+            agent._refill_random()
+
+        state, action, agent._random_index, reward, delta, count, done = _sarsa_run(
+            agent.Q, env.next_state, env.reward, env.terminal, state, action, agent.alpha, agent.discount_rate,
+            agent.epsilon, agent._uniform_block, agent._action_block, agent._random_index)
+
+        total_reward += int(reward)
+        max_delta = max(max_delta, float(delta))
+        steps += count
+
+    return state, total_reward, max_delta, steps
+
+
+def select(agent, episode: Callable, hooks) -> Optional[Callable]:
+    """
+        This method decides whether the agent can train with the given compiled episode function. Per-step epsilon
+        schedules and sampled *on_step* hooks need the Python loop, since they run between two steps, and so do the
+        Q-Tables which are not stored as a dense *float32* array and the shaped rewards.
+
+        :param agent: Agent in training
+        :param episode: *q_learning_episode* or *sarsa_episode*
+        :param hooks: Training hooks of the agent
+        :return: The episode function, or None if the agent must use the Python loop
+    """
+
+    if not is_compiled():
+        warnings.warn("Numba is not installed, the agent trains with the Python backend.", RuntimeWarning)
+
+        return None
+
+    if agent.epsilon_schedule.per_step or hooks.step_interval > 0:
+        return None
+
+    # The kernels index a dense float32 array, other Q-Table storages use the Python loop
+    if not isinstance(agent.Q, np.ndarray) or agent.Q.dtype != np.float32:
+        return None
+
+    # The kernels learn from the rewards of the transition tables, which are not shaped
+    if getattr(agent, "potential", None) is not None:
+        return None
+
+    return episode
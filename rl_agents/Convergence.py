@@ -0,0 +1,176 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+
+class ConvergenceCriterion(ABC):
+    """
+        Base class of the criteria which decide whether training has converged. The criterion is checked once at the
+        end of every training episode. Criteria can be combined with *AllOf* and *AnyOf*.
+    """
+
+    def reset(self):
+        """
+            This method clears the state of the criterion before a training run.
+
+            :return: Nothing
+        """
+
+        ...
+
+    @abstractmethod
+    def update(self, agent, episode: int, max_delta: float) -> bool:
+        """
+            Implement this method, Not Call!
+
+            :param agent: Agent in training
+            :param episode: Number of finished episodes
+            :param max_delta: Maximum absolute change of a Q value in the finished episode
+            :return: If training has converged, or not
+        """
+
+        ...
+
+
+class MaxDeltaQ(ConvergenceCriterion):
+    tolerance: float        #: Maximum absolute change of a Q value in a converged episode
+    patience: int           #: Number of consecutive converged episodes required
+    _count: int
+
+    def __init__(self, tolerance: float, patience: int = 1):
+        """
+            Training converges when no Q value changes more than the tolerance for *patience* consecutive episodes.
+
+            :param tolerance: Maximum absolute change of a Q value. Must be positive or zero
+            :param patience: Number of consecutive episodes. Must be > 0
+        """
+
+        assert tolerance >= 0.0, "tolerance must be >= 0"
+        self.tolerance = tolerance
+
+        assert patience > 0, "patience must be > 0"
+        self.patience = patience
+
+        self._count = 0
+
+    def reset(self):
+        self._count = 0
+
+    def update(self, agent, episode: int, max_delta: float) -> bool:
+        self._count = self._count + 1 if max_delta < self.tolerance else 0
+
+        return self._count >= self.patience
+
+
+class StablePolicy(ConvergenceCriterion):
+    patience: int                   #: Number of episodes for which the greedy policy must not change
+    _policy: Optional[np.ndarray]
+    _count: int
+
+    def __init__(self, patience: int):
+        """
+            Training converges when the greedy policy of the Q-Table is unchanged for *patience* episodes.
+
+            :param patience: Number of episodes. Must be > 0
+        """
+
+        assert patience > 0, "patience must be > 0"
+        self.patience = patience
+
+        self._policy = None
+        self._count = 0
+
+    def reset(self):
+        self._policy = None
+        self._count = 0
+
+    def update(self, agent, episode: int, max_delta: float) -> bool:
+        policy = np.argmax(agent.Q, axis=1)
+
+        if self._policy is not None and np.array_equal(policy, self._policy):
+            self._count += 1
+        else:
+            self._count = 0
+
+        self._policy = policy
+
+        return self._count >= self.patience
+
+
+class StableReturn(ConvergenceCriterion):
+    patience: int                   #: Number of episodes for which the validation score must not change
+    tolerance: float                #: Maximum change of the validation score
+    _score: Optional[int]
+    _count: int
+
+    def __init__(self, patience: int, tolerance: float = 0.0):
+        """
+            Training converges when the score of the greedy *validate* rollout changes at most by the tolerance for
+            *patience* episodes.
+
+            :param patience: Number of episodes. Must be > 0
+            :param tolerance: Maximum change of the score. Must be positive or zero
+        """
+
+        assert patience > 0, "patience must be > 0"
+        self.patience = patience
+
+        assert tolerance >= 0.0, "tolerance must be >= 0"
+        self.tolerance = tolerance
+
+        self._score = None
+        self._count = 0
+
+    def reset(self):
+        self._score = None
+        self._count = 0
+
+    def update(self, agent, episode: int, max_delta: float) -> bool:
+        _, score = agent.validate()
+
+        if self._score is not None and abs(score - self._score) <= self.tolerance:
+            self._count += 1
+        else:
+            self._count = 0
+            self._score = score
+
+        return self._count >= self.patience
+
+
+class AllOf(ConvergenceCriterion):
+    def __init__(self, *criteria: ConvergenceCriterion):
+        """
+            Training converges when all given criteria are met in the same episode.
+
+            :param criteria: Combined criteria
+        """
+
+        assert len(criteria) > 0, "At least one criterion is required"
+        self.criteria = criteria
+
+    def reset(self):
+        for criterion in self.criteria:
+            criterion.reset()
+
+    def update(self, agent, episode: int, max_delta: float) -> bool:
+        # Every criterion is updated, so that their counters stay consistent
+        results = [criterion.update(agent, episode, max_delta) for criterion in self.criteria]
+
+        return all(results)
+
+
+class AnyOf(AllOf):
+    def __init__(self, *criteria: ConvergenceCriterion):
+        """
+            Training converges when any of the given criteria is met.
+
+            :param criteria: Combined criteria
+        """
+
+        super().__init__(*criteria)
+
+    def update(self, agent, episode: int, max_delta: float) -> bool:
+        results = [criterion.update(agent, episode, max_delta) for criterion in self.criteria]
+
+        return any(results)
@@ -0,0 +1,66 @@
+from typing import Dict, List, Optional, Tuple, Union
+from Environment import Environment
+from rl_agents.QLearning import QLearningAgent
+from rl_agents.Checkpoint import Checkpointer
+from rl_agents.Convergence import ConvergenceCriterion
+from rl_agents.EpsilonSchedule import EpsilonSchedule
+from rl_agents.Hooks import TrainingHook
+from rl_agents.QStorage import QTable
+from rl_agents.Model import TransitionModel
+from rl_agents.Shaping import shaped_rewards
+from rl_agents.Batched import q_learning_update
+import numpy as np
+
+
+class DynaQAgent(QLearningAgent):
+    planning_steps: int     #: Number of simulated updates per real step
+    model: TransitionModel  #: Learned model of the observed transitions
+    train_batch = None      #: No batched training, since the learned model follows the real steps of one agent
+
+    def __init__(self, env: Environment, seed: int, discount_rate: float, epsilon: float, epsilon_decay: float,
+                 epsilon_min: float, alpha: float, max_episode: int, planning_steps: int = 10,
+                 checkpointer: Checkpointer = None, convergence: ConvergenceCriterion = None,
+                 epsilon_schedule: EpsilonSchedule = None, hooks: List[TrainingHook] = None,
+                 q_storage: Union[str, np.ndarray, QTable] = "float32", heuristic_init: bool = False,
+                 shaping: bool = False, q_storage_options: Dict = None):
+        """
+            Initiate the Dyna-Q Agent. Every real step makes a Q-Learning update and records the transition in the
+            learned model; then *planning_steps* observed transitions, drawn uniformly from the model, are replayed as
+            one batched update. The other parameters are the same as in *QLearningAgent*; the episodes always run in
+            Python, since the compiled kernels have no model.
+
+            :param planning_steps: Number of simulated updates per real step. Must be positive or zero, 0 is Q-Learning
+        """
+        super().__init__(env, seed, discount_rate, epsilon, epsilon_decay, epsilon_min, alpha, max_episode,
+                         checkpointer, convergence, epsilon_schedule, hooks, q_storage=q_storage,
+                         heuristic_init=heuristic_init, shaping=shaping, q_storage_options=q_storage_options)
+
+        assert planning_steps >= 0, "planning_steps must be >= 0"
+        self.planning_steps = planning_steps
+
+        self.model = TransitionModel(self.state_size, self.action_size)
+
+    def train(self, **kwargs):
+        """
+            This method fills the Q-Table with Dyna-Q. The maximum change of a Q value, which the convergence criterion
+            receives, only covers the real steps.
+
+            :param kwargs: **resume** *(bool)*: Continue from the last snapshot of the checkpointer
+            :return: Nothing
+        """
+
+        self._run_training(kwargs.get("resume", False))
+
+    def _step(self, state: int, action: Optional[int]) -> Tuple[int, int, int, bool, Optional[int], float]:
+        # The real step is the Q-Learning update, which bootstraps terminal node indices with 0 like the planning
+        action, next_state, reward, done, _, max_delta = super()._step(state, action)
+
+        self.model.observe(state, action, next_state, reward, done)
+
+        if self.planning_steps > 0:
+            states, actions, rewards, next_states, dones = self.model.sample(self.rng, self.planning_steps)
+            q_learning_update(self.Q, states, actions,
+                              shaped_rewards(self.potential, rewards, states, next_states, dones, self.discount_rate),
+                              next_states, dones, self.alpha, self.discount_rate)
+
+        return action, next_state, reward, done, None, max_delta
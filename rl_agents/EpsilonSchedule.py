@@ -0,0 +1,177 @@
+from abc import ABC, abstractmethod
+from typing import Dict
+
+
+class EpsilonSchedule(ABC):
+    name: str = ""          #: Name of the schedule type, see *from_dict*
+    start: float            #: Initial epsilon value
+    minimum: float          #: Minimum epsilon value
+    per_step: bool          #: If True, epsilon is updated after every step, otherwise after every episode
+
+    def __init__(self, start: float, minimum: float, per_step: bool):
+        """
+            Initiate the schedule.
+
+            :param start: Initial epsilon value. Must be positive or zero
+            :param minimum: Minimum epsilon value. Must be positive or zero
+            :param per_step: Apply the schedule per step instead of per episode
+        """
+
+        assert start >= 0.0, "start must be >= 0"
+        self.start = start
+
+        assert minimum >= 0.0, "minimum must be >= 0"
+        self.minimum = minimum
+
+        self.per_step = per_step
+
+    @abstractmethod
+    def _decay(self, t: int) -> float:
+        """
+            Implement this method, Not Call!
+
+            :param t: Number of finished steps or episodes
+            :return: Epsilon value before clipping to the minimum
+        """
+
+        ...
+
+    def value(self, t: int) -> float:
+        """
+            This method provides the epsilon value after the given number of steps or episodes.
+
+            :param t: Number of finished steps if *per_step*, otherwise number of finished episodes
+            :return: Epsilon value
+        """
+
+        return max(self.minimum, self._decay(t))
+
+    def to_dict(self) -> Dict:
+        """
+            This method describes the schedule, so that it can be logged with the run and rebuilt by *from_dict*.
+
+            :return: Schedule type and parameters
+        """
+
+        return {"type": self.name, **{key: value for key, value in vars(self).items() if not key.startswith("_")}}
+
+    @staticmethod
+    def from_dict(config: Dict) -> "EpsilonSchedule":
+        """
+            This method builds a schedule from its description.
+
+            :param config: Schedule type and parameters, e.g. ``{"type": "linear", "start": 1.0, "minimum": 0.01,
+            "duration": 200}``
+            :return: Created schedule
+        """
+
+        config = dict(config)
+        schedule_type = config.pop("type")
+
+        assert schedule_type in SCHEDULES, f"Unknown epsilon schedule: {schedule_type}"
+
+        return SCHEDULES[schedule_type](**config)
+
+    def __repr__(self):
+        parameters = ", ".join(f"{key}={value}" for key, value in self.to_dict().items() if key != "type")
+
+        return f"{type(self).__name__}({parameters})"
+
+
+class ExponentialDecay(EpsilonSchedule):
+    name = "exponential"
+    decay: float            #: Decay ratio, epsilon = epsilon * decay
+
+    def __init__(self, start: float, decay: float, minimum: float, per_step: bool = False):
+        """
+            Epsilon is multiplied by the decay ratio after every step or episode.
+
+            :param start: Initial epsilon value
+            :param decay: Decay ratio. Must be in range [0.0, 1.0]
+            :param minimum: Minimum epsilon value
+            :param per_step: Apply the schedule per step instead of per episode
+        """
+        super().__init__(start, minimum, per_step)
+
+        assert 0.0 <= decay <= 1.0, "decay must be in range [0.0, 1.0]"
+        self.decay = decay
+
+    def _decay(self, t: int) -> float:
+        return self.start * self.decay ** t
+
+
+class LinearDecay(EpsilonSchedule):
+    name = "linear"
+    duration: int           #: Number of steps or episodes to reach the minimum
+
+    def __init__(self, start: float, minimum: float, duration: int, per_step: bool = False):
+        """
+            Epsilon decreases linearly from the start value to the minimum in the given duration.
+
+            :param start: Initial epsilon value
+            :param minimum: Minimum epsilon value
+            :param duration: Number of steps or episodes to reach the minimum. Must be > 0
+            :param per_step: Apply the schedule per step instead of per episode
+        """
+        super().__init__(start, minimum, per_step)
+
+        assert duration > 0, "duration must be > 0"
+        self.duration = duration
+
+    def _decay(self, t: int) -> float:
+        return self.start - (self.start - self.minimum) * t / self.duration
+
+
+class StepDecay(EpsilonSchedule):
+    name = "step"
+    factor: float           #: Ratio applied at every stage
+    step_size: int          #: Number of steps or episodes of a stage
+
+    def __init__(self, start: float, factor: float, step_size: int, minimum: float, per_step: bool = False):
+        """
+            Epsilon is multiplied by the factor once every *step_size* steps or episodes.
+
+            :param start: Initial epsilon value
+            :param factor: Ratio applied at every stage. Must be in range [0.0, 1.0]
+            :param step_size: Number of steps or episodes of a stage. Must be > 0
+            :param minimum: Minimum epsilon value
+            :param per_step: Apply the schedule per step instead of per episode
+        """
+        super().__init__(start, minimum, per_step)
+
+        assert 0.0 <= factor <= 1.0, "factor must be in range [0.0, 1.0]"
+        self.factor = factor
+
+        assert step_size > 0, "step_size must be > 0"
+        self.step_size = step_size
+
+    def _decay(self, t: int) -> float:
+        return self.start * self.factor ** (t // self.step_size)
+
+
+class InverseTimeDecay(EpsilonSchedule):
+    name = "inverse_time"
+    rate: float             #: Decay rate, epsilon = start / (1 + rate * t)
+
+    def __init__(self, start: float, rate: float, minimum: float, per_step: bool = False):
+        """
+            Epsilon decays in inverse proportion to the number of steps or episodes.
+
+            :param start: Initial epsilon value
+            :param rate: Decay rate. Must be positive or zero
+            :param minimum: Minimum epsilon value
+            :param per_step: Apply the schedule per step instead of per episode
+        """
+        super().__init__(start, minimum, per_step)
+
+        assert rate >= 0.0, "rate must be >= 0"
+        self.rate = rate
+
+    def _decay(self, t: int) -> float:
+        return self.start / (1.0 + self.rate * t)
+
+
+SCHEDULES = {schedule.name: schedule for schedule in [ExponentialDecay, LinearDecay, StepDecay, InverseTimeDecay]}
+"""
+    Schedule classes by their type name
+"""
@@ -0,0 +1,213 @@
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from Environment import Environment
+from rl_agents.EpsilonSchedule import EpsilonSchedule
+from rl_agents.Hooks import MetricsRecorder
+from rl_agents.RLAgent import RLAgent
+
+
+class _StridedSchedule(EpsilonSchedule):
+    def __init__(self, schedule: EpsilonSchedule, stride: int):
+        """
+            Epsilon of a worker which trains every *stride*-th episode of the run, so that all workers follow the
+            schedule of the whole run instead of restarting it on their share of the episodes.
+
+            :param schedule: Schedule of the whole run
+            :param stride: Number of workers
+        """
+        super().__init__(schedule.start, schedule.minimum, schedule.per_step)
+
+        self.schedule = schedule
+        self.stride = stride
+
+    def _decay(self, t: int) -> float:
+        return self.schedule.value(t * self.stride)
+
+    def to_dict(self) -> Dict:
+        # The wrapper is private to the workers, which are described by the schedule of the whole run
+        return self.schedule.to_dict()
+
+
+def _make_agent(grid_file: str, agent_name: str, seed: int, max_episode: int, agent_kwargs: Dict) -> RLAgent:
+    import rl_agents
+
+    return getattr(rl_agents, agent_name)(env=Environment(grid_file), seed=seed, max_episode=max_episode,
+                                          **agent_kwargs)
+
+
+def _work(worker: int, grid_file: str, agent_name: str, seed: int, max_episode: int, stride: int,
+          agent_kwargs: Dict, memory_name: str, results: mp.Queue):
+    # Runs in a worker process: trains its own agent on the shared Q-Table and reports its statistics
+    memory = shared_memory.SharedMemory(name=memory_name)
+    agent = None
+
+    try:
+        agent = _make_agent(grid_file, agent_name, seed, max_episode, agent_kwargs)
+        agent.epsilon_schedule = _StridedSchedule(agent.epsilon_schedule, stride)
+        agent.epsilon = agent.epsilon_schedule.value(0)
+
+        # The TD updates write to the shared table without locks; a lost update only costs a little progress
+        agent.Q = np.ndarray(agent.Q.shape, dtype=agent.Q.dtype, buffer=memory.buf)
+
+        recorder = MetricsRecorder()
+        agent.hooks.append(recorder)
+
+        start = time.perf_counter_ns()
+        agent.train()
+        wall_time_ms = (time.perf_counter_ns() - start) * 1e-6
+
+        records = recorder.records
+        results.put({
+            "worker": worker,
+            "seed": seed,
+            "episodes": len(records),
+            "steps": int(records["steps"].sum()),
+            "wall_time_ms": wall_time_ms,
+            "mean_return": float(records["return"].mean()) if len(records) > 0 else None,
+        })
+    except BaseException as e:
+        results.put({"worker": worker, "error": repr(e)})
+    finally:
+        # The Q-Table of the agent is a view of the shared memory, which cannot be closed while a view exists
+        agent = None
+        memory.close()
+
+
+class HogwildTrainer:
+    grid_file: str          #: Path of the grid file, which every worker loads on its own
+    agent_name: str         #: Class name of the agent in *rl_agents*
+    workers: int            #: Number of worker processes
+    max_episode: int        #: Number of episodes of the whole run, split between the workers
+    seed: int               #: Seed of the run, from which the seeds of the workers are derived
+    agent_kwargs: Dict      #: Further parameters of the agents
+    Q: Optional[np.ndarray]     #: Trained Q-Table, after *train*
+    stats: List[Dict]       #: Statistics of each worker, after *train*
+    episodes_per_sec: float     #: Aggregate training throughput of the last run
+    steps_per_sec: float        #: Aggregate number of steps per second of the last run
+
+    def __init__(self, grid_file: str, agent_name: str = "QLearningAgent", workers: int = None,
+                 max_episode: int = 500, seed: int = 42, **agent_kwargs):
+        """
+            Initiate the Hogwild trainer. The Q-Table lives in shared memory; every worker process plays its own
+            epsilon-greedy episodes on its own *Environment* and applies its TD updates to the shared table without
+            locks, which scales with the number of cores as long as the workers rarely update the same state-action
+            pair at the same time.
+
+            :param grid_file: Path of the grid file. A binary grid file shares its pages between the workers
+            :param agent_name: Class name of a tabular agent in *rl_agents*
+            :param workers: Number of worker processes, the number of cores by default. Must be > 0
+            :param max_episode: Number of episodes of the whole run. Must be >= workers
+            :param seed: Seed of the run
+            :param agent_kwargs: Further parameters of the agents, e.g. discount_rate, epsilon, alpha
+        """
+
+        workers = workers or os.cpu_count() or 1
+
+        assert workers > 0, "Number of workers must be > 0"
+        assert max_episode >= workers, "Every worker needs at least one episode"
+        assert "hooks" not in agent_kwargs and "checkpointer" not in agent_kwargs, \
+            "Hooks and checkpointers are not shared between processes"
+        assert agent_kwargs.get("q_storage", "float32") == "float32", "The shared Q-Table is a dense float32 array"
+
+        self.grid_file = grid_file
+        self.agent_name = agent_name
+        self.workers = workers
+        self.max_episode = max_episode
+        self.seed = seed
+        self.agent_kwargs = agent_kwargs
+
+        self.Q = None
+        self.stats = []
+        self.episodes_per_sec = 0.0
+        self.steps_per_sec = 0.0
+
+    def worker_seeds(self) -> List[int]:
+        """
+            :return: Independent seed of each worker, derived from the seed of the run
+        """
+
+        sequences = np.random.SeedSequence(self.seed).spawn(self.workers)
+
+        return [int(sequence.generate_state(1)[0]) for sequence in sequences]
+
+    def train(self, timeout: float = None) -> np.ndarray:
+        """
+            This method runs the workers until all episodes are played. The workers are terminated if the run fails or
+            is interrupted, and the shared memory is always released.
+
+            :param timeout: Maximum number of seconds to wait for a worker, no limit by default
+            :return: Trained Q-Table
+            :raise: Worker failure exception
+        """
+
+        template = _make_agent(self.grid_file, self.agent_name, self.seed, 1, self.agent_kwargs)
+        memory = shared_memory.SharedMemory(create=True, size=template.Q.nbytes)
+
+        context = mp.get_context()
+        results = context.Queue()
+        processes = []
+
+        try:
+            Q = np.ndarray(template.Q.shape, dtype=template.Q.dtype, buffer=memory.buf)
+            Q[:] = template.Q
+
+            # Episodes are split evenly, the first workers take the remainder
+            shares = [self.max_episode // self.workers + (i < self.max_episode % self.workers)
+                      for i in range(self.workers)]
+
+            start = time.perf_counter_ns()
+
+            for worker, (seed, share) in enumerate(zip(self.worker_seeds(), shares)):
+                process = context.Process(target=_work, name=f"hogwild-{worker}", daemon=True,
+                                          args=(worker, self.grid_file, self.agent_name, seed, share, self.workers,
+                                                self.agent_kwargs, memory.name, results))
+                process.start()
+                processes.append(process)
+
+            stats = [results.get(timeout=timeout) for _ in processes]
+            wall_seconds = (time.perf_counter_ns() - start) * 1e-9
+
+            for process in processes:
+                process.join()
+
+            errors = [stat["error"] for stat in stats if "error" in stat]
+
+            if errors:
+                raise RuntimeError(f"Hogwild workers failed: {'; '.join(errors)}")
+
+            self.stats = sorted(stats, key=lambda stat: stat["worker"])
+            self.episodes_per_sec = sum(stat["episodes"] for stat in stats) / wall_seconds
+            self.steps_per_sec = sum(stat["steps"] for stat in stats) / wall_seconds
+            self.Q = Q.copy()
+
+            del Q
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+
+            memory.close()
+            memory.unlink()
+
+        return self.Q
+
+    def agent(self) -> RLAgent:
+        """
+            This method builds an agent with the trained Q-Table in this process, e.g. for *validate*.
+
+            :return: Agent
+        """
+
+        assert self.Q is not None, "Train first"
+
+        agent = _make_agent(self.grid_file, self.agent_name, self.seed, self.max_episode, self.agent_kwargs)
+        agent.Q = self.Q.copy()
+
+        return agent
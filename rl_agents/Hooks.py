@@ -0,0 +1,234 @@
+import json
+import math
+import os.path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EPISODE_DTYPE = np.dtype([
+    ("episode", "<i8"),
+    ("steps", "<i8"),
+    ("return", "<f8"),
+    ("epsilon", "<f8"),
+    ("max_delta", "<f8"),
+    ("wall_time_ms", "<f8"),
+    ("terminal", "S1"),
+])
+"""
+    Fields of the per-episode record: episode number (starting at 1), number of steps, total reward, epsilon at the
+    start of the episode, maximum absolute change of a Q value, wall time and node type of the terminal node ("G" or
+    "P")
+"""
+
+
+class TrainingHook:
+    """
+        Base class of the callbacks of *train*. Every method does nothing by default, so a hook only overrides the
+        events it needs. *on_step* is only called if *step_interval* is positive, every *step_interval* steps.
+    """
+
+    step_interval: int = 0  #: Number of steps between two *on_step* calls, 0 disables *on_step*
+
+    def on_train_start(self, agent, start_episode: int):
+        """
+            :param agent: Agent in training
+            :param start_episode: Number of episodes already trained, > 0 if training is resumed
+            :return: Nothing
+        """
+
+        ...
+
+    def on_episode_start(self, agent, episode: int):
+        """
+            :param agent: Agent in training
+            :param episode: Number of the episode, starting at 1
+            :return: Nothing
+        """
+
+        ...
+
+    def on_step(self, agent, step: int, state: int, action: int, reward: int, next_state: int, done: bool):
+        """
+            :param agent: Agent in training
+            :param step: Number of steps taken in this training so far
+            :param state: Node index before the step
+            :param action: Taken action
+            :param reward: Transition reward
+            :param next_state: Node index after the step
+            :param done: If the episode is finished, or not
+            :return: Nothing
+        """
+
+        ...
+
+    def on_episode_end(self, agent, record: Dict):
+        """
+            :param agent: Agent in training
+            :param record: Metrics of the finished episode, with the fields of *EPISODE_DTYPE*
+            :return: Nothing
+        """
+
+        ...
+
+    def on_checkpoint(self, agent, episode: int, path: str):
+        """
+            :param agent: Agent in training
+            :param episode: Number of finished episodes
+            :param path: Path of the snapshot file
+            :return: Nothing
+        """
+
+        ...
+
+    def on_train_end(self, agent):
+        """
+            :param agent: Agent in training
+            :return: Nothing
+        """
+
+        ...
+
+
+class HookList(TrainingHook):
+    hooks: List[TrainingHook]   #: Hooks which receive the events
+
+    def __init__(self, hooks: Optional[List[TrainingHook]] = None):
+        """
+            Forwards every event to the given hooks, in order. *step_interval* is the greatest common divisor of the
+            step intervals of the hooks, so that the agent checks a single interval in its inner loop.
+
+            :param hooks: Hooks, None for no hook
+        """
+
+        self.hooks = list(hooks or [])
+        self._step_hooks = [hook for hook in self.hooks if hook.step_interval > 0]
+        self.step_interval = math.gcd(*[hook.step_interval for hook in self._step_hooks])
+
+    def __bool__(self):
+        return len(self.hooks) > 0
+
+    def on_train_start(self, agent, start_episode: int):
+        for hook in self.hooks:
+            hook.on_train_start(agent, start_episode)
+
+    def on_episode_start(self, agent, episode: int):
+        for hook in self.hooks:
+            hook.on_episode_start(agent, episode)
+
+    def on_step(self, agent, step: int, state: int, action: int, reward: int, next_state: int, done: bool):
+        for hook in self._step_hooks:
+            if step % hook.step_interval == 0:
+                hook.on_step(agent, step, state, action, reward, next_state, done)
+
+    def on_episode_end(self, agent, record: Dict):
+        for hook in self.hooks:
+            hook.on_episode_end(agent, record)
+
+    def on_checkpoint(self, agent, episode: int, path: str):
+        for hook in self.hooks:
+            hook.on_checkpoint(agent, episode, path)
+
+    def on_train_end(self, agent):
+        for hook in self.hooks:
+            hook.on_train_end(agent)
+
+
+class MetricsRecorder(TrainingHook):
+    _records: np.ndarray
+    _count: int
+
+    def __init__(self):
+        """
+            Keeps the per-episode records in memory. The array is preallocated for *max_episode* episodes of the
+            agent when training starts, so recording an episode does not allocate.
+        """
+
+        self._records = np.zeros(0, dtype=EPISODE_DTYPE)
+        self._count = 0
+
+    @property
+    def records(self) -> np.ndarray:
+        """
+            :return: Records of the finished episodes, with the fields of *EPISODE_DTYPE*
+        """
+
+        return self._records[:self._count]
+
+    def on_train_start(self, agent, start_episode: int):
+        self._records = np.zeros(max(getattr(agent, "max_episode", 0) - start_episode, 1), dtype=EPISODE_DTYPE)
+        self._count = 0
+
+    def on_episode_end(self, agent, record: Dict):
+        if self._count == len(self._records):
+            self._records = np.resize(self._records, 2 * len(self._records))
+
+        row = self._records[self._count]
+
+        for key, value in record.items():
+            row[key] = value
+
+        self._count += 1
+
+
+class JSONLSink(TrainingHook):
+    path: str               #: Path of the metrics file
+    flush_interval: int     #: Number of episodes between two flushes of the file
+
+    def __init__(self, path: str, flush_interval: int = 1):
+        """
+            Streams the per-episode records to a JSON Lines file, one object per line, so that plots and dashboards
+            can follow a running training. A resumed training appends to the file, otherwise it is overwritten; the
+            episodes trained after the last snapshot are then recorded twice.
+
+            :param path: Path of the metrics file. Its directory is created if it does not exist
+            :param flush_interval: Number of episodes between two flushes. Must be > 0
+        """
+
+        assert flush_interval > 0, "Flush interval must be > 0"
+
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self._file = None
+        self._count = 0
+
+    def on_train_start(self, agent, start_episode: int):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self._file = open(self.path, "a" if start_episode > 0 else "w")
+        self._count = 0
+
+    def on_episode_end(self, agent, record: Dict):
+        self._file.write(json.dumps(record) + "\n")
+        self._count += 1
+
+        if self._count % self.flush_interval == 0:
+            self._file.flush()
+
+    def on_train_end(self, agent):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_metrics(path: str) -> np.ndarray:
+    """
+        This method reads the per-episode records written by *JSONLSink*. An incomplete last line of a running training
+        is skipped.
+
+        :param path: Path of the metrics file
+        :return: Records with the fields of *EPISODE_DTYPE*
+    """
+
+    rows = []
+
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+            rows.append(tuple(record[name] for name in EPISODE_DTYPE.names))
+
+    return np.array(rows, dtype=EPISODE_DTYPE)
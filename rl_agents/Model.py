@@ -0,0 +1,134 @@
+import heapq
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class TransitionModel:
+    next_state: np.ndarray  #: Observed next node index of each state-action pair, -1 if not observed yet
+    reward: np.ndarray      #: Observed transition reward of each state-action pair
+    done: np.ndarray        #: If the transition of each state-action pair ends the episode, or not
+    size: int               #: Number of observed state-action pairs
+
+    def __init__(self, state_size: int, action_size: int):
+        """
+            Learned model of a deterministic environment. Every observed transition is stored in arrays indexed by
+            the state-action pair, so it can be replayed without the environment. The model also keeps the observed
+            predecessors of each node index, which prioritized sweeping follows backward.
+
+            :param state_size: Number of node indices
+            :param action_size: Number of actions
+        """
+
+        self.action_size = action_size
+
+        self.next_state = np.full((state_size, action_size), -1, dtype=np.int32)
+        self.reward = np.zeros((state_size, action_size), dtype=np.int32)
+        self.done = np.zeros((state_size, action_size), dtype=bool)
+
+        # Flat index (state * action size + action) of every observed pair, in the order of observation
+        self._keys = np.zeros(1024, dtype=np.int64)
+        self.size = 0
+
+        self._predecessors: Dict[int, List[int]] = {}
+
+    def observe(self, state: int, action: int, next_state: int, reward: int, done: bool):
+        """
+            This method records a real transition. Transitions are deterministic, so a pair is only stored once.
+
+            :param state: Node index before the step
+            :param action: Taken action
+            :param next_state: Node index after the step
+            :param reward: Transition reward
+            :param done: If the episode is finished, or not
+            :return: Nothing
+        """
+
+        if self.next_state[state, action] >= 0:
+            return
+
+        self.next_state[state, action] = next_state
+        self.reward[state, action] = reward
+        self.done[state, action] = done
+
+        if self.size == len(self._keys):
+            self._keys = np.resize(self._keys, 2 * self.size)
+
+        key = state * self.action_size + action
+        self._keys[self.size] = key
+        self.size += 1
+
+        self._predecessors.setdefault(next_state, []).append(key)
+
+    def sample(self, rng: np.random.Generator, count: int) -> Tuple[np.ndarray, ...]:
+        """
+            This method draws observed transitions uniformly, with replacement.
+
+            :param rng: Random generator of the agent
+            :param count: Number of transitions
+            :return: Tuple (**states**, **actions**, **rewards**, **next_states**, **dones**) of arrays
+        """
+
+        keys = self._keys[rng.integers(0, self.size, count)]
+        states, actions = np.divmod(keys, self.action_size)
+
+        return (states, actions, self.reward[states, actions], self.next_state[states, actions],
+                self.done[states, actions])
+
+    def predecessors(self, state: int) -> List[int]:
+        """
+            :param state: Node index
+            :return: Flat indices of the observed state-action pairs which lead to the given node index
+        """
+
+        return self._predecessors.get(state, [])
+
+
+class PriorityQueue:
+    """
+        Max-priority queue of state-action pairs on a binary heap. A pair is queued at most once with its highest
+        priority; pushing it again with a lower priority has no effect.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+        self._priorities: Dict[int, float] = {}
+
+    def __len__(self):
+        return len(self._priorities)
+
+    def push(self, key: int, priority: float):
+        """
+            :param key: Flat index of the state-action pair
+            :param priority: Priority, e.g. the absolute TD error
+            :return: Nothing
+        """
+
+        if priority <= self._priorities.get(key, 0.0):
+            return
+
+        self._priorities[key] = priority
+
+        # heapq is a min-heap; an older entry of the same pair stays in the heap and is skipped by pop
+        heapq.heappush(self._heap, (-priority, key))
+
+    def pop(self) -> Tuple[int, float]:
+        """
+            :return: The pair with the highest priority and its priority
+        """
+
+        while True:
+            priority, key = heapq.heappop(self._heap)
+
+            if self._priorities.get(key) == -priority:
+                del self._priorities[key]
+
+                return key, -priority
+
+    def clear(self):
+        """
+            :return: Nothing
+        """
+
+        self._heap.clear()
+        self._priorities.clear()
@@ -0,0 +1,341 @@
+from typing import List, Union
+
+import numpy as np
+
+from Environment import ACTION_DELTAS, FLAT, GOAL, MOUNTAIN, OUT_OF_BOUNDS_REWARD, PITFALL, REWARD_MATRIX, Environment
+from rl_agents.QStorage import QTable
+from rl_agents.RLAgent import RLAgent
+from rl_agents.ValueIteration import ValueIterationAgent
+
+LEFT, RIGHT = 1, 3      # Actions along a row, see *Environment.move*
+
+
+def coarsen(terrain: np.ndarray, block: int) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+        This method aggregates the terrain in square blocks of nodes and compiles the transition tables of the grid of
+        blocks, in the layout of *Environment._compile*. A move between two blocks stands for *block* moves of the full
+        grid:
+         - A block with a goal is a goal; its reward is the goal reward.
+         - A block whose nodes are pitfalls for at least a half is a pitfall; its reward is the pitfall reward.
+         - Entering any other block costs *block* times the mean reward of entering its flat and mountain nodes.
+
+        :param terrain: 2 dimensional array of terrain codes
+        :param block: Number of rows and columns of a block. Must be > 0
+        :return: Tuple (**next_state**, **reward**, **terminal**) of the coarse grid
+    """
+
+    assert block > 0, "block must be > 0"
+
+    size = terrain.shape[0]
+    coarse_size = -(-size // block)
+
+    # The grid is padded to whole blocks; padding nodes are not counted
+    padded = np.full((coarse_size * block, coarse_size * block), 255, dtype=np.uint8)
+    padded[:size, :size] = terrain
+    blocks = padded.reshape(coarse_size, block, coarse_size, block).swapaxes(1, 2).reshape(coarse_size ** 2, -1)
+
+    counts = np.stack([np.count_nonzero(blocks == code, axis=1) for code in (FLAT, MOUNTAIN, GOAL, PITFALL)], axis=1)
+    passable = counts[:, FLAT] + counts[:, MOUNTAIN]
+
+    goal = counts[:, GOAL] > 0
+    pitfall = ~goal & (2 * counts[:, PITFALL] >= counts.sum(axis=1))
+    terminal = goal | pitfall
+
+    step_reward = (counts[:, FLAT] * REWARD_MATRIX[FLAT, FLAT] + counts[:, MOUNTAIN] * REWARD_MATRIX[FLAT, MOUNTAIN]) \
+        / np.maximum(passable, 1)
+    entry_reward = np.where(goal, REWARD_MATRIX[FLAT, GOAL],
+                            np.where(pitfall, REWARD_MATRIX[FLAT, PITFALL], block * step_reward))
+
+    states = np.arange(coarse_size ** 2, dtype=np.int64)
+    next_rows = (states // coarse_size)[:, None] + ACTION_DELTAS[:, 0]
+    next_cols = (states % coarse_size)[:, None] + ACTION_DELTAS[:, 1]
+    inside = (next_rows >= 0) & (next_rows < coarse_size) & (next_cols >= 0) & (next_cols < coarse_size)
+
+    next_state = np.clip(next_rows, 0, coarse_size - 1) * coarse_size + np.clip(next_cols, 0, coarse_size - 1)
+    reward = np.where(inside, entry_reward[next_state], OUT_OF_BOUNDS_REWARD)
+
+    next_state[terminal] = states[terminal, None]
+    reward[terminal] = 0.0
+
+    return next_state, reward, terminal
+
+
+def upsample(V: np.ndarray, coarse_size: int, size: int, factor: int) -> np.ndarray:
+    """
+        This method copies the value of each block to the nodes of the block, on a grid *factor* times finer.
+
+        :param V: State values of the coarse grid
+        :param coarse_size: Number of rows and columns of the coarse grid
+        :param size: Number of rows and columns of the fine grid
+        :param factor: Number of fine rows and columns of a block
+        :return: State values of the fine grid
+    """
+
+    parents = np.arange(size) // factor
+
+    return V.reshape(coarse_size, coarse_size)[parents[:, None], parents[None, :]].ravel()
+
+
+def lower_bound(next_state: np.ndarray, reward: np.ndarray, terminal: np.ndarray, discount_rate: float,
+                policy: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+        This method computes state values which are not above the optimal ones, from the rewards of following the
+        given policy. As the transitions are deterministic, the discounted rewards along all paths are summed at once
+        by pointer doubling, like *PolicyIterationAgent.evaluate*; the rest of a path is valued at the lowest value any
+        state can have, so a policy which never ends still gives a bound.
+
+        :param next_state: Next node index table *(S x A)*
+        :param reward: Reward table *(S x A)*
+        :param terminal: Terminal flag of each node index
+        :param discount_rate: Discount rate of cumulative rewards
+        :param policy: Action of each node index
+        :param tolerance: Rests of the paths discounted below the tolerance are not followed
+        :return: State values
+    """
+
+    state_size = len(policy)
+    states = np.arange(state_size)
+
+    # A path of the worst reward that ends after S moves, or never if the rewards are discounted
+    horizon = state_size if discount_rate == 1.0 else min(state_size, 1.0 / (1.0 - discount_rate))
+    floor = min(float(np.min(reward)), 0.0) * horizon
+
+    jump = next_state[states, policy]
+    total = reward[states, policy].astype(np.float64)
+    discount = discount_rate * ~terminal[jump]
+    steps = 1
+
+    while np.max(discount) >= tolerance and steps < state_size:
+        total = total + discount * total[jump]
+        discount = discount * discount[jump]
+        jump = jump[jump]
+        steps *= 2
+
+    return np.maximum(total + discount * floor, floor)
+
+
+def _scan(A: np.ndarray, B: np.ndarray, G: np.ndarray) -> np.ndarray:
+    # Solves x[c] = max(A[c], B[c] + G[c] * x[c - 1]) along a line by pointer doubling: after the step of shift s,
+    # the maps of the s nodes before each node are composed into its (A, B, G), so log2(n) vectorized steps suffice
+    shift = 1
+
+    while shift < len(A) and np.any(G[shift:]):
+        A[shift:] = np.maximum(A[shift:], B[shift:] + G[shift:] * A[:-shift])
+        B[shift:] = B[shift:] + G[shift:] * B[:-shift]
+        G[shift:] = G[shift:] * G[:-shift]
+        shift *= 2
+
+    return A
+
+
+def refine(next_state: np.ndarray, reward: np.ndarray, terminal: np.ndarray, discount_rate: float, V: np.ndarray,
+           tolerance: float, max_sweeps: int) -> (np.ndarray, int, int, bool):
+    """
+        This method runs value iteration from state values which are not above the optimal ones (see *lower_bound*)
+        with Gauss-Seidel row sweeps, top to bottom and then bottom to top. A row is backed up right after the previous
+        one, and the moves along the row are then followed to its ends in both directions (see *_scan*), so a path that
+        does not turn back vertically is solved in a single sweep, instead of one node per sweep. Only the rows next to
+        a changed value are backed up again, so with a good warm start the later sweeps only visit the terrain
+        boundaries that the warm start got wrong.
+
+        Before stopping, a full Bellman backup checks that no value changes more than the tolerance, which is the
+        stopping rule of *ValueIterationAgent*.
+
+        :param next_state: Next node index table *(S x A)* of a square grid
+        :param reward: Reward table *(S x A)*
+        :param terminal: Terminal flag of each node index
+        :param discount_rate: Discount rate of cumulative rewards
+        :param V: Initial state values, updated in place
+        :param tolerance: Convergence tolerance on the maximum value change of a backup
+        :param max_sweeps: Maximum number of row sweeps
+        :return: Tuple (**V**, **sweeps**, **backups**, **converged**), where *backups* counts the backed up node
+        indices
+    """
+
+    size = int(round(np.sqrt(len(V))))
+    continuation = discount_rate * ~terminal[next_state]
+
+    rows = V.reshape(size, size)
+    row_next_state = next_state.reshape(size, size, -1)
+    row_reward = reward.reshape(size, size, -1).astype(np.float64)
+    row_continuation = continuation.reshape(size, size, -1)
+
+    dirty = np.ones(size, dtype=bool)
+    backups = 0
+
+    V[terminal] = 0.0
+
+    for sweep in range(max_sweeps):
+        for k in (range(size) if sweep % 2 == 0 else range(size - 1, -1, -1)):
+            if not dirty[k]:
+                continue
+
+            new_V = (row_reward[k] + row_continuation[k] * V[row_next_state[k]]).max(axis=1)
+            new_V = _scan(new_V, row_reward[k, :, LEFT].copy(), row_continuation[k, :, LEFT].copy())
+            new_V = _scan(new_V[::-1].copy(), row_reward[k, ::-1, RIGHT].copy(),
+                          row_continuation[k, ::-1, RIGHT].copy())[::-1]
+
+            changed = np.any(np.abs(new_V - rows[k]) >= tolerance)
+
+            rows[k] = new_V
+            backups += size
+            dirty[k] = False
+
+            if changed:
+                dirty[max(k - 1, 0):k + 2] = True
+
+        if discount_rate < 1.0 and sweep % 2 == 1 and dirty.any():
+            # Discounted values of paths which never end only converge by a factor of the discount rate per sweep, so
+            # the values of the greedy policy are taken at once; they are still not above the optimal ones
+            policy = np.argmax(reward + continuation * V[next_state], axis=1)
+            policy_V = lower_bound(next_state, reward, terminal, discount_rate, policy, tolerance)
+            raised = np.flatnonzero(policy_V - V >= tolerance) // size
+
+            V[:] = np.maximum(V, policy_V)
+            dirty[np.clip(np.concatenate([raised - 1, raised, raised + 1]), 0, size - 1)] = True
+
+        if not dirty.any():
+            # Changes below the tolerance are not followed, so they may have added up
+            residual = np.abs((reward + continuation * V[next_state]).max(axis=1) - V)
+            unsettled = np.flatnonzero(residual >= tolerance)
+            backups += size * size
+
+            if len(unsettled) == 0:
+                return V, sweep + 1, backups, True
+
+            dirty[unsettled // size] = True
+
+    return V, max_sweeps, backups, False
+
+
+class MultigridAgent(ValueIterationAgent):
+    factor: int             #: Number of fine rows and columns of a block of the next coarser level
+    min_size: int           #: The coarsest level is the first one with no more rows than *min_size*
+    sweeps: int             #: Number of full-resolution line sweeps of the last training
+    backups: int            #: Number of full-resolution node index backups of the last training
+    level_sweeps: List[int]     #: Number of line sweeps of each level, from the coarsest to the full resolution
+
+    def __init__(self, env: Environment, seed: int, discount_rate: float, tolerance: float = 1e-6,
+                 max_sweeps: int = 100000, factor: int = 4, min_size: int = 32):
+        """
+            Initiate the Agent with hyperparameters. The agent computes the optimal Q-Table like *ValueIterationAgent*,
+            but coarse to fine: the terrain is aggregated in blocks of *factor* ** *k* nodes (see *coarsen*), the
+            coarsest grid is solved first, and the values of each level are copied to the nodes of its blocks (see
+            *upsample*) as the warm start of the next finer level. The full-resolution solve then mostly corrects the
+            values near terrain boundaries (see *refine*).
+
+            The warm start only changes where value iteration starts, so the values converge to the same fixed point
+            and the greedy policy is the optimal one.
+
+            :param env: The Environment where the Agent plays.
+            :param seed: Seed for random
+            :param discount_rate: Discount rate of cumulative rewards. Must be between 0.0 and 1.0
+            :param tolerance: Training stops when no state value changes more than the tolerance. Must be positive
+            :param max_sweeps: Maximum number of line sweeps of each level. Must be > 0
+            :param factor: Number of fine rows and columns of a block of the next coarser level. Must be > 1
+            :param min_size: Maximum number of rows of the coarsest level. Must be > 0
+        """
+        super().__init__(env, seed, discount_rate, tolerance, max_sweeps)
+
+        assert factor > 1, "factor must be > 1"
+        self.factor = factor
+
+        assert min_size > 0, "min_size must be > 0"
+        self.min_size = min_size
+
+        self.sweeps = 0
+        self.backups = 0
+        self.level_sweeps = []
+
+    def levels(self) -> List[int]:
+        """
+            :return: Block size of each coarse level, from the coarsest to the finest
+        """
+
+        blocks = []
+        size = self.env.grid_size
+
+        # Each level is *factor* times coarser than the previous one, until a level is small enough
+        while size > self.min_size:
+            blocks.append(self.factor ** (len(blocks) + 1))
+            size = -(-self.env.grid_size // blocks[-1])
+
+        return blocks[::-1]
+
+    def _warm_start(self, next_state: np.ndarray, reward: np.ndarray, terminal: np.ndarray, discount_rate: float,
+                    guess: np.ndarray) -> np.ndarray:
+        # The policy which is greedy on the upsampled values, or on the immediate rewards at the coarsest level, gives
+        # values below the optimal ones; the sweeps then only raise the values where this policy is not optimal
+        if guess is None:
+            policy = np.argmax(reward, axis=1)
+        else:
+            policy = np.argmax(reward + discount_rate * ~terminal[next_state] * guess[next_state], axis=1)
+
+        return lower_bound(next_state, reward, terminal, discount_rate, policy, self.tolerance)
+
+    def warm_start(self) -> np.ndarray:
+        """
+            This method solves the coarse levels and upsamples the values of the finest one to the full grid.
+
+            :return: Upsampled state values of the full grid, or None if the grid is not larger than *min_size*
+        """
+
+        V = None
+        size = None
+        self.level_sweeps = []
+
+        for block in self.levels():
+            next_state, reward, terminal = coarsen(self.env.terrain, block)
+            coarse_size = -(-self.env.grid_size // block)
+
+            # A coarse move stands for *block* moves, so its discount rate is compounded
+            discount_rate = self.discount_rate ** block
+            guess = None if V is None else upsample(V, size, coarse_size, self.factor)
+
+            V, sweeps, _, _ = refine(next_state, reward, terminal, discount_rate,
+                                     self._warm_start(next_state, reward, terminal, discount_rate, guess),
+                                     self.tolerance, self.max_sweeps)
+
+            self.level_sweeps.append(sweeps)
+            size = coarse_size
+
+        return None if V is None else upsample(V, size, self.env.grid_size, self.factor)
+
+    def train(self, **kwargs):
+        """
+            This method computes the optimal Q-Table coarse to fine.
+
+            :param kwargs: Empty
+            :return: Nothing
+        """
+
+        env = self.env
+        V = self._warm_start(env.next_state, env.reward, env.terminal, self.discount_rate, self.warm_start())
+
+        V, self.sweeps, self.backups, self.converged = refine(env.next_state, env.reward, env.terminal,
+                                                              self.discount_rate, V, self.tolerance, self.max_sweeps)
+
+        self.level_sweeps.append(self.sweeps)
+        self.iterations = self.sweeps
+
+        self.V = V
+        self.Q = self.q_values(V)
+
+
+def initialize(agent: RLAgent, tolerance: float = 1e-6, **kwargs) -> Union[np.ndarray, QTable]:
+    """
+        This method fills the Q-Table of a tabular agent with the optimal Q-Table of its environment and discount rate,
+        computed by *MultigridAgent*, e.g. to fine-tune a learner or to compare it with the optimum.
+
+        :param agent: Agent with a Q-Table, updated in place
+        :param tolerance: Convergence tolerance of the solve
+        :param kwargs: Further parameters of *MultigridAgent*, e.g. factor, min_size
+        :return: Q-Table of the agent
+    """
+
+    solver = MultigridAgent(agent.env, 0, agent.discount_rate, tolerance, **kwargs)
+    solver.train()
+
+    agent.Q[:] = solver.Q
+
+    return agent.Q
@@ -0,0 +1,130 @@
+from typing import List, Optional
+
+import numpy as np
+
+from Environment import Environment
+
+
+def default_max_steps(env: Environment) -> int:
+    """
+        This method provides the step cap of a rollout, which scales with the grid. A greedy policy visits every node
+        at most once before it reaches a terminal node or repeats itself, so the cap never truncates a route. A policy
+        which repeats itself is walked until the cap, see *cycle_return*.
+
+        :param env: Environment
+        :return: Number of nodes of the grid
+    """
+
+    return env.grid_size * env.grid_size
+
+
+def cycle_return(totals: List[int], start: int, max_steps: int) -> int:
+    """
+        This method computes the total reward of *max_steps* steps of a deterministic policy which returns to a visited
+        node. The walk from the first visit of that node repeats forever, so its reward is extrapolated instead of
+        walked until the cap.
+
+        :param totals: Total reward after each step of the walk, from 0 before the first step until the return to the
+        visited node
+        :param start: Step of the first visit of the node
+        :param max_steps: Maximum number of steps of the walk, at least the number of steps in *totals*
+        :return: Total reward of the first *max_steps* steps
+    """
+
+    now = len(totals) - 1
+    laps, rest = divmod(max_steps - now, now - start)
+
+    return totals[now] + laps * (totals[now] - totals[start]) + totals[start + rest] - totals[start]
+
+
+def rollouts(env: Environment, policy: np.ndarray, starts: Optional[np.ndarray] = None,
+             max_steps: Optional[int] = None) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+        This method follows a deterministic policy from many starting node indices at once. Each vectorized step moves
+        all unfinished rollouts by one node through the compiled transition tables. A rollout ends when it reaches a
+        terminal node or after *max_steps* steps, and a rollout which enters a cycle returns the reward of the whole
+        capped walk, as *RLAgent.validate*.
+
+        Cycles are detected with Brent's method: every rollout remembers the node it visited at the last power-of-two
+        step, and it is in a cycle once it returns to that node. Its remaining laps are then extrapolated and only the
+        last partial lap is walked (see *cycle_return*), so a rollout which loops ends after at most twice the length of
+        its path into the cycle plus twice the cycle length, instead of running until the cap.
+
+        :param env: Environment
+        :param policy: Action of each node index, e.g. *RLAgent.greedy_policy*
+        :param starts: Starting node indices, all nodes by default
+        :param max_steps: Maximum number of steps of a rollout, see *default_max_steps*
+        :return: Total reward, number of steps (*max_steps* in a cycle) and whether a goal or pitfall is reached, for
+        each starting node index
+    """
+
+    state_size = env.grid_size * env.grid_size
+    nodes = np.arange(state_size)
+
+    if starts is None:
+        starts = nodes
+
+    if max_steps is None:
+        max_steps = default_max_steps(env)
+
+    starts = np.asarray(starts, dtype=np.int64)
+    policy = np.asarray(policy)
+
+    next_states = env.next_state[nodes, policy]
+    rewards = env.reward[nodes, policy]
+    terminal = env.terminal
+
+    returns = np.zeros(len(starts), dtype=np.int64)
+    lengths = np.zeros(len(starts), dtype=np.int64)
+    reached = terminal[starts].copy()
+
+    # Only the unfinished rollouts are moved; lanes holds their positions in the result arrays
+    lanes = np.flatnonzero(~reached)
+    states = starts[lanes].astype(np.int32)
+    anchors = states.copy()
+    totals = np.zeros(len(lanes), dtype=np.int64)
+    anchor_totals = totals.copy()
+    anchor_step = 0
+    power = 1
+    step = 0
+
+    while len(lanes) > 0 and step < max_steps:
+        totals += rewards[states]
+        states = next_states[states]
+        step += 1
+
+        done = terminal[states]
+        cycle = (states == anchors) & ~done
+        running = ~(done | cycle)
+
+        if step == max_steps:
+            running[:] = False
+
+        if np.any(cycle) and step < max_steps:
+            # The walk since the anchor repeats until the cap: whole laps are added, the last partial one is walked
+            laps, rest = divmod(max_steps - step, step - anchor_step)
+            totals[cycle] += laps * (totals[cycle] - anchor_totals[cycle])
+            tails = np.flatnonzero(cycle)
+            tail_states = states[tails]
+
+            for _ in range(rest):
+                totals[tails] += rewards[tail_states]
+                tail_states = next_states[tail_states]
+
+        if not np.all(running):
+            finished = ~running
+
+            returns[lanes[finished]] = totals[finished]
+            lengths[lanes[finished]] = np.where(cycle[finished], max_steps, step)
+            reached[lanes[finished]] = done[finished]
+
+            lanes, states, anchors, totals = lanes[running], states[running], anchors[running], totals[running]
+            anchor_totals = anchor_totals[running]
+
+        if step == power:
+            anchors = states.copy()
+            anchor_totals = totals.copy()
+            anchor_step = step
+            power *= 2
+
+    return returns, lengths, reached
@@ -0,0 +1,86 @@
+from Environment import Environment
+from rl_agents.ValueIteration import ValueIterationAgent
+import numpy as np
+
+
+class PolicyIterationAgent(ValueIterationAgent):
+    policy: np.ndarray      #: Greedy action of each state
+
+    def __init__(self, env: Environment, seed: int, discount_rate: float, tolerance: float = 1e-6,
+                 max_sweeps: int = 1000):
+        """
+            Initiate the Agent with hyperparameters.
+
+            :param env: The Environment where the Agent plays.
+            :param seed: Seed for random
+            :param discount_rate: Discount rate of cumulative rewards. Must be between 0.0 and 1.0
+            :param tolerance: Rewards discounted below the tolerance are ignored in policy evaluation. Must be positive
+            :param max_sweeps: Maximum number of policy improvement steps. Must be > 0
+        """
+        super().__init__(env, seed, discount_rate, tolerance, max_sweeps)
+
+        self.policy = np.zeros(self.state_size, dtype=np.int64)
+
+    def evaluate(self, policy: np.ndarray) -> np.ndarray:
+        """
+            This method computes the state values of a deterministic policy. As the transitions are deterministic,
+            each state follows a single path; the discounted rewards along all paths are summed at once by pointer
+            doubling, which takes O(log S) vectorized steps instead of one sweep per path node.
+
+            When the discount rate is 1.0, states whose path never ends have a value of minus infinity.
+
+            :param policy: Action of each state
+            :return: State values as Numpy Array
+        """
+
+        states = np.arange(self.state_size)
+
+        jump = self.env.next_state[states, policy].astype(np.int64)
+        total = self.env.reward[states, policy].astype(np.float64)
+        discount = self._continuation[states, policy]
+        steps = 1
+
+        # After the loop, total holds the rewards of the first *steps* moves and discount the weight of the rest
+        while np.max(discount) >= self.tolerance and (steps < self.state_size or self.discount_rate < 1.0):
+            total = total + discount * total[jump]
+            discount = discount * discount[jump]
+            jump = jump[jump]
+            steps *= 2
+
+        if self.discount_rate == 1.0:
+            total[discount > 0.0] = -np.inf
+
+        return total
+
+    def train(self, **kwargs):
+        """
+            This method computes the optimal Q-Table with policy iteration. It starts from the policy which is greedy
+            on the immediate rewards.
+
+            :param kwargs: Empty
+            :return: Nothing
+        """
+
+        states = np.arange(self.state_size)
+        policy = np.argmax(self.env.reward, axis=1)
+        self.converged = False
+
+        for iteration in range(self.max_sweeps):
+            V = self.evaluate(policy)
+            Q = self.q_values(V)
+
+            # Keep the current action on ties, so that the policy cannot oscillate
+            improved = Q.max(axis=1) > Q[states, policy] + self.tolerance
+            new_policy = np.where(improved, np.argmax(Q, axis=1), policy)
+
+            self.iterations = iteration + 1
+
+            if np.array_equal(new_policy, policy):
+                self.converged = True
+                break
+
+            policy = new_policy
+
+        self.policy = policy
+        self.V = self.evaluate(policy)
+        self.Q = self.q_values(self.V)
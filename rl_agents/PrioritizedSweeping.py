@@ -0,0 +1,107 @@
+from typing import Dict, List, Optional, Tuple, Union
+from Environment import Environment
+from rl_agents.QLearning import QLearningAgent
+from rl_agents.Checkpoint import Checkpointer
+from rl_agents.Convergence import ConvergenceCriterion
+from rl_agents.EpsilonSchedule import EpsilonSchedule
+from rl_agents.Hooks import TrainingHook
+from rl_agents.QStorage import QTable
+from rl_agents.Model import TransitionModel, PriorityQueue
+import numpy as np
+
+
+class PrioritizedSweepingAgent(QLearningAgent):
+    planning_steps: int     #: Maximum number of updates taken from the priority queue per real step
+    priority_threshold: float   #: Minimum absolute TD error of a queued state-action pair
+    model: TransitionModel  #: Learned model of the observed transitions
+    train_batch = None      #: No batched training, since the learned model follows the real steps of one agent
+
+    def __init__(self, env: Environment, seed: int, discount_rate: float, epsilon: float, epsilon_decay: float,
+                 epsilon_min: float, alpha: float, max_episode: int, planning_steps: int = 10,
+                 priority_threshold: float = 1e-4, checkpointer: Checkpointer = None,
+                 convergence: ConvergenceCriterion = None, epsilon_schedule: EpsilonSchedule = None,
+                 hooks: List[TrainingHook] = None, q_storage: Union[str, np.ndarray, QTable] = "float32",
+                 heuristic_init: bool = False, shaping: bool = False, q_storage_options: Dict = None):
+        """
+            Initiate the Prioritized Sweeping Agent. Every real transition is recorded in the learned model and queued
+            by its absolute TD error. After each real step, up to *planning_steps* pairs with the highest priority are
+            updated; each update queues the observed predecessors of the pair whose TD error has changed, so value
+            changes travel backward from the goal. The other parameters are the same as in *QLearningAgent*; the
+            episodes always run in Python, since the compiled kernels have no model.
+
+            :param planning_steps: Maximum number of updates per real step. Must be > 0
+            :param priority_threshold: Minimum absolute TD error to queue a pair. Must be positive or zero
+        """
+        super().__init__(env, seed, discount_rate, epsilon, epsilon_decay, epsilon_min, alpha, max_episode,
+                         checkpointer, convergence, epsilon_schedule, hooks, q_storage=q_storage,
+                         heuristic_init=heuristic_init, shaping=shaping, q_storage_options=q_storage_options)
+
+        assert planning_steps > 0, "planning_steps must be > 0"
+        self.planning_steps = planning_steps
+
+        assert priority_threshold >= 0.0, "priority_threshold must be >= 0"
+        self.priority_threshold = priority_threshold
+
+        self.model = TransitionModel(self.state_size, self.action_size)
+        self._queue = PriorityQueue()
+
+    def _td_error(self, state: int, action: int) -> float:
+        # Python scalars are much cheaper than NumPy scalars for a single transition
+        next_state = self.model.next_state.item(state, action)
+        next_max = 0.0 if self.model.done.item(state, action) else max(self.Q[next_state].tolist())
+
+        error = self.model.reward.item(state, action) + self.discount_rate * next_max - self.Q.item(state, action)
+
+        if self.potential is not None:
+            error += self.discount_rate * self.potential.item(next_state) - self.potential.item(state)
+
+        return error
+
+    def _sweep(self) -> float:
+        """
+            This method updates the queued pairs with the highest priority, at most *planning_steps* of them.
+
+            :return: Maximum absolute change of a Q value
+        """
+
+        max_delta = 0.0
+
+        for _ in range(min(self.planning_steps, len(self._queue))):
+            key, _ = self._queue.pop()
+            state, action = divmod(key, self.action_size)
+
+            delta = self.alpha * self._td_error(state, action)
+            self.Q[state, action] += delta
+            max_delta = max(max_delta, abs(delta))
+
+            for predecessor in self.model.predecessors(state):
+                priority = abs(self._td_error(*divmod(predecessor, self.action_size)))
+
+                if priority > self.priority_threshold:
+                    self._queue.push(predecessor, priority)
+
+        return max_delta
+
+    def train(self, **kwargs):
+        """
+            This method fills the Q-Table with Prioritized Sweeping.
+
+            :param kwargs: **resume** *(bool)*: Continue from the last snapshot of the checkpointer
+            :return: Nothing
+        """
+
+        self._queue.clear()
+        self._run_training(kwargs.get("resume", False))
+
+    def _step(self, state: int, action: Optional[int]) -> Tuple[int, int, int, bool, Optional[int], float]:
+        action = self.act(state, is_training=True)
+        next_state, reward, done = self.env.step(state, action)
+
+        self.model.observe(state, action, next_state, reward, done)
+
+        priority = abs(self._td_error(state, action))
+
+        if priority > self.priority_threshold:
+            self._queue.push(state * self.action_size + action, priority)
+
+        return action, next_state, reward, done, None, self._sweep()
@@ -0,0 +1,81 @@
+from typing import Dict, List, Optional, Tuple, Union
+from Environment import Environment
+from rl_agents.QLearning import QLearningAgent
+from rl_agents.Checkpoint import Checkpointer
+from rl_agents.Convergence import ConvergenceCriterion
+from rl_agents.EpsilonSchedule import EpsilonSchedule
+from rl_agents.Hooks import TrainingHook
+from rl_agents.QStorage import QTable
+from rl_agents.Traces import SparseTraces
+import numpy as np
+
+
+class QLambdaAgent(QLearningAgent):
+    trace_decay: float      #: Lambda, decay of the eligibility traces in addition to the discount rate
+    trace_cutoff: float     #: Traces below the cutoff are dropped
+    replacing_traces: bool  #: Use replacing traces instead of accumulating traces
+    train_batch = None      #: No batched training, since the eligibility traces follow a single episode
+
+    def __init__(self, env: Environment, seed: int, discount_rate: float, epsilon: float, epsilon_decay: float,
+                 epsilon_min: float, alpha: float, max_episode: int, trace_decay: float = 0.9,
+                 trace_cutoff: float = 1e-3, replacing_traces: bool = True, checkpointer: Checkpointer = None,
+                 convergence: ConvergenceCriterion = None, epsilon_schedule: EpsilonSchedule = None,
+                 hooks: List[TrainingHook] = None, q_storage: Union[str, np.ndarray, QTable] = "float32",
+                 heuristic_init: bool = False, shaping: bool = False, q_storage_options: Dict = None):
+        """
+            Initiate the Watkins's Q(lambda) Agent. Every TD error also updates the state-action pairs visited since the
+            last exploratory action, weighted by their eligibility traces; an exploratory action cuts the traces, since
+            the later rewards no longer follow the greedy policy. The other parameters are the same as in
+            *QLearningAgent*; the episodes always run in Python, since the compiled kernels have no traces.
+
+            :param trace_decay: Lambda. Must be in range [0.0, 1.0], 0.0 is one-step Q-Learning
+            :param trace_cutoff: Traces below the cutoff are dropped. Must be in range (0.0, 1.0]
+            :param replacing_traces: Reset the trace of a revisited pair to 1 instead of adding 1
+        """
+        super().__init__(env, seed, discount_rate, epsilon, epsilon_decay, epsilon_min, alpha, max_episode,
+                         checkpointer, convergence, epsilon_schedule, hooks, q_storage=q_storage,
+                         heuristic_init=heuristic_init, shaping=shaping, q_storage_options=q_storage_options)
+
+        assert 0.0 <= trace_decay <= 1.0, "trace_decay must be in range [0.0, 1.0]"
+        self.trace_decay = trace_decay
+
+        self.trace_cutoff = trace_cutoff
+        self.replacing_traces = replacing_traces
+
+    def train(self, **kwargs):
+        """
+            This method fills the Q-Table with Watkins's Q(lambda), using sparse eligibility traces.
+
+            :param kwargs: **resume** *(bool)*: Continue from the last snapshot of the checkpointer
+            :return: Nothing
+        """
+
+        self._traces = SparseTraces(self.discount_rate * self.trace_decay, self.trace_cutoff, self.replacing_traces)
+        self._run_training(kwargs.get("resume", False))
+
+    def _start_episode(self, state: int) -> Optional[int]:
+        self._traces.clear()
+
+        return self.act(state, is_training=True)
+
+    def _step(self, state: int, action: Optional[int]) -> Tuple[int, int, int, bool, Optional[int], float]:
+        next_state, reward, done = self.env.step(state, action)
+        next_action = self.act(next_state, is_training=True)
+
+        # The next action is greedy if it ties with the maximum, then the traces are kept
+        next_max = np.max(self.Q[next_state])
+        greedy = self.Q[next_state, next_action] == next_max
+
+        # Terminal node indices are bootstrapped with 0, like in *QLearningAgent*
+        td_error = reward + (0.0 if done else self.discount_rate * next_max) - self.Q[state, action]
+
+        if self.potential is not None:
+            td_error += self.discount_rate * self.potential[next_state] - self.potential[state]
+
+        self._traces.visit(state * self.action_size + action)
+        max_delta = self._traces.update(self.Q, self.alpha * td_error)
+
+        if not greedy:
+            self._traces.clear()
+
+        return action, next_state, reward, done, next_action, max_delta
@@ -0,0 +1,348 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+STORAGES = ["float32", "float16", "int16", "sparse"]
+"""
+    Names of the Q-Table storages, see *make_q_table*
+"""
+
+
+class QTable(ABC):
+    """
+        Q-Table storage which replaces the dense *float32* array of an agent. It supports the array operations of the
+        agents: ``Q[state]`` and ``Q[states]`` give *float32* rows, ``Q[state, action]`` and ``Q[states, actions]`` give
+        and take values, ``Q.item(state, action)`` gives a Python float, ``np.argmax(Q, axis=1)`` gives the greedy
+        policy and ``np.array(Q)`` gives a dense *float32* copy, e.g. for a checkpoint. ``Q[:] = dense`` loads a dense
+        Q-Table.
+    """
+
+    shape: tuple            #: Number of node indices and actions, as of the dense Q-Table
+    dtype = np.dtype(np.float32)    #: Type of the values given by the storage
+
+    def __init__(self, state_size: int, action_size: int):
+        self.shape = (state_size, action_size)
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """
+            Implement this method, Not Call!
+
+            :return: Memory of the stored values and their index in bytes
+        """
+
+        ...
+
+    @abstractmethod
+    def __getitem__(self, key) -> Union[np.ndarray, np.float32]:
+        ...
+
+    @abstractmethod
+    def __setitem__(self, key, value):
+        ...
+
+    @abstractmethod
+    def add_flat(self, keys: np.ndarray, values: np.ndarray):
+        """
+            Implement this method, Not Call!
+
+            :param keys: Unique flat indices (state * action size + action) of state-action pairs
+            :param values: Added value of each pair
+            :return: Nothing
+        """
+
+        ...
+
+    @abstractmethod
+    def argmax(self, axis: int = 1, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+            Implement this method, Not Call!
+
+            :param axis: Only 1, the greedy action of each node index
+            :param out: Not supported
+            :return: Greedy action of each node index
+        """
+
+        ...
+
+    @abstractmethod
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        ...
+
+    def item(self, state: int, action: int) -> float:
+        return float(self[state, action])
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"{type(self).__name__}(shape={self.shape}, nbytes={self.nbytes})"
+
+
+class QuantizedQTable(QTable):
+    data: np.ndarray        #: Stored values
+    scale: float            #: Q value of one unit of an integer storage
+
+    def __init__(self, state_size: int, action_size: int, dtype=np.float16, scale: float = 1.0 / 128):
+        """
+            Dense Q-Table in a narrow type: *float16* halves the memory of *float32*, and *int16* stores the Q values as
+            multiples of *scale*, rounded to the nearest one and clipped to the range of the type. The values are
+            computed in *float32* and only rounded when they are stored, so a change smaller than half the
+            resolution of a value is lost.
+
+            :param state_size: Number of node indices
+            :param action_size: Number of actions
+            :param dtype: *np.float16* or *np.int16*
+            :param scale: Resolution of an integer storage, which covers Q values in ``[-32768, 32767] * scale``. Not
+            used for *float16*. Must be > 0
+        """
+        super().__init__(state_size, action_size)
+
+        self.data = np.zeros(self.shape, dtype=dtype)
+
+        assert scale > 0.0, "scale must be > 0"
+        self.scale = scale if np.issubdtype(self.data.dtype, np.integer) else 1.0
+
+        if np.issubdtype(self.data.dtype, np.integer):
+            info = np.iinfo(self.data.dtype)
+            self._limits = (info.min, info.max)
+        else:
+            self._limits = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def _decode(self, values) -> Union[np.ndarray, np.float32]:
+        if self._limits is None:
+            return values.astype(np.float32)
+
+        return values.astype(np.float32) * np.float32(self.scale)
+
+    def _encode(self, values) -> np.ndarray:
+        if self._limits is None:
+            return np.asarray(values, dtype=self.data.dtype)
+
+        units = np.rint(np.asarray(values, dtype=np.float64) / self.scale)
+
+        return np.clip(units, *self._limits).astype(self.data.dtype)
+
+    def __getitem__(self, key) -> Union[np.ndarray, np.float32]:
+        return self._decode(self.data[key])
+
+    def __setitem__(self, key, value):
+        if self._limits is None:
+            self.data[key] = value
+        elif np.ndim(value) == 0:
+            # A single value is rounded in Python, which is much cheaper than a call into Numpy
+            self.data[key] = min(max(round(float(value) / self.scale), self._limits[0]), self._limits[1])
+        else:
+            self.data[key] = self._encode(value)
+
+    def add_flat(self, keys: np.ndarray, values: np.ndarray):
+        flat = self.data.reshape(-1)
+        flat[keys] = self._encode(self._decode(flat[keys]) + values)
+
+    def argmax(self, axis: int = 1, out: Optional[np.ndarray] = None) -> np.ndarray:
+        assert axis == 1 and out is None, "Only the greedy action of each node index is supported"
+
+        # The encoding keeps the order of the values, so the stored values give the same greedy actions
+        return self.data.argmax(axis=1)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return np.asarray(self[:], dtype=dtype)
+
+
+class SparseQTable(QTable):
+    initial: float          #: Q value of the state-action pairs of never updated node indices
+    terminal: Optional[np.ndarray]  #: Terminal flag of each node index, whose never updated Q values are 0
+
+    def __init__(self, state_size: int, action_size: int, initial: float = 0.0, terminal: np.ndarray = None):
+        """
+            Hash-backed Q-Table which only stores the rows of the node indices that have been updated. A dictionary
+            maps each stored node index to a row of a growing *float32* array; every other node index reads a shared
+            default row. An optimistic *initial* value makes the greedy policy try the unvisited node indices first.
+
+            :param state_size: Number of node indices
+            :param action_size: Number of actions
+            :param initial: Q value of the never updated node indices
+            :param terminal: Terminal flag of each node index, e.g. *Environment.terminal*. Terminal node indices read
+            0, so that the optimistic value does not leak into the targets of the final steps. None by default
+        """
+        super().__init__(state_size, action_size)
+
+        self.initial = initial
+        self.terminal = terminal
+
+        # Row 0 is the default row and row 1 is the row of the terminal node indices, they are never written
+        self._index: Dict[int, int] = {}
+        self._values = np.zeros((64, action_size), dtype=np.float32)
+        self._values[0] = initial
+        self._size = 2
+
+    @property
+    def nbytes(self) -> int:
+        # A dictionary entry costs its hash table slot and two integer objects
+        return self._values[:self._size].nbytes + len(self._index) * 104
+
+    def __contains__(self, state: int) -> bool:
+        return state in self._index
+
+    def stored(self) -> int:
+        """
+            :return: Number of stored node indices
+        """
+
+        return len(self._index)
+
+    def _default(self, state: int) -> int:
+        return 1 if self.terminal is not None and self.terminal.item(state) else 0
+
+    def _row(self, state: int) -> int:
+        row = self._index.get(state)
+
+        return self._default(state) if row is None else row
+
+    def _rows(self, states: np.ndarray) -> np.ndarray:
+        return np.array([self._row(state) for state in np.asarray(states).tolist()], dtype=np.int64)
+
+    def _insert(self, state: int) -> int:
+        row = self._index.get(state)
+
+        if row is None:
+            if self._size == len(self._values):
+                self._values = np.resize(self._values, (2 * self._size, self.shape[1]))
+
+            row = self._size
+            self._values[row] = self._values[self._default(state)]
+            self._index[state] = row
+            self._size += 1
+
+        return row
+
+    def __getitem__(self, key) -> Union[np.ndarray, np.float32]:
+        if isinstance(key, tuple):
+            states, actions = key
+
+            if np.ndim(states) == 0:
+                return self._values[self._row(int(states)), actions]
+
+            return self._values[self._rows(states), actions]
+
+        if np.ndim(key) == 0 and not isinstance(key, slice):
+            row = self._row(int(key))
+            values = self._values[row]
+
+            # A default row is shared by all never updated node indices, so its view is read-only
+            if row < 2:
+                values.flags.writeable = False
+
+            return values
+
+        return self._values[self._rows(np.arange(self.shape[0])[key])]
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice) and key == slice(None):
+            self._load(np.broadcast_to(np.asarray(value, dtype=np.float32), self.shape))
+
+            return
+
+        states, actions = key
+
+        # The rows are inserted first, since an insertion can replace the value array
+        if np.ndim(states) == 0:
+            row = self._insert(int(states))
+            self._values[row, actions] = value
+        else:
+            rows = [self._insert(state) for state in np.asarray(states).tolist()]
+            self._values[rows, actions] = value
+
+    def _load(self, dense: np.ndarray):
+        self._index.clear()
+        self._size = 2
+
+        # Only the rows which differ from their default row are stored
+        defaults = np.where(self.terminal[:, None], 0.0, self.initial) if self.terminal is not None else self.initial
+        changed = np.flatnonzero(np.any(dense != defaults, axis=1))
+
+        for state in changed.tolist():
+            row = self._insert(state)
+            self._values[row] = dense[state]
+
+    def add_flat(self, keys: np.ndarray, values: np.ndarray):
+        states, actions = np.divmod(keys, self.shape[1])
+        rows = [self._insert(state) for state in states.tolist()]
+
+        self._values[rows, actions] += values
+
+    def argmax(self, axis: int = 1, out: Optional[np.ndarray] = None) -> np.ndarray:
+        assert axis == 1 and out is None, "Only the greedy action of each node index is supported"
+
+        # Actions fit in int8, which keeps the policy of a huge grid small
+        policy = np.zeros(self.shape[0], dtype=np.int8)
+        states = np.fromiter(self._index.keys(), dtype=np.int64, count=len(self._index))
+        rows = np.fromiter(self._index.values(), dtype=np.int64, count=len(self._index))
+
+        policy[states] = np.argmax(self._values[rows], axis=1)
+
+        return policy
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        dense = np.full(self.shape, self.initial, dtype=np.float32)
+
+        if self.terminal is not None:
+            dense[self.terminal] = 0.0
+
+        states = np.fromiter(self._index.keys(), dtype=np.int64, count=len(self._index))
+        dense[states] = self._values[np.fromiter(self._index.values(), dtype=np.int64, count=len(self._index))]
+
+        return dense if dtype is None else dense.astype(dtype)
+
+
+def make_q_table(storage: Union[str, np.ndarray, QTable], state_size: int, action_size: int,
+                 terminal: np.ndarray = None, **kwargs) -> Union[np.ndarray, QTable]:
+    """
+        This method creates an empty Q-Table in the given storage.
+
+        :param storage: One of *STORAGES*. "float32" is a plain Numpy array, which every backend and helper supports.
+        A ready Q-Table of the right shape is returned as it is
+        :param state_size: Number of node indices
+        :param action_size: Number of actions
+        :param terminal: Terminal flag of each node index, for the sparse storage
+        :param kwargs: **scale** for "int16", **initial** for "sparse"
+        :return: Q-Table
+    """
+
+    if isinstance(storage, (np.ndarray, QTable)):
+        assert storage.shape == (state_size, action_size), "Q-Table shape must be (state size, action size)"
+        assert not kwargs, "Storage options only apply to a storage name"
+
+        return storage
+
+    assert storage in STORAGES, f"Unknown Q-Table storage: {storage}"
+
+    if storage == "float32":
+        return np.zeros((state_size, action_size), dtype=np.float32)
+
+    if storage == "sparse":
+        return SparseQTable(state_size, action_size, terminal=terminal, **kwargs)
+
+    return QuantizedQTable(state_size, action_size, dtype=np.dtype(storage).type, **kwargs)
+
+
+def add_flat(Q: Union[np.ndarray, QTable], keys: np.ndarray, values: np.ndarray):
+    """
+        This method adds values to the given state-action pairs of any Q-Table storage.
+
+        :param Q: Q-Table, updated in place
+        :param keys: Unique flat indices (state * action size + action) of state-action pairs
+        :param values: Added value of each pair
+        :return: Nothing
+    """
+
+    if isinstance(Q, np.ndarray):
+        Q.reshape(-1)[keys] += values
+    else:
+        Q.add_flat(keys, values)
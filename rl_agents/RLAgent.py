@@ -1,7 +1,16 @@
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 from Environment import Environment
+from rl_agents.Hooks import HookList
+from rl_agents.Policy import cycle_return, default_max_steps, rollouts
 from abc import ABC, abstractmethod
 import random
+import time
+import numpy as np
+
+RANDOM_BLOCK_SIZE = 4096
+"""
+    Number of random values drawn at once by *RLAgent.explore*
+"""
 
 
 class RLAgent(ABC):
@@ -10,6 +19,13 @@ class RLAgent(ABC):
     discount_rate: float    #: Discount rate
     env: Environment        #: Grid-World environment
     rnd: random.Random      #: Random object
+    rng: np.random.Generator    #: Numpy random generator, which drives the exploration of the agent
+
+    train_batch: Optional[Callable] = None
+    """
+        Batched training on the lanes of a VecEnvironment, see *QLearningAgent.train_batch*. None for agents without
+        batched training, which callers check before using it, like *__hash__* = None
+    """
 
     def __init__(self, env: Environment, discount_rate: float, seed: int, action_size: int = 4):
         """
@@ -17,6 +33,7 @@ class RLAgent(ABC):
 
             :param env: The Environment where the Agent plays.
             :param discount_rate: Discount rate of cumulative rewards. Must be between 0.0 and 1.0
+            :param seed: Seed for random
             :param action_size: Number of possible actions
         """
         self.env = env
@@ -29,6 +46,241 @@ class RLAgent(ABC):
         self.discount_rate = discount_rate
 
         self.rnd = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+
+        self._refill_random()
+
+    def _refill_random(self):
+        """
+            This method draws the next block of exploration values from *rng*. They are kept as lists, since indexing
+            a list is much cheaper than a call into Numpy for every step.
+
+            :return: Nothing
+        """
+
+        # The generator state before the draw recreates the block when a run is resumed, see *_training_state*
+        self._block_state = self.rng.bit_generator.state
+
+        self._uniform_block = self.rng.random(RANDOM_BLOCK_SIZE)
+        self._action_block = self.rng.integers(0, self.action_size, RANDOM_BLOCK_SIZE)
+
+        # The arrays are kept for the compiled kernels, see *rl_agents.Compiled*
+        self._uniforms = self._uniform_block.tolist()
+        self._random_actions = self._action_block.tolist()
+        self._random_index = 0
+
+    def explore(self, epsilon: float) -> Optional[int]:
+        """
+            This method decides whether the agent explores in the epsilon-greedy approach. Each call consumes one
+            pre-drawn uniform value and one pre-drawn random action, so the decisions only depend on the seed.
+
+            :param epsilon: Probability of taking a random action
+            :return: Random action with probability epsilon, otherwise None
+        """
+
+        if self._random_index == RANDOM_BLOCK_SIZE:
+            self._refill_random()
+
+        i = self._random_index
+        self._random_index = i + 1
+
+        if self._uniforms[i] < epsilon:
+            return self._random_actions[i]
+
+        return None
+
+    def _training_state(self, steps: int) -> Dict:
+        """
+            This method captures the state of a training run which is not in the Q-Table: the random generator, the
+            position in the pre-drawn block and the number of steps. It is saved with the snapshots of the
+            checkpointer, so that a resumed run draws the same random values as an uninterrupted one.
+
+            :param steps: Number of steps taken in the training
+            :return: JSON-serializable state
+        """
+
+        return {"steps": steps, "rng": self.rng.bit_generator.state, "block_rng": self._block_state,
+                "random_index": self._random_index}
+
+    def _restore_training_state(self, state: Dict) -> int:
+        """
+            This method restores a state captured by *_training_state*.
+
+            :param state: Training state
+            :return: Number of steps taken in the training
+        """
+
+        self.rng.bit_generator.state = state["block_rng"]
+        self._refill_random()
+        self._random_index = state["random_index"]
+        self.rng.bit_generator.state = state["rng"]
+
+        return state["steps"]
+
+    def _start_record(self, episode: int, steps: int) -> Dict:
+        """
+            This method starts the per-episode record for the training hooks, see *rl_agents.Hooks.EPISODE_DTYPE*.
+
+            :param episode: Number of the episode, starting at 1
+            :param steps: Number of steps taken in the training before the episode
+            :return: Partial record
+        """
+
+        return {"episode": episode, "steps": steps, "epsilon": float(self.epsilon), "start_ns": time.perf_counter_ns()}
+
+    def _end_record(self, record: Dict, steps: int, total_reward: int, max_delta: float, state: int) -> Dict:
+        """
+            This method completes the per-episode record started by *_start_record*.
+
+            :param record: Partial record
+            :param steps: Number of steps taken in the training after the episode
+            :param total_reward: Total reward of the episode
+            :param max_delta: Maximum absolute change of a Q value in the episode
+            :param state: Last node index of the episode
+            :return: Record with the fields of *rl_agents.Hooks.EPISODE_DTYPE*
+        """
+
+        return {
+            "episode": record["episode"],
+            "steps": steps - record["steps"],
+            "return": total_reward,
+            "epsilon": record["epsilon"],
+            "max_delta": float(max_delta),
+            "wall_time_ms": (time.perf_counter_ns() - record["start_ns"]) * 1e-6,
+            "terminal": self.env.get_node_type(self.env.to_position(state)),
+        }
+
+    def _start_episode(self, state: int) -> Optional[int]:
+        """
+            This method prepares an episode of *_run_training*. Agents which decide the action of a step before the
+            update of the previous one, like SARSA, decide the first action here.
+
+            :param state: Starting node index
+            :return: First action, or None if *_step* decides the actions
+        """
+
+        return None
+
+    def _step(self, state: int, action: Optional[int]) -> Tuple[int, int, int, bool, Optional[int], float]:
+        """
+            This method plays one step of *_run_training* and makes its updates. Agents which train with
+            *_run_training* implement it.
+
+            :param state: Current node index
+            :param action: Action decided for the step, see *_start_episode*, or None
+            :return: Taken action, next node index, reward, whether the episode is done, action decided for the next
+            step or None, and the maximum absolute change of a Q value
+        """
+
+        raise NotImplementedError(f"{type(self).__name__} does not train step by step")
+
+    def _compiled_episode(self, hooks: HookList) -> Optional[Callable]:
+        """
+            This method selects a compiled kernel which plays whole episodes of *_run_training* instead of *_step*, see
+            *rl_agents.Compiled*.
+
+            :param hooks: Training hooks of the run
+            :return: Episode function of *rl_agents.Compiled*, or None to play the episodes step by step
+        """
+
+        return None
+
+    def _run_training(self, resume: bool = False):
+        """
+            This method runs the training episodes of the tabular agents, which only implement their update of a step,
+            see *_start_episode* and *_step*. It drives the epsilon schedule, the checkpointer, the convergence
+            criterion and the training hooks of the agent. A resumed run restores the random state of the snapshot;
+            further learned state, like the model of Dyna-Q or the convergence criterion, starts empty.
+
+            :param resume: Continue from the last snapshot of the checkpointer
+            :return: Nothing
+        """
+
+        self.rewards = []
+        start_episode = 0
+        steps = 0
+
+        if self.checkpointer is not None:
+            start_episode = self.checkpointer.begin(self.Q, resume)
+            state = self.checkpointer.training_state(start_episode) if start_episode > 0 else None
+
+            if state is not None:
+                steps = self._restore_training_state(state)
+
+                if self.epsilon_schedule.per_step:
+                    self.epsilon = self.epsilon_schedule.value(steps)
+
+        hooks = HookList(self.hooks)
+        hooks.on_train_start(self, start_episode)
+
+        # The sampled on_step check is a single comparison, which never matches when no hook needs it
+        next_hook_step = hooks.step_interval if hooks.step_interval > 0 else -1
+
+        self.converged = False
+
+        if self.convergence is not None:
+            self.convergence.reset()
+
+        per_step = self.epsilon_schedule.per_step
+
+        compiled_episode = self._compiled_episode(hooks)
+        step = self._step
+
+        for episode in range(start_episode, self.max_episode):
+            if not per_step:
+                self.epsilon = self.epsilon_schedule.value(episode)
+
+            if hooks:
+                hooks.on_episode_start(self, episode + 1)
+                record = self._start_record(episode + 1, steps)
+
+            total_reward = 0
+            max_delta = 0.0
+            state = self.env.reset()
+            done = False
+            action = None
+
+            if compiled_episode is not None:
+                state, total_reward, max_delta, episode_steps = compiled_episode(self, state)
+                steps += episode_steps
+                done = True
+            else:
+                action = self._start_episode(state)
+
+            while not done:
+                action, next_state, reward, done, next_action, delta = step(state, action)
+                max_delta = max(max_delta, delta)
+                steps += 1
+
+                if steps == next_hook_step:
+                    hooks.on_step(self, steps, state, action, reward, next_state, done)
+                    next_hook_step += hooks.step_interval
+
+                state, action = next_state, next_action
+                total_reward += reward
+
+                if per_step:
+                    self.epsilon = self.epsilon_schedule.value(steps)
+
+            self.rewards.append(total_reward)
+
+            if hooks:
+                hooks.on_episode_end(self, self._end_record(record, steps, total_reward, max_delta, state))
+
+            if self.checkpointer is not None and self.checkpointer.update(episode + 1, self.Q,
+                                                                          self._training_state(steps)):
+                hooks.on_checkpoint(self, episode + 1, self.checkpointer.path)
+
+            self.iterations = episode + 1
+
+            if self.convergence is not None and self.convergence.update(self, episode + 1, max_delta):
+                self.converged = True
+                break
+
+        if self.checkpointer is not None:
+            self.checkpointer.flush()
+
+        hooks.on_train_end(self)
 
     @abstractmethod
     def train(self, **kwargs):
@@ -55,10 +307,35 @@ class RLAgent(ABC):
 
         ...
 
+    def greedy_policy(self) -> np.ndarray:
+        """
+            This method extracts the action decided in validation for every node index at once. Agents without a
+            Q-Table override this method.
+
+            :return: Greedy action of each node index
+        """
+
+        return np.argmax(self.Q, axis=1)
+
+    def rollouts(self, starts: Optional[np.ndarray] = None,
+                 max_steps: Optional[int] = None) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+            This method validates the greedy policy from many starting node indices at once, see
+            *rl_agents.Policy.rollouts*.
+
+            :param starts: Starting node indices, all nodes by default
+            :param max_steps: Maximum number of steps of a rollout, the number of nodes by default
+            :return: Total reward, number of steps and whether a terminal node is reached, for each starting node index
+        """
+
+        return rollouts(self.env, self.greedy_policy(), starts, max_steps)
+
     def validate(self) -> (List[int], int):
         """
             This method returns the optimal list of action and the maximum total reward. The actions are decided by the
-            agent after training
+            agent after training. The rollout is capped by the number of nodes. Since the decisions are deterministic,
+            a rollout which returns to a visited node repeats its cycle until the cap: the cycle is walked once and the
+            total reward is extrapolated to the cap (see *rl_agents.Policy.cycle_return*).
 
             :return: List of decided action and the maximum total reward
         """
@@ -68,10 +345,18 @@ class RLAgent(ABC):
 
         current_state: int = self.env.reset()
         done: bool = False
-        max_iter = 100
+        max_iter = default_max_steps(self.env)
+        first_step: Dict[int, int] = {}
+        totals: List[int] = [0]
         i = 0
 
         while not done and i < max_iter:
+            if current_state in first_step:
+                total_reward = cycle_return(totals, first_step[current_state], max_iter)
+                break
+
+            first_step[current_state] = i
+
             # Decide action based on current node_index
             action = self.act(current_state, is_training=False)
 
@@ -80,6 +365,7 @@ class RLAgent(ABC):
 
             # Update results
             total_reward += reward
+            totals.append(total_reward)
             actions.append(action)
 
             # Update node_index
@@ -4,8 +4,17 @@
     Student ID: S023378
 """
 
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from Environment import Environment
+from VecEnvironment import VecEnvironment
 from rl_agents.RLAgent import RLAgent
+from rl_agents.Checkpoint import Checkpointer
+from rl_agents.Convergence import ConvergenceCriterion
+from rl_agents.EpsilonSchedule import EpsilonSchedule, ExponentialDecay
+from rl_agents.Hooks import TrainingHook, HookList
+from rl_agents.QStorage import QTable, make_q_table
+from rl_agents.Shaping import heuristic_q, potential, shaped_rewards
+from rl_agents.Batched import epsilon_greedy, sarsa_update
 import numpy as np
 
 
@@ -13,12 +22,24 @@ class SARSAAgent(RLAgent):
     epsilon: float          #: Current epsilon value for epsilon-greedy
     epsilon_decay: float    #: Decay ratio for epsilon
     epsilon_min: float      #: Minimum epsilon value
+    epsilon_schedule: EpsilonSchedule   #: Schedule which updates epsilon during training
     alpha: float            #: Alpha value for soft-update
     max_episode: int        #: Maximum iteration
-    Q: np.ndarray           #: Q-Table as Numpy Array
+    Q: Union[np.ndarray, QTable]    #: Q-Table as Numpy Array, or another storage of *rl_agents.QStorage*
+    checkpointer: Checkpointer  #: Takes snapshots of the Q-Table during training, if given
+    convergence: ConvergenceCriterion  #: Stops training early, if given
+    iterations: int         #: Number of episodes run by the last training
+    converged: bool         #: If the last training stopped on the convergence criterion, or not
+    hooks: List[TrainingHook]   #: Callbacks of the training events
+    backend: str            #: Training backend, see *rl_agents.Compiled.BACKENDS*
+    potential: Optional[np.ndarray]     #: Shaping potential of each node index, None without shaping
 
     def __init__(self, env: Environment, seed: int, discount_rate: float, epsilon: float, epsilon_decay: float,
-                 epsilon_min: float, alpha: float, max_episode: int):
+                 epsilon_min: float, alpha: float, max_episode: int, checkpointer: Checkpointer = None,
+                 convergence: ConvergenceCriterion = None, epsilon_schedule: EpsilonSchedule = None,
+                 hooks: List[TrainingHook] = None, backend: str = "python",
+                 q_storage: Union[str, np.ndarray, QTable] = "float32", heuristic_init: bool = False,
+                 shaping: bool = False, q_storage_options: Dict = None):
         """
             Initiate the Agent with hyperparameters.
 
@@ -30,6 +51,24 @@ class SARSAAgent(RLAgent):
             :param epsilon_min: Minimum epsilon to avoid overestimation. Must be positive or zero
             :param max_episode: Maximum episode for training
             :param alpha: To update Q values softly. 0 < alpha <= 1.0
+            :param checkpointer: Takes snapshots of the Q-Table during training. No snapshot is taken by default
+            :param convergence: Stops training before *max_episode* once it is met. Disabled by default
+            :param epsilon_schedule: Schedule of epsilon. By default, epsilon is multiplied by epsilon_decay after
+            every episode until it reaches epsilon_min
+            :param hooks: Callbacks of the training events, e.g. *MetricsRecorder* or *JSONLSink*. None by default
+            :param backend: "python", or "numba" to run the episodes in a JIT-compiled kernel with the same results. The
+            Python loop is used if Numba is not installed, for per-step epsilon schedules and for sampled *on_step* hooks
+            :param q_storage: Storage of the Q-Table, see *rl_agents.QStorage.STORAGES*. "float32" by default; "float16"
+            and "int16" take half the memory, and "sparse" only stores the visited node indices. The numba backend
+            needs "float32". A ready Q-Table of shape (number of nodes, 4) is used as it is, e.g. to share it
+            :param heuristic_init: Initialize the Q-Table with an admissible heuristic instead of zeros (see
+            *rl_agents.Shaping.heuristic_q*), so that the early episodes head for the goals instead of walking randomly
+            :param shaping: Add the potential-based shaping reward discount_rate * Φ(next state) - Φ(state) to the
+            updates, where Φ is minus the distance to the closest goal (see *rl_agents.Shaping.potential*). The optimal
+            policy is unchanged; the rewards of the episodes and the validation are not shaped. The numba backend is
+            not used with shaping
+            :param q_storage_options: Options of the storage, see *rl_agents.QStorage.make_q_table*. The "sparse"
+            storage starts optimistic by default, with the highest transition reward as *initial* value
         """
         super().__init__(env, discount_rate, seed)
 
@@ -42,6 +81,12 @@ class SARSAAgent(RLAgent):
         assert epsilon_min >= 0.0, "epsilonMin must be >= 0"
         self.epsilon_min = epsilon_min
 
+        if epsilon_schedule is None:
+            epsilon_schedule = ExponentialDecay(epsilon, epsilon_decay, epsilon_min)
+
+        self.epsilon_schedule = epsilon_schedule
+        self.epsilon = epsilon_schedule.value(0)
+
         assert 0.0 < alpha <= 1.0, "alpha must be in range (0.0, 1.0]"
         self.alpha = alpha
 
@@ -49,7 +94,35 @@ class SARSAAgent(RLAgent):
         self.max_episode = max_episode
 
         # You can make change on Q-Table, this is an example
-        self.Q = np.zeros((self.state_size, self.action_size), dtype=np.float32)
+        q_storage_options = dict(q_storage_options or {})
+
+        # Unvisited node indices look as good as the best reward, so the greedy policy tries them first
+        if isinstance(q_storage, str) and q_storage == "sparse":
+            q_storage_options.setdefault("initial", float(env.reward.max()))
+
+        self.Q = make_q_table(q_storage, self.state_size, self.action_size, env.terminal, **q_storage_options)
+
+        self.potential = potential(env) if shaping else None
+
+        if heuristic_init:
+            Q = heuristic_q(env, discount_rate)
+
+            # With shaping, the agent learns Q(state, action) - Φ(state), whose greedy policy is the same
+            if self.potential is not None:
+                Q -= self.potential[:, None]
+
+            self.Q[:] = Q
+
+        self.checkpointer = checkpointer
+
+        self.convergence = convergence
+        self.iterations = 0
+        self.converged = False
+
+        self.hooks = list(hooks or [])
+
+        assert backend in ["python", "numba"], f"Unknown backend: {backend}"
+        self.backend = backend
 
         # If you want to use more parameters, you can initiate below
 
@@ -61,33 +134,81 @@ class SARSAAgent(RLAgent):
 
             You will fill the Q-Table with SARSA algorithm.
 
-            :param kwargs: Empty
+            :param kwargs: **resume** *(bool)*: Continue from the last snapshot of the checkpointer
             :return: Nothing
         """
 
-        save_interval = 50
-        self.rewards = []
+        self._run_training(kwargs.get("resume", False))
+
+    def _compiled_episode(self, hooks: HookList) -> Optional[Callable]:
+        if self.backend != "numba":
+            return None
 
-        for episode in range(self.max_episode):
-            total_reward = 0
-            state = self.env.reset()
-            action = self.act(state, is_training=True)
-            done = False
+        from rl_agents import Compiled
 
-            while not done:
-                next_state, reward, done = self.env.move(action)
-                next_action = self.act(next_state, is_training=True)
-                self.Q[state, action] += self.alpha * (
-                        reward + self.discount_rate * self.Q[next_state, next_action] - self.Q[state, action])
-                state, action = next_state, next_action
-                total_reward += reward
+        return Compiled.select(self, Compiled.sarsa_episode, hooks)
 
-            self.rewards.append(total_reward)
+    def _start_episode(self, state: int) -> Optional[int]:
+        return self.act(state, is_training=True)
 
-            if (episode + 1) % save_interval == 0:
-                np.save(f'q_table_{episode + 1}.npy', self.Q)
-                print(f"Saved Q-Table at episode {episode + 1}")
-        np.save('rewards_sarsa.npy', self.rewards)
+    def _step(self, state: int, action: Optional[int]) -> Tuple[int, int, int, bool, Optional[int], float]:
+        next_state, reward, done = self.env.step(state, action)
+        next_action = self.act(next_state, is_training=True)
+
+        # Terminal node indices are absorbing, so they are bootstrapped with 0 like in *sarsa_update*. The update is
+        # cast to float32, so that it matches the compiled kernels under the value-based casting of NumPy 1.x too
+        next_q = np.float32(0.0) if done else np.float32(self.Q[next_state, next_action])
+        target = np.float32(reward) + np.float32(self.discount_rate) * next_q
+
+        if self.potential is not None:
+            target += self.discount_rate * self.potential[next_state] - self.potential[state]
+
+        delta = np.float32(self.alpha) * (target - self.Q[state, action])
+        self.Q[state, action] += delta
+
+        return action, next_state, reward, done, next_action, abs(delta)
+
+    def train_batch(self, vec_env: VecEnvironment):
+        """
+            This method fills the Q-Table with batched SARSA updates, playing the episodes on all lanes of the given
+            VecEnvironment in parallel until *max_episode* episodes are finished in total.
+
+            :param vec_env: Auto-resetting VecEnvironment whose lanes all play on grids of the agent's size
+            :return: Nothing
+        """
+
+        assert vec_env.auto_reset, "VecEnvironment must reset the finished lanes"
+        assert np.all(vec_env.state_sizes == self.state_size), "Grid sizes must match the Q-Table"
+
+        self.rewards = []
+        total_rewards = np.zeros(vec_env.num_envs)
+        states = vec_env.reset()
+        self.epsilon = self.epsilon_schedule.value(0)
+        actions = epsilon_greedy(self.Q, states, self.epsilon, self.rng)
+        steps = 0
+
+        while len(self.rewards) < self.max_episode:
+            next_states, rewards, dones = vec_env.step(actions)
+            next_actions = epsilon_greedy(self.Q, next_states, self.epsilon, self.rng)
+            sarsa_update(self.Q, states, actions,
+                         shaped_rewards(self.potential, rewards, states, next_states, dones, self.discount_rate),
+                         next_states, next_actions, dones, self.alpha, self.discount_rate)
+            total_rewards += rewards
+
+            finished = np.flatnonzero(dones)
+            self.rewards.extend(total_rewards[finished].tolist())
+            total_rewards[finished] = 0
+
+            steps += 1
+            self.epsilon = self.epsilon_schedule.value(steps if self.epsilon_schedule.per_step else len(self.rewards))
+
+            # Finished lanes start a new episode, so their next action is decided on the starting node
+            states = vec_env.states
+            if len(finished) > 0:
+                next_actions[finished] = epsilon_greedy(self.Q, states[finished], self.epsilon, self.rng)
+            actions = next_actions
+
+        self.rewards = self.rewards[:self.max_episode]
 
     def act(self, state: int, is_training: bool) -> int:
         """
@@ -102,7 +223,10 @@ class SARSAAgent(RLAgent):
             :return: Action as integer
         """
 
-        if is_training and np.random.rand() < self.epsilon:
-            return np.random.randint(0, self.action_size)
-        else:
-            return np.argmax(self.Q[state])
+        if is_training:
+            action = self.explore(self.epsilon)
+
+            if action is not None:
+                return action
+
+        return np.argmax(self.Q[state])
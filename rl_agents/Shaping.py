@@ -0,0 +1,116 @@
+from typing import Optional
+
+import numpy as np
+
+from Environment import GOAL, PITFALL, Environment
+
+
+def goal_distance(env: Environment) -> np.ndarray:
+    """
+        This method counts the moves from every node index to its closest goal with a multi-source breadth-first
+        search, which expands the whole frontier of a distance at once. Paths do not cross pitfalls, since entering one
+        ends the episode; mountains only change the rewards, so they are crossed.
+
+        :param env: Environment
+        :return: Number of moves to the closest goal of each node index, -1 if no goal can be reached
+    """
+
+    size = env.grid_size
+    codes = env.terrain.ravel()
+
+    distance = np.full(size * size, -1, dtype=np.int64)
+    frontier = np.flatnonzero(codes == GOAL)
+    distance[frontier] = 0
+
+    # Pitfalls are never expanded; marking them as reached keeps them out of the frontiers
+    distance[codes == PITFALL] = np.iinfo(np.int64).max
+
+    moves = 0
+
+    while len(frontier) > 0:
+        moves += 1
+
+        rows = frontier // size
+        cols = frontier % size
+
+        neighbours = np.concatenate([
+            frontier[rows > 0] - size,
+            frontier[rows < size - 1] + size,
+            frontier[cols > 0] - 1,
+            frontier[cols < size - 1] + 1,
+        ])
+
+        frontier = np.unique(neighbours[distance[neighbours] < 0])
+        distance[frontier] = moves
+
+    distance[codes == PITFALL] = -1
+
+    return distance
+
+
+def potential(env: Environment) -> np.ndarray:
+    """
+        This method computes the shaping potential Φ = -distance to the closest goal (see *goal_distance*). Terminal
+        node indices have a potential of 0, so that the shaping rewards of an episode add up to -Φ of its starting node
+        index, which keeps the optimal policy unchanged. Node indices which cannot reach a goal are given the distance
+        of the number of node indices.
+
+        :param env: Environment
+        :return: Potential of each node index
+    """
+
+    distance = goal_distance(env).astype(np.float64)
+    distance[distance < 0] = len(distance)
+    distance[env.terminal] = 0.0
+
+    return -distance
+
+
+def shaped_rewards(potential: Optional[np.ndarray], rewards: np.ndarray, states: np.ndarray,
+                   next_states: np.ndarray, dones: np.ndarray, discount_rate: float) -> np.ndarray:
+    """
+        This method adds the potential-based shaping reward discount_rate * Φ(next state) - Φ(state) to a batch of
+        transitions.
+
+        :param potential: Potential of each node index (see *potential*), or None without shaping
+        :param rewards: Transition reward of each lane
+        :param states: Node index of each lane before the step
+        :param next_states: Node index of each lane after the step
+        :param dones: If the episode of each lane is done, or not
+        :param discount_rate: Discount rate of cumulative rewards
+        :return: Shaped rewards, or the given rewards without shaping
+    """
+
+    if potential is None:
+        return rewards
+
+    return rewards + np.where(dones, 0.0, discount_rate * potential[next_states]) - potential[states]
+
+
+def heuristic_q(env: Environment, discount_rate: float) -> np.ndarray:
+    """
+        This method computes an admissible Q-Table, which is never below the optimal one: every move costs at least 1
+        until a goal, which is at least *goal_distance* moves away, is entered with a reward of 100. An episode which
+        never enters a goal returns at most -1, the reward of a single move.
+
+        :param env: Environment
+        :param discount_rate: Discount rate of cumulative rewards
+        :return: Q-Table as Numpy Array
+    """
+
+    distance = goal_distance(env).astype(np.float64)
+
+    # Return of d - 1 moves of -1 and the goal reward on the last move
+    if discount_rate == 1.0:
+        steps = distance - 1.0
+    else:
+        steps = (1.0 - discount_rate ** (distance - 1.0)) / (1.0 - discount_rate)
+
+    bound = np.where(distance > 0, discount_rate ** (distance - 1.0) * 100.0 - steps, -np.inf)
+    bound = np.maximum(bound, -1.0)
+    bound[env.terminal] = 0.0
+
+    Q = env.reward + discount_rate * ~env.terminal[env.next_state] * bound[env.next_state]
+    Q[env.terminal] = 0.0
+
+    return Q.astype(np.float32)
@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+
+from rl_agents.QStorage import add_flat
+
+
+class SparseTraces:
+    decay: float            #: Decay of the traces after every step, discount rate * lambda
+    cutoff: float           #: Traces below the cutoff are dropped
+    replacing: bool         #: If True, a visit resets the trace to 1, otherwise 1 is added to it
+    size: int               #: Number of active traces
+
+    def __init__(self, decay: float, cutoff: float = 1e-3, replacing: bool = True):
+        """
+            Eligibility traces of the recently visited state-action pairs. Only the traces above the cutoff are kept,
+            as a flat Q-Table index and a value each, so a step costs O(active traces) instead of O(S x A).
+
+            :param decay: Decay of the traces after every step. Must be in range [0.0, 1.0]
+            :param cutoff: Traces below the cutoff are dropped. Must be in range (0.0, 1.0]
+            :param replacing: Use replacing traces instead of accumulating traces
+        """
+
+        assert 0.0 <= decay <= 1.0, "decay must be in range [0.0, 1.0]"
+        self.decay = decay
+
+        assert 0.0 < cutoff <= 1.0, "cutoff must be in range (0.0, 1.0]"
+        self.cutoff = cutoff
+
+        self.replacing = replacing
+
+        # A replacing trace falls below the cutoff after this many steps, which bounds the number of active traces
+        if decay < 1.0:
+            capacity = math.floor(math.log(cutoff) / math.log(decay)) + 2 if decay > 0.0 else 1
+        else:
+            capacity = 1024
+
+        self._keys = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+
+    def clear(self):
+        """
+            This method drops all traces, at the start of an episode or when Watkins's Q(lambda) cuts them.
+
+            :return: Nothing
+        """
+
+        self.size = 0
+
+    def visit(self, key: int):
+        """
+            This method marks the given state-action pair as visited.
+
+            :param key: Flat Q-Table index, state * action size + action
+            :return: Nothing
+        """
+
+        n = self.size
+        found = np.flatnonzero(self._keys[:n] == key)
+
+        if len(found) > 0:
+            i = found[0]
+
+            if self.replacing:
+                self._values[i] = 1.0
+            else:
+                self._values[i] += 1.0
+
+            return
+
+        if n == len(self._keys):
+            self._keys = np.resize(self._keys, 2 * n)
+            self._values = np.resize(self._values, 2 * n)
+
+        self._keys[n] = key
+        self._values[n] = 1.0
+        self.size = n + 1
+
+    def update(self, Q: np.ndarray, scale: float) -> float:
+        """
+            This method adds the scaled traces to the Q-Table, then decays the traces and drops those below the cutoff.
+
+            :param Q: Q-Table as Numpy Array, updated in place
+            :param scale: Step size times TD error
+            :return: Maximum absolute change of a Q value
+        """
+
+        n = self.size
+
+        if n == 0:
+            return 0.0
+
+        keys = self._keys[:n]
+        values = self._values[:n]
+
+        # The keys are unique, so the fancy-index update does not lose increments
+        add_flat(Q, keys, scale * values)
+
+        max_change = abs(scale) * values.max()
+
+        values *= self.decay
+
+        if values.min() < self.cutoff:
+            keep = values >= self.cutoff
+            self.size = int(keep.sum())
+
+            self._keys[:self.size] = keys[keep]
+            self._values[:self.size] = values[keep]
+
+        return max_change
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,89 @@
+from Environment import Environment
+from rl_agents.RLAgent import RLAgent
+import numpy as np
+
+
+class ValueIterationAgent(RLAgent):
+    tolerance: float        #: Convergence tolerance on the maximum value change of a sweep
+    max_sweeps: int         #: Maximum number of Bellman sweeps
+    iterations: int         #: Number of iterations performed by the last training
+    converged: bool         #: If the last training converged within the tolerance, or not
+    V: np.ndarray           #: State values as Numpy Array
+    Q: np.ndarray           #: Q-Table as Numpy Array
+
+    def __init__(self, env: Environment, seed: int, discount_rate: float, tolerance: float = 1e-6,
+                 max_sweeps: int = 100000):
+        """
+            Initiate the Agent with hyperparameters. The agent plans on the compiled transition tables of the
+            environment, so it computes the exact optimal Q-Table instead of sampling episodes.
+
+            :param env: The Environment where the Agent plays.
+            :param seed: Seed for random
+            :param discount_rate: Discount rate of cumulative rewards. Must be between 0.0 and 1.0
+            :param tolerance: Training stops when no state value changes more than the tolerance. Must be positive
+            :param max_sweeps: Maximum number of Bellman sweeps. Must be > 0
+        """
+        super().__init__(env, discount_rate, seed)
+
+        assert tolerance > 0.0, "tolerance must be > 0"
+        self.tolerance = tolerance
+
+        assert max_sweeps > 0, "Maximum sweeps must be > 0"
+        self.max_sweeps = max_sweeps
+
+        self.iterations = 0
+        self.converged = False
+
+        self.V = np.zeros(self.state_size, dtype=np.float64)
+        self.Q = np.zeros((self.state_size, self.action_size), dtype=np.float64)
+
+        # An episode ends when a terminal node is entered, so its value is not carried back
+        self._continuation = self.discount_rate * ~env.terminal[env.next_state]
+
+    def q_values(self, V: np.ndarray) -> np.ndarray:
+        """
+            This method computes the Q-Table of the given state values with one vectorized Bellman backup.
+
+            :param V: State values as Numpy Array
+            :return: Q-Table as Numpy Array
+        """
+
+        return self.env.reward + self._continuation * V[self.env.next_state]
+
+    def train(self, **kwargs):
+        """
+            This method computes the optimal Q-Table with value iteration.
+
+            :param kwargs: Empty
+            :return: Nothing
+        """
+
+        V = np.zeros(self.state_size, dtype=np.float64)
+        self.converged = False
+
+        for sweep in range(self.max_sweeps):
+            Q = self.q_values(V)
+            new_V = Q.max(axis=1)
+
+            delta = np.max(np.abs(new_V - V))
+            V = new_V
+
+            self.iterations = sweep + 1
+
+            if delta < self.tolerance:
+                self.converged = True
+                break
+
+        self.V = V
+        self.Q = self.q_values(V)
+
+    def act(self, state: int, is_training: bool) -> int:
+        """
+            This method decides the greedy action of the computed Q-Table.
+
+            :param state: Current State as Integer not Position
+            :param is_training: The agent acts greedily in any case.
+            :return: Action as integer
+        """
+
+        return np.argmax(self.Q[state])
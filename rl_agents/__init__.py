@@ -1,3 +1,76 @@
-from .RLAgent import RLAgent
-from .QLearning import QLearningAgent
-from .SARSA import SARSAAgent
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .RLAgent import RLAgent
+    from .Checkpoint import Checkpointer
+    from .EpsilonSchedule import EpsilonSchedule, ExponentialDecay, LinearDecay, StepDecay, InverseTimeDecay
+    from .Convergence import ConvergenceCriterion, MaxDeltaQ, StablePolicy, StableReturn, AllOf, AnyOf
+    from .Hooks import TrainingHook, MetricsRecorder, JSONLSink, read_metrics
+    from .QStorage import QTable, QuantizedQTable, SparseQTable
+    from .QLearning import QLearningAgent
+    from .SARSA import SARSAAgent
+    from .QLambda import QLambdaAgent
+    from .SARSALambda import SARSALambdaAgent
+    from .DynaQ import DynaQAgent
+    from .PrioritizedSweeping import PrioritizedSweepingAgent
+    from .ValueIteration import ValueIterationAgent
+    from .PolicyIteration import PolicyIterationAgent
+    from .Multigrid import MultigridAgent
+    from .Hogwild import HogwildTrainer
+
+_MODULES = {
+    "RLAgent": "RLAgent",
+    "Checkpointer": "Checkpoint",
+    "EpsilonSchedule": "EpsilonSchedule",
+    "ExponentialDecay": "EpsilonSchedule",
+    "LinearDecay": "EpsilonSchedule",
+    "StepDecay": "EpsilonSchedule",
+    "InverseTimeDecay": "EpsilonSchedule",
+    "ConvergenceCriterion": "Convergence",
+    "MaxDeltaQ": "Convergence",
+    "StablePolicy": "Convergence",
+    "StableReturn": "Convergence",
+    "AllOf": "Convergence",
+    "AnyOf": "Convergence",
+    "TrainingHook": "Hooks",
+    "MetricsRecorder": "Hooks",
+    "JSONLSink": "Hooks",
+    "read_metrics": "Hooks",
+    "QTable": "QStorage",
+    "QuantizedQTable": "QStorage",
+    "SparseQTable": "QStorage",
+    "QLearningAgent": "QLearning",
+    "SARSAAgent": "SARSA",
+    "QLambdaAgent": "QLambda",
+    "SARSALambdaAgent": "SARSALambda",
+    "DynaQAgent": "DynaQ",
+    "PrioritizedSweepingAgent": "PrioritizedSweeping",
+    "ValueIterationAgent": "ValueIteration",
+    "PolicyIterationAgent": "PolicyIteration",
+    "MultigridAgent": "Multigrid",
+    "HogwildTrainer": "Hogwild",
+}
+"""
+    Module of every exported name
+"""
+
+__all__ = list(_MODULES)
+
+
+# The modules are imported on first access, e.g. *rl_agents.QLearningAgent*, so that importing the package stays cheap
+# for short-lived worker processes
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{_MODULES[name]}", __name__), name)
+
+    # Cached, so that __getattr__ is called only once per name
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
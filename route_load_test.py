@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import os.path
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from route_server import GRID_DIR, RouteServer
+
+
+async def _get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str) -> (int, Dict):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+
+    while True:
+        line = await reader.readline()
+
+        if not line.strip():
+            break
+
+        name, _, value = line.decode("latin-1").partition(":")
+
+        if name.strip().lower() == "content-length":
+            length = int(value)
+
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _connect(host: str, port: int, unix: Optional[str]):
+    if unix is not None:
+        return await asyncio.open_unix_connection(unix)
+
+    return await asyncio.open_connection(host, port)
+
+
+async def load_test(grids: List[str], requests: int, concurrency: int, seed: int, host: str = "127.0.0.1",
+                    port: int = 8080, unix: Optional[str] = None) -> Dict:
+    """
+        This method sends route queries from many keep-alive connections at once. Each query asks for a random grid
+        from a random node index; the grid size is learned from the first answer of the grid, so the first queries of a
+        grid start at its starting position and arrive while it is being solved.
+
+        :param grids: File names of the grids in the grid directory of the server
+        :param requests: Total number of queries
+        :param concurrency: Number of connections
+        :param seed: Seed of the query generator
+        :param host: Host of the server
+        :param port: Port of the server
+        :param unix: Path of the Unix socket of the server, which replaces the TCP socket
+        :return: Throughput, client-side latency percentiles in milliseconds, status counts and the server metrics
+    """
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(grids), requests).tolist()
+    fractions = rng.random(requests).tolist()
+
+    sizes: Dict[str, int] = {}
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    queue = iter(range(requests))
+
+    async def client():
+        reader, writer = await _connect(host, port, unix)
+
+        try:
+            for i in queue:
+                grid = grids[picks[i]]
+                target = f"/route?grid={grid}"
+
+                if grid in sizes:
+                    target += f"&start={int(fractions[i] * sizes[grid] ** 2)}"
+
+                start = time.perf_counter_ns()
+                status, body = await _get(reader, writer, target)
+                latencies.append((time.perf_counter_ns() - start) * 1e-6)
+
+                statuses[status] = statuses.get(status, 0) + 1
+
+                if status == 200:
+                    sizes[grid] = body["grid_size"]
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start_time = time.perf_counter_ns()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = (time.perf_counter_ns() - start_time) * 1e-9
+
+    reader, writer = await _connect(host, port, unix)
+    _, metrics = await _get(reader, writer, "/metrics")
+    writer.close()
+    await writer.wait_closed()
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "requests_per_sec": requests / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "statuses": statuses,
+        "server": metrics,
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict:
+    grids = args.grids or sorted(name for name in os.listdir(args.grid_dir) if name.endswith((".pkl", ".grid")))
+
+    if args.port is not None or args.unix is not None:
+        return await load_test(grids, args.requests, args.concurrency, args.seed, args.host, args.port, args.unix)
+
+    # Without an address, a server is started in this process on a free port
+    server = RouteServer(args.grid_dir, args.cache_mb << 20, args.workers)
+    host, port = (await server.start(args.host, 0)).rsplit(":", 1)
+
+    try:
+        return await load_test(grids, args.requests, args.concurrency, args.seed, host, int(port))
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    # Usage: python route_load_test.py [--port 8080] [--grids GridTestOne.pkl ...] [--requests 10000]
+    parser = argparse.ArgumentParser(description="Load-tests the route server and reports latency and cache metrics.")
+    parser.add_argument("--grid-dir", default=GRID_DIR, help="Directory of the grid files")
+    parser.add_argument("--grids", nargs="+", help="Queried grid file names, every grid of the directory by default")
+    parser.add_argument("--requests", type=int, default=10000, help="Total number of queries")
+    parser.add_argument("--concurrency", type=int, default=32, help="Number of connections")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the query generator")
+    parser.add_argument("--host", default="127.0.0.1", help="Host of the server")
+    parser.add_argument("--port", type=int, help="Port of a running server, a local server is started by default")
+    parser.add_argument("--unix", help="Unix socket of a running server")
+    parser.add_argument("--workers", type=int, help="Solver processes of the local server")
+    parser.add_argument("--cache-mb", type=int, default=256, help="Solution cache size of the local server in MiB")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(_main(args)), indent=2))
@@ -0,0 +1,379 @@
+import collections
+import heapq
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from Environment import Environment, Position, ACTION_DELTAS, GOAL, PITFALL, REWARD_MATRIX
+from rl_agents.RLAgent import RLAgent
+
+MAX_FIELDS = 8
+"""
+    Number of distance fields kept by *distance_field*. Beyond it, the least recently used field is evicted
+"""
+
+_fields: "collections.OrderedDict[int, Tuple[np.ndarray, np.ndarray]]" = collections.OrderedDict()
+"""
+    Solved distance fields by grid hash, in least recently used order, see *distance_field*
+"""
+
+
+def _solve(env: Environment) -> (np.ndarray, np.ndarray):
+    """
+        This method runs a multi-source Dijkstra from all goals on the reversed grid graph. The cost of a move is the
+        negated transition reward; entering a goal costs nothing, so the total reward of a route is ``100 - cost``.
+        Pitfalls are never entered and out-of-bound moves are never taken.
+
+        :param env: Solved environment
+        :return: Cost of the cheapest route to a goal and the first action of that route for each node index
+    """
+
+    state_size = env.grid_size * env.grid_size
+    codes = env.terrain.ravel()
+
+    # Edges (previous -> next) of the moves which leave a non-terminal node without entering a pitfall
+    previous, actions = np.nonzero((env.next_state != np.arange(state_size)[:, None]) & ~env.terminal[:, None])
+    following = env.next_state[previous, actions]
+
+    allowed = codes[following] != PITFALL
+    previous, actions, following = previous[allowed], actions[allowed], following[allowed]
+
+    costs = np.where(codes[following] == GOAL, 0, -REWARD_MATRIX[codes[previous], codes[following]])
+
+    # Group the edges by their next node, so that the predecessors of a node are a contiguous slice
+    order = np.argsort(following, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(following, minlength=state_size)))).tolist()
+    previous, actions, costs = previous[order].tolist(), actions[order].tolist(), costs[order].tolist()
+
+    distance = [np.inf] * state_size
+    best_action = [-1] * state_size
+
+    heap = [(0, goal) for goal in env.get_goals()]
+    for _, goal in heap:
+        distance[goal] = 0
+
+    while heap:
+        cost, node = heapq.heappop(heap)
+
+        if cost > distance[node]:
+            continue
+
+        for k in range(bounds[node], bounds[node + 1]):
+            new_cost = cost + costs[k]
+
+            if new_cost < distance[previous[k]]:
+                distance[previous[k]] = new_cost
+                best_action[previous[k]] = actions[k]
+                heapq.heappush(heap, (new_cost, previous[k]))
+
+    return np.array(distance), np.array(best_action, dtype=np.int8)
+
+
+def distance_field(env: Environment, cache: bool = True) -> (np.ndarray, np.ndarray):
+    """
+        This method provides the cost of the cheapest route to a goal and its first action for every node index of the
+        given environment. The field is solved once per grid and cached by the grid hash; the cache keeps the
+        *MAX_FIELDS* most recently used fields.
+
+        :param env: Target environment
+        :param cache: Keep the field in the module cache. Disable it for grids which are solved only once
+        :return: Route costs (*inf* if no goal is reachable) and first actions (-1 on terminal nodes)
+    """
+
+    if not cache:
+        return _solve(env)
+
+    key = hash(env)
+    field = _fields.get(key)
+
+    if field is not None:
+        _fields.move_to_end(key)
+
+        return field
+
+    field = _fields[key] = _solve(env)
+
+    while len(_fields) > MAX_FIELDS:
+        _fields.popitem(last=False)
+
+    return field
+
+
+def route(env: Environment, start: Optional[int] = None) -> (List[int], int):
+    """
+        This method returns the optimal list of action and the maximum total reward from the given node index, in the
+        same format as *RLAgent.validate*.
+
+        :param env: Target environment
+        :param start: Node index where the route starts, the starting position of the environment by default
+        :return: List of decided action and the maximum total reward
+        :raise: Unreachable goal exception
+    """
+
+    if start is None:
+        start = env.to_node_index(env.starting_position)
+
+    distance, best_action = distance_field(env)
+
+    if np.isinf(distance[start]):
+        raise ValueError(f"No goal is reachable from the node index {start}.")
+
+    actions: List[int] = []
+    total_reward: int = 0
+    state = start
+
+    while not env.terminal.item(state):
+        action = best_action.item(state)
+
+        actions.append(action)
+        total_reward += env.reward.item(state, action)
+
+        state = env.next_state.item(state, action)
+
+    return actions, total_reward
+
+
+def optimal_score(env: Environment, start: Optional[int] = None) -> int:
+    """
+        This method returns the maximum total reward from the given node index.
+
+        :param env: Target environment
+        :param start: Node index where the route starts, the starting position of the environment by default
+        :return: The maximum total reward
+        :raise: Unreachable goal exception
+    """
+
+    _, total_reward = route(env, start)
+
+    return total_reward
+
+
+def optimality_gap(agent: RLAgent) -> int:
+    """
+        This method measures how far the trained agent's validation score is from the maximum total reward.
+
+        :param agent: Trained agent
+        :return: Maximum total reward minus the validation score of the agent
+    """
+
+    _, score = agent.validate()
+
+    return optimal_score(agent.env) - score
+
+
+class RoutePlanner:
+    env: Environment        #: Planned environment
+
+    def __init__(self, env: Environment):
+        """
+            Distance field of *distance_field* which follows the changes of the grid. The field is solved once; after
+            a node changes, only the nodes whose route cost changes are repaired, in the way of Lifelong Planning A*
+            without a heuristic: every node keeps its cost and a one-step lookahead cost (*rhs*), and the nodes where
+            they differ are settled in cost order from a priority queue.
+
+            :param env: Planned environment. Change it with *set_cell*, *add_goal* or *remove_goal* of the planner, or
+            call *update* after changing it directly
+        """
+
+        self.env = env
+
+        distance, best_action = _solve(env)
+
+        self._distance: List[float] = distance.astype(float).tolist()
+        self._rhs: List[float] = list(self._distance)
+        self._best_action: List[int] = best_action.tolist()
+        self._heap: List[Tuple[float, int]] = []
+
+    def distance(self, node_index: int) -> float:
+        """
+            :param node_index: Node index
+            :return: Cost of the cheapest route to a goal, *inf* if no goal is reachable
+        """
+
+        return self._distance[node_index]
+
+    def action(self, node_index: int) -> int:
+        """
+            :param node_index: Node index
+            :return: First action of the cheapest route to a goal, -1 on terminal nodes and if no goal is reachable
+        """
+
+        return self._best_action[node_index]
+
+    def distance_field(self) -> (np.ndarray, np.ndarray):
+        """
+            :return: Route costs and first actions of every node index, as in *distance_field*
+        """
+
+        return np.array(self._distance), np.array(self._best_action, dtype=np.int8)
+
+    def route(self, start: Optional[int] = None) -> (List[int], int):
+        """
+            This method returns the optimal list of action and the maximum total reward from the given node index on
+            the current grid, see *route*.
+
+            :param start: Node index where the route starts, the starting position of the environment by default
+            :return: List of decided action and the maximum total reward
+            :raise: Unreachable goal exception
+        """
+
+        env = self.env
+
+        if start is None:
+            start = env.to_node_index(env.starting_position)
+
+        if self._distance[start] == np.inf:
+            raise ValueError(f"No goal is reachable from the node index {start}.")
+
+        actions: List[int] = []
+        total_reward: int = 0
+        state = start
+
+        while not env.terminal.item(state):
+            action = self._best_action[state]
+
+            actions.append(action)
+            total_reward += env.reward.item(state, action)
+
+            state = env.next_state.item(state, action)
+
+        return actions, total_reward
+
+    def set_cell(self, position: Position, node_type: str) -> int:
+        """
+            This method changes the node type of a node, see *Environment.set_cell*, and repairs the field.
+
+            :param position: Target position
+            :param node_type: New node type
+            :return: Number of repaired nodes
+        """
+
+        self.env.set_cell(position, node_type)
+
+        return self.update([self.env.to_node_index(position)])
+
+    def add_goal(self, position: Position) -> int:
+        """
+            This method opens a goal, see *Environment.add_goal*, and repairs the field.
+
+            :param position: Target position
+            :return: Number of repaired nodes
+        """
+
+        self.env.add_goal(position)
+
+        return self.update([self.env.to_node_index(position)])
+
+    def remove_goal(self, position: Position, node_type: str = "F") -> int:
+        """
+            This method closes a goal, see *Environment.remove_goal*, and repairs the field.
+
+            :param position: Position of a Goal node
+            :param node_type: Node type which replaces the goal
+            :return: Number of repaired nodes
+        """
+
+        self.env.remove_goal(position, node_type)
+
+        return self.update([self.env.to_node_index(position)])
+
+    def update(self, changed: List[int]) -> int:
+        """
+            This method repairs the field after the node types of the given node indices have changed. A change alters
+            the moves out of the node and the moves of its neighbours into it, so their lookahead costs are recomputed,
+            and the repair spreads from them only as far as route costs change.
+
+            :param changed: Node indices whose node type has changed
+            :return: Number of repaired nodes
+        """
+
+        for node in changed:
+            self._update_rhs(node)
+
+            for predecessor in self._predecessors(node):
+                self._update_rhs(predecessor)
+
+        return self._repair()
+
+    def _predecessors(self, node: int) -> List[int]:
+        """
+            :param node: Node index
+            :return: Neighbour node indices, which move into the given node by one action
+        """
+
+        size = self.env.grid_size
+        row, col = divmod(node, size)
+        neighbours = []
+
+        for d_row, d_col in ACTION_DELTAS.tolist():
+            if 0 <= row - d_row < size and 0 <= col - d_col < size:
+                neighbours.append((row - d_row) * size + col - d_col)
+
+        return neighbours
+
+    def _update_rhs(self, node: int):
+        """
+            This method recomputes the lookahead cost and best action of a node from the costs of its successors, with
+            the edge costs of *_solve*, and queues the node if it becomes inconsistent.
+
+            :param node: Node index
+            :return: Nothing
+        """
+
+        env = self.env
+        code = env.terrain.item(*divmod(node, env.grid_size))
+        rhs, best_action = np.inf, -1
+
+        if code == GOAL:
+            rhs = 0
+        elif code != PITFALL:
+            codes = env.terrain.ravel()
+
+            for action, following in enumerate(env.next_state[node].tolist()):
+                following_code = codes.item(following)
+
+                if following == node or following_code == PITFALL:
+                    continue
+
+                cost = self._distance[following] - (0 if following_code == GOAL else env.reward.item(node, action))
+
+                if cost < rhs:
+                    rhs, best_action = cost, action
+
+        self._rhs[node] = rhs
+        self._best_action[node] = best_action
+
+        if rhs != self._distance[node]:
+            heapq.heappush(self._heap, (min(rhs, self._distance[node]), node))
+
+    def _repair(self) -> int:
+        """
+            This method settles the queued inconsistent nodes in cost order until the field is consistent again. A
+            node whose cost drops takes its lookahead cost; a node whose cost rises is reset to *inf* and requeued, so
+            that it settles after its new successors.
+
+            :return: Number of settled nodes
+        """
+
+        distance, rhs = self._distance, self._rhs
+        settled = 0
+
+        while self._heap:
+            key, node = heapq.heappop(self._heap)
+
+            # Skip the stale entries of nodes which were settled or requeued with another key
+            if distance[node] == rhs[node] or key != min(distance[node], rhs[node]):
+                continue
+
+            settled += 1
+
+            if distance[node] > rhs[node]:
+                distance[node] = rhs[node]
+            else:
+                distance[node] = np.inf
+                self._update_rhs(node)
+
+            for predecessor in self._predecessors(node):
+                self._update_rhs(predecessor)
+
+        return settled
@@ -0,0 +1,510 @@
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import os.path
+import stat
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from Environment import Position, ACTION_DELTAS, FLAT, GOAL, REWARD_MATRIX
+
+GRID_DIR = "grid_worlds/"
+
+ACTION_NAMES = ["UP", "LEFT", "DOWN", "RIGHT"]
+"""
+    Names of the actions, as printed by *Main.py*
+"""
+
+GOAL_REWARD = REWARD_MATRIX.item(FLAT, GOAL)
+
+LATENCY_WINDOW = 10000
+"""
+    Number of the latest requests which the latency percentiles cover
+"""
+
+HASH_ENTRIES = 4096
+"""
+    Number of grid files whose content hash is remembered; the least recently requested one is forgotten beyond it
+"""
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+class Solution(NamedTuple):
+    grid_size: int              #: Size of the grid
+    start: int                  #: Node index of the starting position of the grid
+    distance: np.ndarray        #: Cost of the cheapest route to a goal of each node index, see *route_oracle*
+    best_action: np.ndarray     #: First action of that route of each node index, -1 on terminal nodes
+
+    @property
+    def nbytes(self) -> int:
+        return self.distance.nbytes + self.best_action.nbytes
+
+
+def solve(grid_file: str) -> Solution:
+    """
+        This method solves a grid with the route oracle. It is executed in a worker process, so only the solution is
+        sent back to the server.
+
+        :param grid_file: Path of the grid file
+        :return: Solution of the grid
+    """
+
+    from Environment import Environment
+    import route_oracle
+
+    env = Environment(grid_file)
+    distance, best_action = route_oracle.distance_field(env, cache=False)
+
+    # Route costs are integers far below 2^24, so float32 keeps them exact at half the size in the cache
+    return Solution(env.grid_size, env.to_node_index(env.starting_position), distance.astype(np.float32),
+                    best_action)
+
+
+def route(solution: Solution, start: int) -> (List[int], int):
+    """
+        This method follows the solved first actions from the given node index to a goal. The moves never leave the
+        grid, so the next node index is computed from the action instead of the transition tables of the grid.
+
+        :param solution: Solution of the grid
+        :param start: Node index where the route starts
+        :return: List of decided action and the maximum total reward, as in *route_oracle.route*
+        :raise: Illegal node index or unreachable goal exception
+    """
+
+    size = solution.grid_size
+
+    if not 0 <= start < size * size:
+        raise IndexError(f"Illegal node index {start}.")
+
+    distance = solution.distance.item(start)
+
+    if distance == np.inf:
+        raise ValueError(f"No goal is reachable from the node index {start}.")
+
+    best_action = solution.best_action
+    deltas = (ACTION_DELTAS @ [size, 1]).tolist()
+
+    actions: List[int] = []
+    state = start
+
+    while best_action.item(state) >= 0:
+        action = best_action.item(state)
+
+        actions.append(action)
+        state += deltas[action]
+
+    # Entering the goal costs nothing in the distance field, so the total reward is the goal reward minus the cost
+    return actions, int(GOAL_REWARD - distance) if actions else 0
+
+
+def content_hash(grid_file: str) -> str:
+    """
+        :param grid_file: Path of the grid file
+        :return: Hash of the file content, which identifies the grid regardless of its file name
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(grid_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    max_bytes: int          #: Maximum total size of the cached solutions
+    nbytes: int             #: Total size of the cached solutions
+    evictions: int          #: Number of evicted solutions
+
+    def __init__(self, max_bytes: int):
+        """
+            Least recently used cache of solved grids, bounded by the total size of the solutions. The most recently
+            added solution is always kept, even if it is larger than the bound.
+
+            :param max_bytes: Maximum total size of the cached solutions in bytes. Must be > 0
+        """
+
+        assert max_bytes > 0, "max_bytes must be > 0"
+        self.max_bytes = max_bytes
+
+        self._solutions: collections.OrderedDict = collections.OrderedDict()
+        self.nbytes = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def get(self, key: str) -> Optional[Solution]:
+        """
+            :param key: Content hash of the grid
+            :return: Cached solution, or None
+        """
+
+        solution = self._solutions.get(key)
+
+        if solution is not None:
+            self._solutions.move_to_end(key)
+
+        return solution
+
+    def put(self, key: str, solution: Solution):
+        """
+            This method adds a solution and evicts the least recently used ones beyond the size bound.
+
+            :param key: Content hash of the grid
+            :param solution: Solution of the grid
+            :return: Nothing
+        """
+
+        if key in self._solutions:
+            self.nbytes -= self._solutions.pop(key).nbytes
+
+        self._solutions[key] = solution
+        self.nbytes += solution.nbytes
+
+        while self.nbytes > self.max_bytes and len(self._solutions) > 1:
+            _, evicted = self._solutions.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+
+class RouteServer:
+    grid_dir: str           #: Directory of the served grid files
+    cache: SolutionCache    #: Solved grids by content hash
+    counters: Dict[str, int]    #: Request and cache counters, see *metrics*
+
+    def __init__(self, grid_dir: str = GRID_DIR, max_bytes: int = 256 << 20, workers: Optional[int] = None):
+        """
+            Initiate the route server. It answers which actions lead from a node of a grid to a goal with the maximum
+            total reward. Grids are solved by the route oracle in a process pool, so the event loop never blocks on a
+            solve; the solutions are kept in an LRU cache, and concurrent requests for a grid which is being solved
+            wait for the same solve.
+
+            :param grid_dir: Directory of the served grid files
+            :param max_bytes: Maximum total size of the cached solutions in bytes
+            :param workers: Number of solver processes, the number of cores by default
+        """
+
+        self.grid_dir = os.path.realpath(grid_dir)
+        self.cache = SolutionCache(max_bytes)
+
+        self._pool = ProcessPoolExecutor(workers)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._hashes: "collections.OrderedDict[str, Tuple[Tuple[int, int], str]]" = collections.OrderedDict()
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._server = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+        self.counters = {"requests": 0, "errors": 0, "hits": 0, "misses": 0, "coalesced": 0, "solves": 0}
+
+    def _grid_file(self, grid: str) -> (str, Tuple[int, int]):
+        # Runs in a thread of the default executor, since resolving and stating the file can block on the disk
+        grid_file = os.path.realpath(os.path.join(self.grid_dir, grid))
+
+        try:
+            file_stat = os.stat(grid_file)
+        except OSError:
+            file_stat = None
+
+        if os.path.dirname(grid_file) != self.grid_dir or file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+            raise FileNotFoundError(f"Unknown grid {grid!r}.")
+
+        return grid_file, (file_stat.st_mtime_ns, file_stat.st_size)
+
+    async def _content_hash(self, grid: str) -> (str, str):
+        # A file is only read again once its modification time or size changes
+        loop = asyncio.get_running_loop()
+        grid_file, version = await loop.run_in_executor(None, self._grid_file, grid)
+        known = self._hashes.get(grid_file)
+
+        if known is not None and known[0] == version:
+            self._hashes.move_to_end(grid_file)
+
+            return grid_file, known[1]
+
+        key = await loop.run_in_executor(None, content_hash, grid_file)
+        self._hashes[grid_file] = (version, key)
+        self._hashes.move_to_end(grid_file)
+
+        while len(self._hashes) > HASH_ENTRIES:
+            self._hashes.popitem(last=False)
+
+        return grid_file, key
+
+    async def solution(self, grid: str) -> Solution:
+        """
+            This method provides the solution of a grid from the cache, or solves it in the process pool.
+
+            :param grid: File name of the grid in the grid directory
+            :return: Solution of the grid
+            :raise: Unknown grid exception
+        """
+
+        grid_file, key = await self._content_hash(grid)
+
+        solution = self.cache.get(key)
+
+        if solution is not None:
+            self.counters["hits"] += 1
+
+            return solution
+
+        if key in self._pending:
+            self.counters["coalesced"] += 1
+
+            return await asyncio.shield(self._pending[key])
+
+        self.counters["misses"] += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[key] = future
+
+        try:
+            solution = await loop.run_in_executor(self._pool, solve, grid_file)
+            self.counters["solves"] += 1
+            self.cache.put(key, solution)
+            future.set_result(solution)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._pending[key]
+
+            # Mark the exception as retrieved when no other request waits for this solve
+            if future.done() and not future.cancelled():
+                future.exception()
+
+        return solution
+
+    async def route(self, grid: str, start: Optional[int] = None, position: Optional[Position] = None) -> Dict:
+        """
+            This method answers a route query.
+
+            :param grid: File name of the grid in the grid directory
+            :param start: Node index where the route starts
+            :param position: Position where the route starts, instead of the node index. The starting position of the
+            grid is used if neither is given
+            :return: Grid, grid size, starting node index, action names and the maximum total reward
+            :raise: Unknown grid, illegal node index or unreachable goal exception
+        """
+
+        solution = await self.solution(grid)
+        size = solution.grid_size
+
+        if position is not None:
+            if not (0 <= position[0] < size and 0 <= position[1] < size):
+                raise IndexError(f"Illegal position {list(position)}.")
+
+            start = position[0] * size + position[1]
+        elif start is None:
+            start = solution.start
+
+        actions, score = route(solution, start)
+
+        return {"grid": grid, "grid_size": size, "start": start,
+                "actions": [ACTION_NAMES[action] for action in actions], "score": score}
+
+    def metrics(self) -> Dict:
+        """
+            :return: Request counters, latency percentiles of the latest route requests in milliseconds and the cache
+            hit rate
+        """
+
+        counters = self.counters
+        lookups = counters["hits"] + counters["misses"] + counters["coalesced"]
+        latencies = np.array(self._latencies)
+
+        return {
+            **counters,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) > 0 else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) > 0 else None,
+            "hit_rate": counters["hits"] / lookups if lookups > 0 else None,
+            "cached_grids": len(self.cache),
+            "cached_bytes": self.cache.nbytes,
+            "evictions": self.cache.evictions,
+        }
+
+    async def _route_query(self, query: Dict[str, str]) -> Dict:
+        # Malformed parameters raise IndexError, so that ValueError only stands for an unreachable goal
+        def integer(name: str) -> int:
+            try:
+                return int(query[name])
+            except (KeyError, ValueError):
+                raise IndexError(f"The {name} parameter must be an integer.") from None
+
+        if "grid" not in query:
+            raise IndexError("The grid parameter is required.")
+
+        if "start" in query:
+            return await self.route(query["grid"], integer("start"))
+
+        if "row" in query or "col" in query:
+            return await self.route(query["grid"], position=[integer("row"), integer("col")])
+
+        return await self.route(query["grid"])
+
+    async def _dispatch(self, method: str, target: str) -> (int, Dict):
+        if method != "GET":
+            return 405, {"error": f"Method {method} is not allowed."}
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if url.path == "/metrics":
+            return 200, self.metrics()
+
+        if url.path != "/route":
+            return 404, {"error": f"Unknown path {url.path!r}."}
+
+        start_time = time.perf_counter_ns()
+        self.counters["requests"] += 1
+
+        try:
+            status, body = 200, await self._route_query(query)
+        except FileNotFoundError as e:
+            status, body = 404, {"error": str(e)}
+        except IndexError as e:
+            status, body = 400, {"error": str(e)}
+        except ValueError as e:
+            # An unreachable goal is a valid query without an answer
+            status, body = 422, {"error": str(e)}
+        except Exception as e:
+            status, body = 500, {"error": repr(e)}
+
+        if status != 200:
+            self.counters["errors"] += 1
+
+        self._latencies.append((time.perf_counter_ns() - start_time) * 1e-6)
+
+        return status, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Minimal HTTP/1.1 with keep-alive: GET requests only, bodies are skipped
+        task = asyncio.current_task()
+        self._connections[task] = writer
+
+        try:
+            while True:
+                request_line = await reader.readline()
+
+                if not request_line.strip():
+                    break
+
+                headers = {}
+
+                while True:
+                    line = await reader.readline()
+
+                    if not line.strip():
+                        break
+
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if int(headers.get("content-length", 0)) > 0:
+                    await reader.readexactly(int(headers["content-length"]))
+
+                parts = request_line.decode("latin-1").split()
+
+                if len(parts) == 3:
+                    method, target, version = parts
+                    status, body = await self._dispatch(method, target)
+                else:
+                    version, status, body = "HTTP/1.0", 400, {"error": "Malformed request line."}
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                payload = json.dumps(body).encode()
+
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            del self._connections[task]
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080, unix: Optional[str] = None) -> str:
+        """
+            This method starts listening, either on a TCP port or on a Unix socket.
+
+            :param host: Host of the TCP socket
+            :param port: Port of the TCP socket, 0 for a free port
+            :param unix: Path of the Unix socket, which replaces the TCP socket
+            :return: Address of the server
+        """
+
+        if unix is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=unix)
+
+            return unix
+
+        self._server = await asyncio.start_server(self._handle, host, port)
+        host, port = self._server.sockets[0].getsockname()[:2]
+
+        return f"{host}:{port}"
+
+    async def close(self):
+        """
+            This method stops listening and shuts the process pool down.
+
+            :return: Nothing
+        """
+
+        if self._server is not None:
+            self._server.close()
+
+            # Closing the open connections ends their handlers at the next read
+            connections = list(self._connections.items())
+
+            for _, writer in connections:
+                writer.close()
+
+            await asyncio.gather(*(task for task, _ in connections), return_exceptions=True)
+            await self._server.wait_closed()
+
+        self._pool.shutdown(cancel_futures=True)
+
+
+async def _serve(args: argparse.Namespace):
+    server = RouteServer(args.grid_dir, args.cache_mb << 20, args.workers)
+    address = await server.start(args.host, args.port, args.unix)
+
+    print(f"Serving {server.grid_dir} on {address}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    # Usage: python route_server.py --port 8080, then GET /route?grid=GridTestOne.pkl[&start=0 | &row=0&col=0]
+    parser = argparse.ArgumentParser(description="Serves optimal routes of the grid files in a directory.")
+    parser.add_argument("--grid-dir", default=GRID_DIR, help="Directory of the grid files")
+    parser.add_argument("--host", default="127.0.0.1", help="Host of the TCP socket")
+    parser.add_argument("--port", type=int, default=8080, help="Port of the TCP socket")
+    parser.add_argument("--unix", help="Path of a Unix socket to listen on instead of TCP")
+    parser.add_argument("--workers", type=int, help="Number of solver processes, the number of cores by default")
+    parser.add_argument("--cache-mb", type=int, default=256, help="Maximum size of the solution cache in MiB")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
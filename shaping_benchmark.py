@@ -0,0 +1,179 @@
+import argparse
+import json
+import os.path
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import rl_agents
+from Environment import Environment
+
+GRID_DIR = "grid_worlds/"
+AGENTS = ["QLearningAgent", "SARSAAgent"]
+
+VARIANTS = {
+    "baseline": {},
+    "heuristic": {"heuristic_init": True},
+    "shaping": {"shaping": True},
+    "both": {"heuristic_init": True, "shaping": True},
+}
+"""
+    Agent options of each measured variant
+"""
+
+DISCOUNT_RATE = 0.95
+
+
+class _OptimalPolicy(rl_agents.TrainingHook):
+    def __init__(self, optimal_score: int):
+        """
+            Finds the episode from which the greedy policy reaches the optimal score until the end of the training.
+
+            :param optimal_score: Score of the optimal policy of the discount rate of the agent
+        """
+
+        self.optimal_score = optimal_score
+        self.episode = None
+
+    def on_episode_end(self, agent, record: Dict):
+        _, score = agent.validate()
+
+        if score < self.optimal_score:
+            self.episode = None
+        elif self.episode is None:
+            self.episode = record["episode"]
+
+
+def train(env: Environment, agent_name: str, options: Dict, max_episode: int, seed: int, patience: int,
+          tolerance: float, optimal_score: int) -> Dict:
+    """
+        This method trains an agent with the hyperparameters of *Main* until its convergence criterion is met, and
+        validates it.
+
+        :param env: Environment
+        :param agent_name: Class name of the agent in *rl_agents*
+        :param options: Further parameters of the agent, see *VARIANTS*
+        :param max_episode: Maximum number of training episodes
+        :param seed: Seed of the agent
+        :param patience: Episodes of an unchanged greedy policy for convergence
+        :param tolerance: Maximum change of a Q value in a converged episode
+        :param optimal_score: Score of the optimal policy of the discount rate of the agent
+        :return: Number of episodes and steps until convergence, first episode from which the greedy policy stays
+        optimal (*max_episode* + 1 if it is not optimal at the end), training time and score
+    """
+
+    recorder = rl_agents.MetricsRecorder()
+    optimal = _OptimalPolicy(optimal_score)
+    agent = getattr(rl_agents, agent_name)(
+        env=env, seed=seed, discount_rate=DISCOUNT_RATE, epsilon=1.0, epsilon_decay=0.995, epsilon_min=0.01,
+        alpha=0.1, max_episode=max_episode, hooks=[recorder, optimal], **options,
+        convergence=rl_agents.AllOf(rl_agents.MaxDeltaQ(tolerance), rl_agents.StablePolicy(patience)))
+
+    start = time.perf_counter_ns()
+    agent.train()
+    elapsed_ms = (time.perf_counter_ns() - start) * 1e-6
+
+    _, score = agent.validate()
+
+    return {
+        "episodes": agent.iterations,
+        "converged": agent.converged,
+        "steps": int(recorder.records["steps"].sum()),
+        "optimal_episode": optimal.episode if optimal.episode is not None else max_episode + 1,
+        "train_ms": elapsed_ms,
+        "score": score,
+    }
+
+
+def run(grids: List[str], agents: List[str], variants: List[str], seeds: int, max_episode: int, patience: int,
+        tolerance: float, directory: str) -> Dict:
+    """
+        This method compares the episodes to convergence of the Q-Table initializations and the reward shaping. The
+        training time includes a validation after every episode.
+
+        :param grids: File names of the grids
+        :param agents: Class names of the agents
+        :param variants: Names of the measured variants, see *VARIANTS*
+        :param seeds: Number of seeds of each measurement, from 0
+        :param max_episode: Maximum number of training episodes
+        :param patience: Episodes of an unchanged greedy policy for convergence
+        :param tolerance: Maximum change of a Q value in a converged episode
+        :param directory: Directory of the grid files
+        :return: Report with the mean result of each grid, agent and variant
+    """
+
+    results = []
+
+    for grid in grids:
+        env = Environment(os.path.join(directory, grid))
+
+        # Exact optimum of the total reward, as in Main, and the score of the optimal policy of the agents
+        optimal_scores = []
+
+        for discount_rate in [1.0, DISCOUNT_RATE]:
+            optimal_agent = rl_agents.ValueIterationAgent(env=env, seed=0, discount_rate=discount_rate)
+            optimal_agent.train()
+            optimal_scores.append(optimal_agent.validate()[1])
+
+        optimal_score, target_score = optimal_scores
+
+        for agent_name in agents:
+            baseline = None
+
+            for variant in variants:
+                runs = [train(env, agent_name, VARIANTS[variant], max_episode, seed, patience, tolerance, target_score)
+                        for seed in range(seeds)]
+
+                result = {
+                    "grid": grid,
+                    "agent": agent_name,
+                    "variant": variant,
+                    "episodes": float(np.mean([r["episodes"] for r in runs])),
+                    "converged": sum(r["converged"] for r in runs),
+                    "steps": float(np.mean([r["steps"] for r in runs])),
+                    "optimal_episode": float(np.mean([r["optimal_episode"] for r in runs])),
+                    "train_ms": float(np.mean([r["train_ms"] for r in runs])),
+                    "optimality_gap": float(np.mean([optimal_score - r["score"] for r in runs])),
+                }
+
+                if baseline is None:
+                    baseline = result
+
+                result["episode_reduction"] = 1.0 - result["episodes"] / baseline["episodes"]
+                result["optimal_episode_reduction"] = 1.0 - result["optimal_episode"] / baseline["optimal_episode"]
+                results.append(result)
+
+                print(f"{grid} {agent_name} {variant}: {result['episodes']:.0f} episodes "
+                      f"({result['converged']}/{seeds} converged, {result['episode_reduction']:+.0%}), "
+                      f"optimal from episode {result['optimal_episode']:.0f} "
+                      f"({result['optimal_episode_reduction']:+.0%}), {result['steps']:.0f} steps, "
+                      f"optimality gap {result['optimality_gap']:.1f}")
+
+    return {"seeds": seeds, "max_episode": max_episode, "patience": patience, "tolerance": tolerance,
+            "results": results}
+
+
+if __name__ == "__main__":
+    # Usage: python shaping_benchmark.py [--grids GridTestOne.pkl ...] [--output shaping.json]
+    parser = argparse.ArgumentParser(description="Compares the episodes to convergence of heuristic Q-Table "
+                                                 "initialization and potential-based reward shaping.")
+    parser.add_argument("--grid-dir", default=GRID_DIR, help="Directory of the grid files")
+    parser.add_argument("--grids", nargs="+", help="Grid file names, every grid of the directory by default")
+    parser.add_argument("--agents", nargs="+", default=AGENTS, choices=AGENTS, help="Agents")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS),
+                        help="Variants, the first one is the reference of the reduction")
+    parser.add_argument("--seeds", type=int, default=5, help="Number of seeds of each measurement")
+    parser.add_argument("--max-episode", type=int, default=3000, help="Maximum number of training episodes")
+    parser.add_argument("--patience", type=int, default=50, help="Episodes of an unchanged greedy policy")
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="Maximum change of a Q value")
+    parser.add_argument("--output", help="JSON report file")
+    args = parser.parse_args()
+
+    grids = args.grids or sorted(name for name in os.listdir(args.grid_dir) if name.endswith((".pkl", ".grid")))
+    report = run(grids, args.agents, args.variants, args.seeds, args.max_episode, args.patience, args.tolerance,
+                 args.grid_dir)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,90 @@
+import argparse
+import json
+import os.path
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+STATEMENT = "import Environment, rl_agents"
+
+HEAVY_MODULES = ["matplotlib", "seaborn", "pandas", "scipy", "numba"]
+"""
+    Modules which must not be imported by *STATEMENT*
+"""
+
+PROBE = """
+import resource, sys, time, json
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"import_ms": elapsed * 1000.0, "rss_kb": rss, "baseline_rss_kb": baseline, "heavy": heavy}}))
+"""
+
+
+def measure(statement: str = STATEMENT, repeat: int = 10) -> Dict:
+    """
+        This method imports the given statement in fresh interpreters, the same way a newly spawned worker does, and
+        measures its import time and peak resident memory.
+
+        :param statement: Import statement
+        :param repeat: Number of interpreters
+        :return: Median import time in milliseconds, median peak RSS in MB, RSS of the bare interpreter in MB and the
+        heavy modules which were imported
+    """
+
+    assert repeat > 0, "repeat must be > 0"
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    probe = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    samples: List[Dict] = []
+
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", probe], cwd=root, check=True, capture_output=True,
+                                text=True).stdout
+
+        samples.append(json.loads(output))
+
+    return {
+        "statement": statement,
+        "repeat": repeat,
+        "import_ms": statistics.median(sample["import_ms"] for sample in samples),
+        "rss_mb": statistics.median(sample["rss_kb"] for sample in samples) / 1024.0,
+        "baseline_rss_mb": statistics.median(sample["baseline_rss_kb"] for sample in samples) / 1024.0,
+        "heavy_modules": samples[0]["heavy"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the startup cost of a worker process.")
+    parser.add_argument("--statement", default=STATEMENT, help="Import statement to measure")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of fresh interpreters")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time is higher")
+    parser.add_argument("--max-rss-mb", type=float, help="Fail if the median peak RSS is higher")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    result = measure(args.statement, args.repeat)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"Statement: {result['statement']}")
+        print(f"Import Time: {result['import_ms']:.1f} ms (median of {result['repeat']})")
+        print(f"Peak RSS: {result['rss_mb']:.1f} MB (interpreter alone: {result['baseline_rss_mb']:.1f} MB)")
+        print(f"Heavy Modules: {', '.join(result['heavy_modules']) or 'None'}")
+
+    failures = []
+
+    if result["heavy_modules"]:
+        failures.append(f"heavy modules imported: {', '.join(result['heavy_modules'])}")
+    if args.max_import_ms is not None and result["import_ms"] > args.max_import_ms:
+        failures.append(f"import time {result['import_ms']:.1f} ms > {args.max_import_ms} ms")
+    if args.max_rss_mb is not None and result["rss_mb"] > args.max_rss_mb:
+        failures.append(f"peak RSS {result['rss_mb']:.1f} MB > {args.max_rss_mb} MB")
+
+    if failures:
+        sys.exit("Startup regression: " + "; ".join(failures))
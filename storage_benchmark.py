@@ -0,0 +1,160 @@
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+import benchmark
+import rl_agents
+from rl_agents.QStorage import STORAGES, make_q_table
+
+SIZES = [100, 1000]
+
+
+def update_rate(storage: str, state_size: int, updates: int, visited: float, seed: int) -> Dict:
+    """
+        This method measures the single-pair TD updates of the training loops (``np.max(Q[next_state])`` and
+        ``Q[state, action] += delta``) on random state-action pairs, drawn from a fraction of the node indices.
+
+        :param storage: Q-Table storage, see *rl_agents.QStorage.STORAGES*
+        :param state_size: Number of node indices
+        :param updates: Number of updates
+        :param visited: Fraction of the node indices which are updated
+        :param seed: Seed of the random pairs
+        :return: Updates per second, size of the table and peak traced memory of the table and the updates in bytes
+    """
+
+    rng = np.random.default_rng(seed)
+    nodes = rng.choice(state_size, max(1, int(state_size * visited)), replace=False)
+    states = nodes[rng.integers(0, len(nodes), updates)].tolist()
+    next_states = nodes[rng.integers(0, len(nodes), updates)].tolist()
+    actions = rng.integers(0, 4, updates).tolist()
+    rewards = rng.integers(-3, 0, updates).tolist()
+
+    def apply(Q):
+        for state, action, reward, next_state in zip(states, actions, rewards, next_states):
+            delta = 0.1 * (reward + 0.95 * np.max(Q[next_state]) - Q[state, action])
+            Q[state, action] += delta
+
+        return Q
+
+    Q = make_q_table(storage, state_size, 4)
+    start = time.perf_counter_ns()
+    apply(Q)
+    seconds = (time.perf_counter_ns() - start) * 1e-9
+
+    # Tracing slows allocations down, so the memory is measured in a separate pass
+    tracemalloc.start()
+    apply(make_q_table(storage, state_size, 4))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"updates_per_sec": updates / seconds, "table_bytes": Q.nbytes, "peak_bytes": peak}
+
+
+def train(env, storage: str, episodes: int, seed: int, reference: np.ndarray = None) -> Dict:
+    """
+        This method trains a Q-Learning agent with the given storage and validates it.
+
+        :param env: Environment
+        :param storage: Q-Table storage
+        :param episodes: Number of training episodes
+        :param seed: Seed of the agent
+        :param reference: Greedy policy of the *float32* agent, to measure the agreement of the policies
+        :return: Training rate, size of the table, peak traced memory of the training, score and greedy policy
+    """
+
+    recorder = rl_agents.MetricsRecorder()
+
+    # The sparse storage starts from zeros like the dense ones, so that every storage explores the same way
+    options = {"initial": 0.0} if storage == "sparse" else None
+
+    def make_agent():
+        return rl_agents.QLearningAgent(env=env, seed=seed, discount_rate=0.95, epsilon=1.0, epsilon_decay=0.99,
+                                        epsilon_min=0.05, alpha=0.1, max_episode=episodes, hooks=[recorder],
+                                        q_storage=storage, q_storage_options=options)
+
+    tracemalloc.start()
+    make_agent().train()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    agent = make_agent()
+    start = time.perf_counter_ns()
+    agent.train()
+    seconds = (time.perf_counter_ns() - start) * 1e-9
+
+    _, score = agent.validate()
+    policy = np.asarray(agent.greedy_policy())
+
+    return {
+        "train_steps_per_sec": int(recorder.records["steps"].sum()) / seconds,
+        "table_bytes": agent.Q.nbytes,
+        "peak_bytes": peak,
+        "score": score,
+        "policy_agreement": float(np.mean(policy == reference)) if reference is not None else 1.0,
+        "policy": policy,
+    }
+
+
+def run(sizes: List[int], storages: List[str], episodes: int, updates: int, visited: float, seed: int,
+        directory: str) -> Dict:
+    """
+        This method compares the Q-Table storages on grids of the given sizes.
+
+        :param sizes: Grid sizes
+        :param storages: Q-Table storages, "float32" is always measured first as the reference
+        :param episodes: Number of training episodes
+        :param updates: Number of single-pair updates
+        :param visited: Fraction of the node indices touched by the single-pair updates
+        :param seed: Seed of the grids, agents and updates
+        :param directory: Directory of the generated grid files
+        :return: Report with one result per grid size and storage
+    """
+
+    storages = ["float32"] + [storage for storage in storages if storage != "float32"]
+    results = []
+
+    for size in sizes:
+        env, _ = benchmark.build_grid(size, seed, directory)
+        reference = None
+
+        for storage in storages:
+            trained = train(env, storage, episodes, seed, reference)
+            policy = trained.pop("policy")
+
+            if reference is None:
+                reference = policy
+
+            results.append({"size": size, "storage": storage, **trained,
+                            **{f"update_{key}": value for key, value in
+                               update_rate(storage, size * size, updates, visited, seed).items()}})
+
+            print(f"{size}x{size} {storage}: {results[-1]['table_bytes'] / 2 ** 20:.2f} MiB table, "
+                  f"{results[-1]['train_steps_per_sec']:.0f} steps/s, "
+                  f"{results[-1]['update_updates_per_sec']:.0f} updates/s, score {results[-1]['score']}")
+
+    return {"episodes": episodes, "updates": updates, "visited": visited, "seed": seed, "results": results}
+
+
+if __name__ == "__main__":
+    # Usage: python storage_benchmark.py --sizes 100 1000 [--output storage.json]
+    parser = argparse.ArgumentParser(description="Compares the memory and update speed of the Q-Table storages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Grid sizes")
+    parser.add_argument("--storages", nargs="+", default=STORAGES, choices=STORAGES, help="Q-Table storages")
+    parser.add_argument("--episodes", type=int, default=200, help="Training episodes")
+    parser.add_argument("--updates", type=int, default=200000, help="Single-pair updates of the update benchmark")
+    parser.add_argument("--visited", type=float, default=0.05, help="Fraction of the node indices updated")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the grids, agents and updates")
+    parser.add_argument("--grid-dir", default=tempfile.gettempdir(), help="Directory of the generated grid files")
+    parser.add_argument("--output", help="JSON report file")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.storages, args.episodes, args.updates, args.visited, args.seed, args.grid_dir)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)